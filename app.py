@@ -9,7 +9,7 @@ app = create_app()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('FLASK_DEBUG', 'True') == 'True'
+    debug = app.debug
     
     print("=" * 60)
     print("🏋️  ACEest Fitness & Gym - Flask Application")
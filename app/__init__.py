@@ -1,40 +1,171 @@
 """
 ACEest Fitness & Gym - Flask Application Factory
 """
-import os
-from datetime import datetime
-from flask import Flask
+import time
 
+_IMPORT_STARTED = time.perf_counter()
+
+import os  # noqa: E402
+from datetime import datetime  # noqa: E402
+from flask import Flask  # noqa: E402
+from jinja2 import FileSystemBytecodeCache  # noqa: E402
+
+from app.json_provider import FastJSONProvider  # noqa: E402
+from app.startup import StartupTimer  # noqa: E402
+
+_IMPORT_FINISHED = time.perf_counter()
+
+
+def create_app(config_name=None):
+    """Application factory pattern.
+
+    ``config_name`` selects a class from ``config.py``; it defaults to the
+    ``FLASK_ENV`` environment variable, then to development.
+    """
+    timer = StartupTimer()
+    timer.record('import_flask', _IMPORT_FINISHED - _IMPORT_STARTED)
+
+    with timer.phase('create_flask'):
+        app = Flask(__name__)
+        app.json = FastJSONProvider(app)
 
-def create_app(config_name='development'):
-    """Application factory pattern"""
-    app = Flask(__name__)
-    
     # Load configuration
-    if config_name == 'testing':
-        app.config['TESTING'] = True
-        app.config['SECRET_KEY'] = 'test-secret-key'
-    else:
-        app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-        app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', 'True') == 'True'
-    
+    with timer.phase('load_config'):
+        from config import config
+        config_name = config_name or os.environ.get('FLASK_ENV') or 'default'
+        # Settings are read from the environment here; ProductionConfig
+        # refuses to load without a SECRET_KEY
+        app.config.from_object(config.get(config_name, config['default'])())
+        app.logger.setLevel(app.config['LOG_LEVEL'])
+        # Flask 3 dropped JSONIFY_PRETTYPRINT_REGULAR; map it onto the JSON provider
+        app.json.compact = not app.config['JSONIFY_PRETTYPRINT_REGULAR']
+        app.json.sort_keys = False
+
+    # Behind a load balancer or ingress, take the client address from the
+    # X-Forwarded-* headers those proxies set (and only from them)
+    if app.config['TRUSTED_PROXY_HOPS']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config['TRUSTED_PROXY_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # Templates precompiled at image build time are loaded from the bytecode
+    # cache; this must be configured before the Jinja environment is created
+    if app.config['TEMPLATE_CACHE_DIR']:
+        os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+        app.jinja_options = dict(app.jinja_options,
+                                 bytecode_cache=FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR']))
+
+    # Recover the workout store from its write-ahead log, if persistence is enabled
+    if app.config['WAL_DIR']:
+        with timer.phase('recover_store'):
+            init_store_log(app)
+
     # Register blueprints
-    from app.routes import main_bp
-    app.register_blueprint(main_bp)
-    
+    with timer.phase('register_blueprints'):
+        from app.routes import main_bp
+        app.register_blueprint(main_bp)
+
+        from app.reports import report_service
+        report_service.init_app(app)
+
+        from app.ratelimit import limiter
+        limiter.init_app(app)
+
+        from app.idempotency import idempotency
+        idempotency.init_app(app)
+
+        from app.tasks import task_pool
+        task_pool.init_app(app)
+
+        from app.experiments import experiments
+        experiments.init_app(app)
+
+        from app.compression import Compression
+        Compression(app)
+
+        from app.assets import Assets
+        Assets(app)
+
+        # Registered after compression so it sees (and compares) uncompressed bodies
+        if app.config['SHADOW_URL']:
+            from app.shadow import ShadowMirror
+            ShadowMirror(app)
+
+        # Record served requests for `flask loadgen --replay`
+        if app.config['TRAFFIC_LOG']:
+            from app.loadgen import TrafficRecorder
+            TrafficRecorder(app)
+
+        from app.cli import register_commands
+        register_commands(app)
+
     # Add template filters
-    @app.template_filter('datetime')
-    def format_datetime(value):
-        if isinstance(value, str):
-            try:
-                value = datetime.fromisoformat(value)
-            except ValueError:
-                return value
-        return value.strftime('%Y-%m-%d %H:%M')
-    
+    with timer.phase('setup_templates'):
+        app.add_template_filter(format_datetime, 'datetime')
+
+    register_health_routes(app, timer)
+
+    timer.finish()
+    app.extensions['startup_timer'] = timer
+
+    return app
+
+
+def format_datetime(value):
+    """Template filter rendering a datetime (or ISO string) as ``YYYY-MM-DD HH:MM``"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value.strftime('%Y-%m-%d %H:%M')
+
+
+def register_health_routes(app, timer):
+    """Add the ``/health`` endpoints reporting status, startup and runtime counters"""
     # Health check endpoint
     @app.route('/health')
     def health_check():
         return {'status': 'healthy', 'service': 'ACEest Fitness API'}, 200
-    
-    return app
+
+    @app.route('/health/startup')
+    def startup_timings():
+        return {'status': 'healthy', 'startup': timer.to_dict()}, 200
+
+    @app.route('/health/limits')
+    def limit_counters():
+        return {'status': 'healthy',
+                'limits': app.extensions['rate_limiter'].stats(),
+                'idempotency': app.extensions['idempotency'].stats(),
+                'workers': app.extensions['task_pool'].stats()}, 200
+
+    @app.route('/health/shadow')
+    def shadow_stats():
+        shadow = app.extensions.get('shadow')
+        return {'status': 'healthy', 'enabled': shadow is not None,
+                'shadow': shadow.stats() if shadow else None}, 200
+
+    @app.route('/health/experiments')
+    def experiment_summary():
+        return {'status': 'healthy', 'experiments': app.extensions['experiments'].summary()}, 200
+
+
+def init_store_log(app):
+    """Replay the write-ahead log into the shared store and keep logging to it"""
+    import atexit
+    from app.models import workout_session
+    from app.wal import WriteAheadLog
+
+    if workout_session.log is not None:
+        return workout_session.log
+
+    log = WriteAheadLog(app.config['WAL_DIR'],
+                        fsync=app.config['WAL_FSYNC'],
+                        fsync_interval=app.config['WAL_FSYNC_INTERVAL_MS'] / 1000,
+                        snapshot_every=app.config['WAL_SNAPSHOT_EVERY'])
+    replayed = log.recover(workout_session)
+    workout_session.attach_log(log)
+    atexit.register(log.close)
+    app.logger.info('Recovered %d workouts (%d log records replayed)',
+                    workout_session.get_workout_count(), replayed)
+    return log
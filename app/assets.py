@@ -0,0 +1,121 @@
+"""
+Static asset fingerprinting for ACEest Fitness & Gym application
+Version: 1.4 - Content-hashed, minified assets with a manifest
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict
+
+from flask import request, url_for
+
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE_AROUND = re.compile(r'\s*([{};,>])\s*')
+_CSS_SPACE_AFTER_COLON = re.compile(r':\s+')
+
+
+def minify_css(text: str) -> str:
+    """Remove comments and insignificant whitespace from a stylesheet"""
+    text = _CSS_COMMENT.sub('', text)
+    text = ' '.join(text.split())
+    text = _CSS_SPACE_AROUND.sub(r'\1', text)
+    text = _CSS_SPACE_AFTER_COLON.sub(':', text)
+    return text.replace(';}', '}')
+
+
+def minify_js(text: str) -> str:
+    """Drop indentation, blank lines and whole-line comments.
+
+    Line breaks are kept, so automatic semicolon insertion still applies.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//')) + '\n'
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+def build_assets(static_folder: str) -> Dict[str, str]:
+    """Write fingerprinted copies of all CSS/JS under ``static_folder`` to ``dist/``.
+
+    Returns the manifest mapping each source path to its built path, both
+    relative to the static folder. Files from earlier builds are removed.
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for name in sorted(files):
+            stem, ext = os.path.splitext(name)
+            minify = MINIFIERS.get(ext)
+            if minify is None:
+                continue
+            source = os.path.join(root, name)
+            with open(source, encoding='utf-8') as f:
+                data = minify(f.read()).encode('utf-8')
+
+            relative = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            built = '/'.join(filter(None, (DIST_DIR, os.path.dirname(relative), f'{stem}.{digest}{ext}')))
+            target = os.path.join(static_folder, *built.split('/'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+            manifest[relative] = built
+
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class Assets:
+    """Resolves asset URLs through the build manifest.
+
+    Templates call ``asset_url('css/style.css')``. When ``flask build-assets``
+    has been run, this returns the fingerprinted file, which is served with
+    an immutable ``Cache-Control``. Otherwise it falls back to the source file.
+    """
+
+    def __init__(self, app=None):
+        self.manifest: Dict[str, str] = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.load(app.static_folder)
+        app.add_template_global(self.asset_url)
+        app.after_request(self.after_request)
+        app.extensions['assets'] = self
+
+    def load(self, static_folder: str):
+        """Read the manifest written by ``build_assets``, if there is one"""
+        path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def asset_url(self, filename: str) -> str:
+        """URL of a static asset, fingerprinted when it has been built"""
+        return url_for('static', filename=self.manifest.get(filename, filename))
+
+    def after_request(self, response):
+        if (request.endpoint == 'static' and response.status_code in (200, 304)
+                and request.view_args.get('filename', '').startswith(DIST_DIR + '/')):
+            # The name changes with the content, so the file never needs revalidating
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
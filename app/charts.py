@@ -0,0 +1,123 @@
+"""
+Server-side chart rendering for ACEest Fitness & Gym application
+Version: 1.4 - PNG/SVG charts rendered in the shared worker pool with an LRU cache
+"""
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+from app.startup import lazy_import
+from app.tasks import TaskPool, task_pool
+
+
+CATEGORIES = ['Warm-up', 'Workout', 'Cool-down']
+CATEGORY_COLORS = ['#0dcaf0', '#dc3545', '#0d6efd']
+
+CHART_KINDS = ('categories', 'durations')
+CHART_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def category_stats(session) -> Dict[str, Dict[str, int]]:
+    """Collect the per-category numbers a chart needs"""
+    return {
+        category: {
+            'count': session.get_count_by_category(category),
+            'duration': session.get_duration_by_category(category)
+        }
+        for category in CATEGORIES
+    }
+
+
+def render_chart(kind: str, fmt: str, stats: Dict[str, Dict[str, int]]) -> bytes:
+    """Render a chart to PNG or SVG bytes"""
+    figure_module = lazy_import('matplotlib.figure')
+
+    fig = figure_module.Figure(figsize=(5, 3.5), dpi=100)
+    ax = fig.add_subplot()
+
+    if kind == 'categories':
+        counts = [stats[c]['count'] for c in CATEGORIES]
+        if sum(counts) > 0:
+            ax.pie(counts, labels=CATEGORIES, colors=CATEGORY_COLORS, autopct='%1.0f%%',
+                   wedgeprops={'width': 0.5})
+        else:
+            ax.text(0.5, 0.5, 'No workouts yet', ha='center', va='center')
+            ax.set_axis_off()
+        ax.set_title('Exercises by Category')
+    elif kind == 'durations':
+        durations = [stats[c]['duration'] for c in CATEGORIES]
+        ax.bar(CATEGORIES, durations, color=CATEGORY_COLORS)
+        ax.set_ylabel('Minutes')
+        ax.set_title('Total Duration by Category')
+    else:
+        raise ValueError(f'Unknown chart kind: {kind}')
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    """Renders charts in the shared worker pool and caches results by store version"""
+
+    def __init__(self, cache_size: int = 32, timeout: float = 30, pool: Optional[TaskPool] = None):
+        self.cache_size = cache_size
+        self.timeout = timeout
+        self.pool = pool or task_pool
+        self.renders = 0
+        self._cache: 'OrderedDict[Tuple, Future]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _render(self, kind: str, fmt: str, stats: Dict) -> bytes:
+        with self._lock:
+            self.renders += 1
+        return render_chart(kind, fmt, stats)
+
+    def get(self, kind: str, fmt: str, session) -> bytes:
+        """Get a rendered chart, rendering it in the pool on a cache miss.
+
+        The chart's numbers are snapshotted with the store's cache tag before
+        the cache lock is taken, so the lock only guards the cache itself.
+        Raises ``QueueFull`` when the pool cannot take another render.
+        """
+        if kind not in CHART_KINDS:
+            raise ValueError(f'Unknown chart kind: {kind}')
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f'Unknown chart format: {fmt}')
+
+        with session.lock:
+            key = (kind, fmt, session.cache_tag)
+            stats = category_stats(session)
+
+        with self._lock:
+            future = self._cache.get(key)
+            if future is not None:
+                self._cache.move_to_end(key)
+            else:
+                # Concurrent requests for the same chart share a single render
+                future = self.pool.submit(self._render, kind, fmt, stats)
+                self._cache[key] = future
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except Exception:
+            with self._lock:
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+            raise
+
+    def clear(self):
+        """Drop all cached charts"""
+        with self._lock:
+            self._cache.clear()
+
+
+# Shared renderer used by the chart endpoint
+chart_renderer = ChartRenderer()
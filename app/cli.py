@@ -0,0 +1,62 @@
+"""
+Flask CLI commands for ACEest Fitness & Gym application
+Version: 1.4 - Build-time helpers for container images and a load generator
+"""
+import json
+
+import click
+
+from app.assets import build_assets
+
+
+def register_commands(app):
+    """Register custom CLI commands on the app"""
+
+    @app.cli.command('precompile-templates')
+    def precompile_templates():
+        """Compile all Jinja templates into the bytecode cache"""
+        if app.jinja_env.bytecode_cache is None:
+            raise click.ClickException('TEMPLATE_CACHE_DIR is not set; nothing to precompile into')
+
+        names = app.jinja_env.list_templates()
+        for name in names:
+            app.jinja_env.get_template(name)
+        click.echo(f'Precompiled {len(names)} templates')
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Write fingerprinted, minified static assets and their manifest"""
+        manifest = build_assets(app.static_folder)
+        app.extensions['assets'].manifest = manifest
+        for source, built in sorted(manifest.items()):
+            click.echo(f'{source} -> {built}')
+        click.echo(f'Built {len(manifest)} assets')
+
+    @app.cli.command('loadgen')
+    @click.option('--url', default=None, help='Base URL to load; the app is called in-process when omitted')
+    @click.option('--rate', default=50.0, show_default=True, help='Average requests per second')
+    @click.option('--duration', default=10.0, show_default=True, help='Seconds of generated load')
+    @click.option('--mix', default=None,
+                  help='Scenario weights, e.g. "form_post=1,api_post=2,stats=3,recent=3,page=1"')
+    @click.option('--concurrency', default=32, show_default=True, help='Requests in flight at most')
+    @click.option('--replay', type=click.Path(exists=True, dir_okay=False), default=None,
+                  help='Replay a TRAFFIC_LOG recording instead of generating requests')
+    @click.option('--speed', default=1.0, show_default=True, help='Replay speed multiplier')
+    @click.option('--seed', type=int, default=None, help='Random seed for a repeatable run')
+    @click.option('--json', 'as_json', is_flag=True, help='Print the results as JSON')
+    def loadgen_command(url, rate, duration, mix, concurrency, replay, speed, seed, as_json):
+        """Send open-loop load and report throughput and latency percentiles"""
+        from app.loadgen import AppTarget, parse_mix, poisson_schedule, replay_schedule, run_load
+        from app.shadow import ConnectionPool
+
+        try:
+            if replay:
+                arrivals = replay_schedule(replay, speed)
+            else:
+                arrivals = poisson_schedule(rate, duration, parse_mix(mix) if mix else None, seed)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc))
+        target = ConnectionPool(url, size=concurrency, timeout=30) if url else AppTarget(app)
+
+        result = run_load(target, arrivals, concurrency)
+        click.echo(json.dumps(result.to_dict(), indent=2) if as_json else result.format())
@@ -0,0 +1,138 @@
+"""
+Response compression for ACEest Fitness & Gym application
+Version: 1.4 - gzip/brotli negotiation with a cache of compressed variants
+"""
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Iterable, Iterator, Optional, Tuple
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip is always available
+    brotli = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'image/svg+xml',
+}
+
+
+def compress(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """Compress a whole body"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int = 6) -> Iterator[bytes]:
+    """Compress a streamed body chunk by chunk"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+class CompressedCache:
+    """LRU cache of compressed bodies, bounded by total size"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self._entries: 'OrderedDict[Tuple[str, str, str], bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return data
+
+    def put(self, key: Tuple[str, str, str], data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class Compression:
+    """Compresses responses according to the request's Accept-Encoding.
+
+    Bodies smaller than ``COMPRESS_MIN_SIZE`` are sent as-is. Responses with
+    a strong ETag are versioned, so their compressed variants are cached and
+    each payload is compressed only once per encoding.
+    """
+
+    def __init__(self, app=None):
+        self.cache = CompressedCache()
+        self.min_size = 500
+        self.level = 6
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.level = app.config.get('COMPRESS_LEVEL', self.level)
+        self.cache.max_bytes = app.config.get('COMPRESS_CACHE_BYTES', self.cache.max_bytes)
+        app.after_request(self.after_request)
+        app.extensions['compression'] = self
+
+    def after_request(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        if response.is_streamed:
+            response.response = compress_stream(response.iter_encoded(), encoding, self.level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            key = (request.path, etag, encoding) if etag and not weak else None
+            compressed = self.cache.get(key) if key else None
+            if compressed is None:
+                compressed = compress(data, encoding, self.level)
+                if key:
+                    self.cache.put(key, compressed)
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # The encoded body differs byte-for-byte, so only weak equality holds
+            response.set_etag(etag, weak=True)
+        return response
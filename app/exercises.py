@@ -0,0 +1,112 @@
+"""
+Exercise name index for ACEest Fitness & Gym application
+Version: 1.4 - Prefix trie with per-node top-k for autocomplete
+"""
+from typing import Dict, List
+
+from app.sketches import normalize_exercise
+
+
+MAX_WORD_STARTS = 4  # words of a name that can start a match
+MAX_DEPTH = 32  # characters indexed from each word start
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.top: List[str] = []  # most used names below this node, most used first
+
+
+class ExerciseIndex:
+    """Distinct exercise names with usage counts, searchable by prefix.
+
+    Names are normalized (case and whitespace) and indexed from the start of
+    every word, so "press" finds "Bench Press". Each trie node keeps its
+    ``top_k`` most used names. Counts only grow until ``clear``, so a name
+    can only enter a node's list by overtaking its last entry. A lookup is
+    therefore a walk down the prefix, independent of how many workouts or
+    names are stored. Only the first ``MAX_WORD_STARTS`` words and
+    ``MAX_DEPTH`` characters from each are indexed, so the cost of adding a
+    name is bounded whatever its length.
+    """
+
+    def __init__(self, top_k: int = 10):
+        self.top_k = top_k
+        self.counts: Dict[str, int] = {}
+        self.labels: Dict[str, str] = {}  # normalized name -> name as last entered
+        self._root = _Node()
+        self._paths: Dict[str, List[_Node]] = {}  # normalized name -> nodes whose lists it may enter
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, exercise: str):
+        """Count one use of an exercise name"""
+        key = normalize_exercise(exercise)
+        if not key:
+            return
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        self.labels[key] = ' '.join(exercise.split())
+
+        nodes = self._paths.get(key)
+        if nodes is None:
+            nodes = self._paths[key] = self._insert_paths(key)
+        for node in nodes:
+            if node.top and node.top[0] == key:
+                continue  # already the most used name here
+            self._promote(node.top, key, count)
+
+    def _insert_paths(self, key: str) -> List[_Node]:
+        """Create the trie paths for a new name; returns each node on them once"""
+        nodes = {id(self._root): self._root}
+        starts = [0] + [i + 1 for i, char in enumerate(key) if char == ' ']
+        for start in starts[:MAX_WORD_STARTS]:
+            node = self._root
+            for char in key[start:start + MAX_DEPTH]:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                node = child
+                nodes[id(node)] = node  # paths can share nodes, e.g. "press press"
+        return list(nodes.values())
+
+    def _promote(self, top: List[str], key: str, count: int):
+        counts = self.counts
+        if key in top:
+            i = top.index(key)
+            if i == 0 or counts[top[i - 1]] >= count:
+                return  # still in order, the common case for popular names
+            del top[i]
+        elif len(top) >= self.top_k:
+            if counts[top[-1]] >= count:
+                return
+            top.pop()
+        # Insert after every name with at least the same count (ties keep first-seen order)
+        i = len(top)
+        while i > 0 and counts[top[i - 1]] < count:
+            i -= 1
+        top.insert(i, key)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """Most used exercise names matching a prefix, most used first"""
+        prefix = normalize_exercise(prefix)
+        node = self._root
+        for char in prefix[:MAX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        keys = node.top
+        if len(prefix) > MAX_DEPTH:
+            # Deeper than the trie goes: check the rest of the prefix against the names
+            keys = [key for key in keys if key.startswith(prefix) or f' {prefix}' in key]
+        return [{'exercise': self.labels[key], 'count': self.counts[key]}
+                for key in keys[:limit]]
+
+    def clear(self):
+        self.counts = {}
+        self.labels = {}
+        self._root = _Node()
+        self._paths = {}
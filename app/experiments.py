@@ -0,0 +1,273 @@
+"""
+A/B experiment metrics for ACEest Fitness & Gym application
+Version: 1.4 - Per-variant traffic, latency and conversion counters, sharded and flushed in the background
+"""
+import itertools
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from flask import g, request
+
+from app.loadgen import LOADGEN_HEADER
+from app.ratelimit import limiter
+from app.shadow import SHADOW_HEADER
+from app.sketches import HyperLogLog, LatencyHistogram
+
+
+VARIANT_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+OTHER_VARIANT = 'other'  # invalid variants, and new ones beyond max_variants
+VISITOR_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+VISITOR_COOKIE_MAX_AGE = 365 * 24 * 3600
+
+
+class VariantStats:
+    """Counts for one variant since the last flush, kept in a shard"""
+
+    __slots__ = ('requests', 'errors', 'client_errors', 'page_views', 'events', 'latency',
+                 'visitors', 'converted')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.client_errors = 0
+        self.page_views = 0
+        self.events: Dict[str, int] = {}
+        self.latency = LatencyHistogram()
+        self.visitors: Set[str] = set()
+        self.converted: Set[str] = set()  # visitors with at least one event
+
+
+class VariantTotals:
+    """Flushed counts for one variant; visitors are counted with HyperLogLog"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.client_errors = 0
+        self.page_views = 0
+        self.events: Dict[str, int] = {}
+        self.latency = LatencyHistogram()
+        self.visitors = HyperLogLog()
+        self.converted = HyperLogLog()
+
+    def add(self, stats: VariantStats):
+        self.requests += stats.requests
+        self.errors += stats.errors
+        self.client_errors += stats.client_errors
+        self.page_views += stats.page_views
+        for event, count in stats.events.items():
+            self.events[event] = self.events.get(event, 0) + count
+        self.latency.merge(stats.latency)
+        for visitor in stats.visitors:
+            self.visitors.add(visitor)
+        for visitor in stats.converted:
+            self.converted.add(visitor)
+
+    def to_dict(self) -> Dict:
+        visitors = self.visitors.count()
+        converted = min(self.converted.count(), visitors)
+        latency = self.latency.to_dict()
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'error_rate': round(self.errors / self.requests, 4) if self.requests else None,
+            'client_errors': self.client_errors,
+            'page_views': self.page_views,
+            'visitors': visitors,
+            'converted_visitors': converted,
+            'conversion_rate': round(converted / visitors, 4) if visitors else None,
+            'events': dict(sorted(self.events.items())),
+            'latency_ms': {name: latency[f'{name}_ms'] for name in ('mean', 'p50', 'p90', 'p99')},
+        }
+
+
+class _Shard:
+    __slots__ = ('lock', 'pending')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending: Dict[str, VariantStats] = {}
+
+
+class Experiments:
+    """Per-variant metrics for the A/B deployments (``k8s/ab-testing``).
+
+    Each request is tagged with its variant from the ``X-Version`` header or
+    the ``version`` cookie the ingress routes on, falling back to this
+    deployment's ``EXPERIMENT_VARIANT``. Request threads update one of
+    ``shards`` shards, each with its own lock, so they seldom contend. A
+    background thread merges the shards into the totals every
+    ``flush_interval`` seconds, and ``summary`` reports those totals.
+    Visitors are identified by a first-party ``visitor_cookie`` set on their
+    first HTML page; clients without one (API callers) are identified like
+    rate-limited clients, by known API key or client IP. Generated load and
+    shadow copies are not counted.
+    """
+
+    def __init__(self, shards: int = 16):
+        self.enabled = True
+        self.header = 'X-Version'
+        self.cookie = 'version'
+        self.visitor_cookie = 'visitor'
+        self.default_variant = 'default'
+        self.flush_interval = 5.0
+        self.max_variants = 8
+        self.flushed_at: Optional[datetime] = None
+        self._shards: List[_Shard] = [_Shard() for _ in range(shards)]
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+        self._variants: Set[str] = set()
+        self._totals: Dict[str, VariantTotals] = {}
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def init_app(self, app):
+        """Configure tagging from the Flask app config and start the flusher"""
+        self.enabled = app.config.get('EXPERIMENTS_ENABLED', self.enabled)
+        self.header = app.config.get('EXPERIMENT_HEADER', self.header)
+        self.cookie = app.config.get('EXPERIMENT_COOKIE', self.cookie)
+        self.visitor_cookie = app.config.get('EXPERIMENT_VISITOR_COOKIE', self.visitor_cookie)
+        self.default_variant = app.config.get('EXPERIMENT_VARIANT', self.default_variant)
+        self.flush_interval = app.config.get('EXPERIMENT_FLUSH_INTERVAL', self.flush_interval)
+        if self.enabled:
+            app.before_request(self.before_request)
+            app.after_request(self.after_request)
+            if self._flusher is None and self.flush_interval > 0:
+                self._flusher = threading.Thread(target=self._flush_loop, name='experiment-flusher', daemon=True)
+                self._flusher.start()
+        app.extensions['experiments'] = self
+
+    def variant(self) -> str:
+        """Variant of the current request"""
+        raw = request.headers.get(self.header) or request.cookies.get(self.cookie)
+        if not raw:
+            return self.default_variant
+        raw = raw.strip()
+        if not VARIANT_PATTERN.match(raw):
+            return OTHER_VARIANT
+        if raw not in self._variants:
+            # Bound the number of variants so arbitrary header values cannot grow memory
+            with self._lock:
+                if len(self._variants) >= self.max_variants:
+                    return OTHER_VARIANT
+                self._variants.add(raw)
+        return raw
+
+    def _shard(self) -> _Shard:
+        index = getattr(self._local, 'shard', None)
+        if index is None:
+            index = self._local.shard = next(self._next_shard) % len(self._shards)
+        return self._shards[index]
+
+    @staticmethod
+    def _stats(shard: _Shard, variant: str) -> VariantStats:
+        stats = shard.pending.get(variant)
+        if stats is None:
+            stats = shard.pending[variant] = VariantStats()
+        return stats
+
+    def _counted(self) -> bool:
+        return not (request.path.startswith(('/health', '/static'))
+                    or request.headers.get(LOADGEN_HEADER) or request.headers.get(SHADOW_HEADER))
+
+    def _visitor(self) -> Optional[str]:
+        visitor = request.cookies.get(self.visitor_cookie)
+        return visitor if visitor and VISITOR_PATTERN.match(visitor) else None
+
+    def before_request(self):
+        if self._counted():
+            g.experiment = (self.variant(), time.perf_counter(), self._visitor())
+        else:
+            g.pop('experiment', None)
+
+    def after_request(self, response):
+        tagged = g.pop('experiment', None)
+        if tagged is None:
+            return response
+        variant, started, visitor = tagged
+        elapsed = time.perf_counter() - started
+        status = response.status_code
+        page_view = status < 400 and request.method == 'GET' and response.mimetype == 'text/html'
+        if visitor is None:
+            if page_view:
+                # A browser: remember it across requests (and addresses)
+                visitor = secrets.token_hex(8)
+                response.set_cookie(self.visitor_cookie, visitor, max_age=VISITOR_COOKIE_MAX_AGE,
+                                    httponly=True, samesite='Lax')
+            else:
+                visitor = limiter.client_key()
+
+        shard = self._shard()
+        with shard.lock:
+            stats = self._stats(shard, variant)
+            stats.requests += 1
+            stats.latency.record(elapsed)
+            if status >= 500:
+                stats.errors += 1
+            elif status >= 400:
+                stats.client_errors += 1
+            elif page_view:
+                stats.page_views += 1
+            stats.visitors.add(visitor)
+        return response
+
+    def track(self, event: str, count: int = 1):
+        """Count a conversion event (e.g. a created workout) for the current request's variant"""
+        tagged = g.get('experiment')
+        if tagged is None:
+            return
+        visitor = tagged[2] or limiter.client_key()
+        shard = self._shard()
+        with shard.lock:
+            stats = self._stats(shard, tagged[0])
+            stats.events[event] = stats.events.get(event, 0) + count
+            stats.converted.add(visitor)
+
+    def flush(self):
+        """Merge every shard's counts into the totals"""
+        for shard in self._shards:
+            with shard.lock:
+                pending, shard.pending = shard.pending, {}
+            if not pending:
+                continue
+            with self._lock:
+                for variant, stats in pending.items():
+                    totals = self._totals.get(variant)
+                    if totals is None:
+                        totals = self._totals[variant] = VariantTotals()
+                    totals.add(stats)
+        self.flushed_at = datetime.now()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def reset(self):
+        """Drop all counts, e.g. when starting a new experiment"""
+        for shard in self._shards:
+            with shard.lock:
+                shard.pending = {}
+        with self._lock:
+            self._totals = {}
+            self._variants = set()
+
+    def summary(self) -> Dict:
+        """Per-variant totals as of the last flush"""
+        with self._lock:
+            variants = {name: totals.to_dict() for name, totals in sorted(self._totals.items())}
+        return {
+            'enabled': self.enabled,
+            'default_variant': self.default_variant,
+            'flush_interval': self.flush_interval,
+            'flushed_at': self.flushed_at.isoformat() if self.flushed_at else None,
+            'variants': variants,
+        }
+
+
+# Shared experiment metrics, fed by the request hooks and the workout routes
+experiments = Experiments()
@@ -0,0 +1,156 @@
+"""
+Idempotent writes for ACEest Fitness & Gym application
+Version: 1.4 - Idempotency-Key replay cache for retried POSTs
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict
+
+from flask import jsonify, make_response, request
+
+from app.ratelimit import limiter
+
+
+MAX_KEY_LENGTH = 255
+
+
+class _Entry:
+    """A response stored under an idempotency key (pending until ``done`` is set)"""
+
+    __slots__ = ('fingerprint', 'expires', 'done', 'status', 'body', 'mimetype')
+
+    def __init__(self, fingerprint: str, expires: float):
+        self.fingerprint = fingerprint
+        self.expires = expires
+        self.done = threading.Event()
+        self.status = None
+        self.body = None
+        self.mimetype = None
+
+
+class IdempotencyCache:
+    """Remembers successful responses by ``Idempotency-Key`` so retries are not re-applied.
+
+    Holds at most ``max_keys`` entries of at most ``max_body_bytes`` each, each
+    for ``ttl`` seconds. A retry that arrives while the original is still
+    running waits for it. Keys are scoped per client, and reusing a key with a
+    different request body is rejected. Only 2xx responses are stored, so a
+    request that failed validation can be corrected and retried with its key.
+    """
+
+    def __init__(self, max_keys: int = 10000, ttl: float = 24 * 3600,
+                 max_body_bytes: int = 64 * 1024, wait_timeout: float = 10):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.max_body_bytes = max_body_bytes
+        self.wait_timeout = wait_timeout
+        self.replays = 0
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()  # oldest first
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the cache from the Flask app config"""
+        self.max_keys = app.config.get('IDEMPOTENCY_MAX_KEYS', self.max_keys)
+        self.ttl = app.config.get('IDEMPOTENCY_TTL', self.ttl)
+        app.extensions['idempotency'] = self
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, now: float):
+        # Entries share one TTL, so the oldest are always the first to expire
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires > now and len(self._entries) <= self.max_keys:
+                break
+            del self._entries[key]
+
+    def reserve(self, key: str, fingerprint: str):
+        """Claim a key; returns ``(entry, True)`` for a new key, else the existing entry"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry, False
+            entry = self._entries[key] = _Entry(fingerprint, now + self.ttl)
+            self._evict(now)
+            return entry, True
+
+    def complete(self, key: str, entry: _Entry, response):
+        """Store a finished response, or release the key if it should not be replayed"""
+        body = None if response.is_streamed else response.get_data()
+        if 200 <= response.status_code < 300 and body is not None and len(body) <= self.max_body_bytes:
+            entry.status = response.status_code
+            entry.body = body
+            entry.mimetype = response.mimetype
+        else:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+        entry.done.set()
+
+    def abandon(self, key: str, entry: _Entry):
+        """Release a key whose request raised"""
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+        entry.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        return {'keys': len(self._entries), 'max_keys': self.max_keys, 'replays': self.replays}
+
+    def idempotent(self, view):
+        """Decorator replaying the stored response for a repeated ``Idempotency-Key``"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get('Idempotency-Key')
+            if key is None:
+                return view(*args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return jsonify({'success': False,
+                                'error': f'Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters'}), 400
+
+            scoped = f'{limiter.client_key()}|{request.method} {request.path}|{key}'
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            entry, created = self.reserve(scoped, fingerprint)
+
+            if not created:
+                return self._replay(entry, fingerprint)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                self.abandon(scoped, entry)
+                raise
+            self.complete(scoped, entry, response)
+            return response
+        return wrapper
+
+    def _replay(self, entry: _Entry, fingerprint: str):
+        if entry.fingerprint != fingerprint:
+            return jsonify({'success': False,
+                            'error': 'Idempotency-Key was already used with a different request'}), 422
+        if not entry.done.wait(self.wait_timeout) or entry.body is None:
+            # Still running, or it failed and released the key: the client should retry
+            response = jsonify({'success': False, 'error': 'A request with this Idempotency-Key is in progress'})
+            response.headers['Retry-After'] = '1'
+            return response, 409
+
+        with self._lock:
+            self.replays += 1
+        response = make_response(entry.body, entry.status)
+        response.mimetype = entry.mimetype
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+
+
+# Shared cache used by the write endpoints
+idempotency = IdempotencyCache()
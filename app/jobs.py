@@ -0,0 +1,164 @@
+"""
+Background job queue for ACEest Fitness & Gym application
+Version: 1.4 - Local worker pool with a bounded queue for long-running work
+"""
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from app.tasks import QueueFull, TaskPool  # noqa: F401  (QueueFull is re-exported)
+
+
+class Job:
+    """A unit of background work and its outcome"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, func: Callable, args: tuple = (), key: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.func = func
+        self.args = args
+        self.status = self.QUEUED
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.finished_at: Optional[str] = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes"""
+        return self._done.wait(timeout)
+
+    def run(self):
+        """Execute the job, recording its result or error"""
+        self.status = self.RUNNING
+        try:
+            self.result = self.func(*self.args)
+            self.status = self.DONE
+        except Exception as exc:  # the error is reported through the job status
+            self.error = str(exc)
+            self.status = self.FAILED
+        finally:
+            self.finished_at = datetime.now().isoformat()
+            self._done.set()
+
+    def complete(self, result):
+        """Mark the job done without running it (e.g. result already cached)"""
+        self.result = result
+        self.status = self.DONE
+        self.finished_at = datetime.now().isoformat()
+        self._done.set()
+
+    def to_dict(self) -> Dict:
+        """Convert job to dictionary"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """Runs jobs on a fixed set of worker threads fed by a bounded queue.
+
+    Given a ``pool``, jobs run on that shared ``TaskPool`` instead, and
+    ``submit`` raises ``QueueFull`` when the pool is saturated.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16, max_jobs: int = 256,
+                 pool: Optional[TaskPool] = None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_jobs = max_jobs
+        self.pool = pool
+        self._queue: 'queue.Queue[Job]' = queue.Queue(maxsize=max_queue)
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._active: Dict[str, Job] = {}  # dedupe key -> unfinished job
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def _start_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f'job-worker-{len(self._workers)}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _execute(self, job: Job):
+        try:
+            job.run()
+        finally:
+            with self._lock:
+                if job.key is not None and self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    def _remember(self, job: Job):
+        self._jobs[job.id] = job
+        # Forget the oldest finished jobs once the table is full
+        if len(self._jobs) > self.max_jobs:
+            for job_id in [j.id for j in self._jobs.values() if j.finished][:len(self._jobs) - self.max_jobs]:
+                del self._jobs[job_id]
+
+    def submit(self, func: Callable, *args, key: Optional[str] = None) -> Job:
+        """Queue a job, reusing an unfinished job with the same key"""
+        with self._lock:
+            if key is not None and key in self._active:
+                return self._active[key]
+
+            job = Job(func, args, key=key)
+            if self.pool is not None:
+                # Cleanup waits for the lock, so the job is registered below before it can finish;
+                # QueueFull propagates when the pool is saturated
+                self.pool.submit(self._execute, job)
+            else:
+                try:
+                    self._queue.put_nowait(job)
+                except queue.Full:
+                    raise QueueFull('Job queue is full, try again later')
+
+            if key is not None:
+                self._active[key] = job
+            self._remember(job)
+            if self.pool is None:
+                self._start_workers()
+        return job
+
+    def add_finished(self, result, key: Optional[str] = None) -> Job:
+        """Register a job whose result is already available"""
+        job = Job(None, key=key)
+        job.complete(result)
+        with self._lock:
+            self._remember(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        """Number of jobs waiting to run"""
+        if self.pool is not None:
+            with self._lock:
+                return sum(1 for job in self._jobs.values() if job.status == Job.QUEUED)
+        return self._queue.qsize()
@@ -0,0 +1,91 @@
+"""
+JSON serialization for ACEest Fitness & Gym application
+Version: 1.4 - Optional orjson encoder and pre-encoded workout lists
+"""
+import json
+from typing import Any, Iterable
+
+from flask import current_app, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency, the stdlib encoder is used instead
+    orjson = None
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Encode an object as compact UTF-8 JSON (no key sorting)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:  # e.g. integers beyond 64 bits
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses orjson when it is installed.
+
+    Types orjson would format differently (datetimes, dataclasses) are
+    passed through to Flask's default handler, and values orjson cannot
+    encode (integers beyond 64 bits) fall back to the stdlib encoder.
+    Output decodes to the same values as the default provider, but
+    non-ASCII text is written as UTF-8 rather than ``\\u`` escapes, since
+    orjson has no ``ensure_ascii`` option.
+    """
+
+    def _orjson_options(self, indent: bool = False) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or set(kwargs) - {'separators'}:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode('utf-8')
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def is_pretty(self) -> bool:
+        """Whether responses are indented (``compact`` unset means debug mode only)"""
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def response(self, *args: Any, **kwargs: Any):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            data = orjson.dumps(obj, default=self.default, option=self._orjson_options(indent=self.is_pretty()))
+        except orjson.JSONEncodeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(data + b'\n', mimetype=self.mimetype)
+
+
+def workouts_response(workouts: Iterable, **fields: Any):
+    """JSON response with a ``workouts`` list built from cached per-workout fragments.
+
+    Avoids building a dict per workout; falls back to ``jsonify`` when
+    pretty-printing is enabled.
+    """
+    provider = current_app.json
+    if not isinstance(provider, FastJSONProvider) or provider.is_pretty():
+        return jsonify(dict(fields, workouts=[w.to_dict() for w in workouts]))
+
+    head = provider.dumps(fields).encode('utf-8')
+    separator = b',' if fields else b''
+    body = b''.join((
+        head[:-1], separator, b'"workouts":[',
+        b','.join([w.to_json() for w in workouts]),
+        b']}\n',
+    ))
+    return current_app.response_class(body, mimetype=provider.mimetype)
@@ -0,0 +1,330 @@
+"""
+Load generation and traffic replay for ACEest Fitness & Gym application
+Version: 1.4 - Open-loop load against a URL or the in-process app, with HDR-style latency histograms
+"""
+import atexit
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import request
+
+from app.shadow import SHADOW_HEADER
+from app.sketches import PERCENTILES, LatencyHistogram
+
+
+LOADGEN_HEADER = 'X-Loadgen'
+CATEGORIES = ['Warm-up', 'Workout', 'Cool-down']
+EXERCISES = ['Push-ups', 'Squats', 'Running', 'Bench Press', 'Plank', 'Lunges', 'Stretching',
+             'Yoga', 'Rowing', 'Cycling', 'Deadlift', 'Jumping Jacks']
+PAGES = ('/workouts', '/analytics')
+
+
+# ==================== REQUEST MIX ====================
+
+def _form_post(rng: random.Random):
+    body = urlencode({'exercise': rng.choice(EXERCISES), 'duration': rng.randint(5, 90),
+                      'category': rng.choice(CATEGORIES)})
+    return 'POST', '/add_workout', body.encode(), {'Content-Type': 'application/x-www-form-urlencoded'}
+
+
+def _api_post(rng: random.Random):
+    body = json.dumps({'exercise': rng.choice(EXERCISES), 'duration': rng.randint(5, 90),
+                       'category': rng.choice(CATEGORIES)})
+    return 'POST', '/api/workouts', body.encode(), {'Content-Type': 'application/json'}
+
+
+def _stats(rng: random.Random):
+    return 'GET', '/api/workouts/stats', None, {}
+
+
+def _recent(rng: random.Random):
+    return 'GET', '/api/workouts/recent?limit=10', None, {}
+
+
+def _page(rng: random.Random):
+    return 'GET', rng.choice(PAGES), None, {'Accept': 'text/html'}
+
+
+SCENARIOS: Dict[str, Callable] = {
+    'form_post': _form_post,
+    'api_post': _api_post,
+    'stats': _stats,
+    'recent': _recent,
+    'page': _page,
+}
+DEFAULT_MIX = {'form_post': 1, 'api_post': 2, 'stats': 3, 'recent': 3, 'page': 1}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse a mix like ``"api_post=2,stats=3,page=1"`` into scenario weights"""
+    mix = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f'Unknown scenario {name!r}; choose from {", ".join(SCENARIOS)}')
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f'Weight for {name} must be a number')
+        if mix[name] < 0:
+            raise ValueError(f'Weight for {name} must be >= 0')
+    if not any(mix.values()):
+        raise ValueError('The mix needs at least one scenario with a positive weight')
+    return mix
+
+
+class Arrival:
+    """A request scheduled ``offset`` seconds after the run starts"""
+
+    __slots__ = ('offset', 'name', 'method', 'path', 'body', 'headers')
+
+    def __init__(self, offset: float, name: str, method: str, path: str,
+                 body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None):
+        self.offset = offset
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = headers or {}
+
+
+def poisson_schedule(rate: float, duration: float, mix: Optional[Dict[str, float]] = None,
+                     seed: Optional[int] = None) -> Iterator[Arrival]:
+    """Arrivals at an average of ``rate`` per second for ``duration`` seconds.
+
+    Gaps are exponentially distributed, like independent users, so bursts
+    occur naturally instead of the evenly spaced requests of a fixed timer.
+    """
+    if rate <= 0 or duration <= 0:
+        raise ValueError('rate and duration must be positive')
+    mix = mix or DEFAULT_MIX
+    return _poisson(rate, duration, list(mix), list(mix.values()), random.Random(seed))
+
+
+def _poisson(rate: float, duration: float, names: List[str], weights: List[float],
+             rng: random.Random) -> Iterator[Arrival]:
+    offset = 0.0
+    while True:
+        offset += rng.expovariate(rate)
+        if offset >= duration:
+            return
+        name = rng.choices(names, weights)[0]
+        yield Arrival(offset, name, *SCENARIOS[name](rng))
+
+
+def replay_schedule(path: str, speed: float = 1.0) -> Iterator[Arrival]:
+    """Arrivals from a recorded traffic log, with gaps divided by ``speed``"""
+    if speed <= 0:
+        raise ValueError('speed must be positive')
+    return _replay(path, speed)
+
+
+def _replay(path: str, speed: float) -> Iterator[Arrival]:
+    started = None
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if started is None:
+                started = record['t']
+            body = record.get('body')
+            headers = {'Content-Type': record['content_type']} if record.get('content_type') else {}
+            yield Arrival((record['t'] - started) / speed, f'{record["method"]} {record["route"]}',
+                          record['method'], record['path'],
+                          body.encode('utf-8') if body is not None else None, headers)
+
+
+# ==================== RUNNING LOAD ====================
+
+class AppTarget:
+    """Sends requests to a Flask app in-process, one test client per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: Optional[bytes],
+                headers: Dict[str, str]) -> Tuple[int, bytes]:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, data=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class LoadResult:
+    """Latency histograms and status counts from a load run"""
+
+    def __init__(self):
+        self.overall = LatencyHistogram()
+        self.by_name: Dict[str, LatencyHistogram] = {}
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0
+        self.sent = 0
+        self.max_lag_ms = 0.0  # how far the dispatcher fell behind its schedule
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, name: str, status: Optional[int], seconds: float):
+        with self._lock:
+            histogram = self.by_name.get(name)
+            if histogram is None:
+                histogram = self.by_name[name] = LatencyHistogram()
+            histogram.record(seconds)
+            self.overall.record(seconds)
+            if status is None:
+                self.errors += 1
+            else:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            completed = self.overall.count
+            return {
+                'sent': self.sent,
+                'completed': completed,
+                'errors': self.errors,
+                'elapsed_s': round(self.elapsed, 3),
+                'throughput_rps': round(completed / self.elapsed, 2) if self.elapsed else None,
+                'max_dispatch_lag_ms': round(self.max_lag_ms, 3),
+                'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+                'latency': self.overall.to_dict(),
+                'by_request': {name: histogram.to_dict() for name, histogram in sorted(self.by_name.items())},
+            }
+
+    def format(self) -> str:
+        """Human-readable summary table"""
+        summary = self.to_dict()
+        lines = [
+            f'{summary["completed"]}/{summary["sent"]} requests in {summary["elapsed_s"]}s '
+            f'({summary["throughput_rps"]} req/s), {summary["errors"]} errors, '
+            f'max dispatch lag {summary["max_dispatch_lag_ms"]} ms',
+            'statuses: ' + ', '.join(f'{status}={count}' for status, count in summary['statuses'].items()),
+            '',
+            f'{"request":<32}{"count":>8}' + ''.join(f'{f"p{p:g}":>10}' for p in PERCENTILES) + f'{"max":>10}',
+        ]
+        rows = list(summary['by_request'].items()) + [('all', summary['latency'])]
+        for name, stats in rows:
+            cells = [stats[f'p{p:g}_ms'] for p in PERCENTILES] + [stats['max_ms']]
+            lines.append(f'{name[:31]:<32}{stats["count"]:>8}'
+                         + ''.join(f'{cell:>10.2f}' if cell is not None else f'{"-":>10}' for cell in cells))
+        return '\n'.join(lines)
+
+
+def _send(target, arrival: Arrival, scheduled: float, result: LoadResult):
+    headers = dict(arrival.headers)
+    headers[LOADGEN_HEADER] = '1'
+    try:
+        status, _ = target.request(arrival.method, arrival.path, arrival.body, headers)
+    except Exception:
+        status = None
+    result.record(arrival.name, status, time.perf_counter() - scheduled)
+
+
+def run_load(target, arrivals: Iterable[Arrival], concurrency: int = 32) -> LoadResult:
+    """Send each arrival at its scheduled time (open loop) and measure the responses.
+
+    Arrivals are dispatched on schedule whether or not earlier requests have
+    finished; when all ``concurrency`` senders are busy they wait in line.
+    Latency is measured from the scheduled time rather than the send time, so
+    a backed-up server shows in the percentiles instead of quietly lowering
+    the offered rate (coordinated omission). ``target`` needs a
+    ``request(method, path, body, headers) -> (status, body)`` method, such as
+    ``AppTarget`` or ``app.shadow.ConnectionPool``.
+    """
+    result = LoadResult()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadgen') as executor:
+        for arrival in arrivals:
+            scheduled = started + arrival.offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                result.max_lag_ms = max(result.max_lag_ms, -delay * 1000)
+            result.sent += 1
+            executor.submit(_send, target, arrival, scheduled, result)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+# ==================== RECORDING ====================
+
+class TrafficRecorder:
+    """Appends served requests to an NDJSON log that ``replay_schedule`` can replay.
+
+    Each line holds the wall-clock time, method, path with query string,
+    matched route, status and (text bodies up to ``max_body_bytes``) the body
+    with its content type. Headers such as ``X-API-Key`` are not recorded,
+    nor are bodies without a ``Content-Length`` (chunked uploads), since their
+    size is only known once read. Health checks, static files, mirrored and
+    generated requests are skipped. The log is closed at interpreter exit.
+    """
+
+    def __init__(self, app=None):
+        self.path = None
+        self.max_body_bytes = 64 * 1024
+        self.recorded = 0
+        self._file = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.path = app.config['TRAFFIC_LOG']
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+        atexit.register(self.close)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.extensions['traffic_recorder'] = self
+
+    def _should_record(self) -> bool:
+        return not (request.headers.get(LOADGEN_HEADER) or request.headers.get(SHADOW_HEADER)
+                    or request.path.startswith(('/health', '/static')))
+
+    def _should_record_body(self) -> bool:
+        return request.content_length is not None and request.content_length <= self.max_body_bytes
+
+    def before_request(self):
+        # Cache the body now; once a view parses a form the raw stream is gone
+        if self._should_record() and self._should_record_body():
+            request.get_data(cache=True)
+
+    def after_request(self, response):
+        if not self._should_record():
+            return response
+        record = {
+            't': time.time(),
+            'method': request.method,
+            'path': request.full_path if request.query_string else request.path,
+            'route': request.url_rule.rule if request.url_rule else 'unmatched',
+            'status': response.status_code,
+        }
+        if self._should_record_body():
+            body = request.get_data()
+            if body:
+                try:
+                    record['body'] = body.decode('utf-8')
+                    record['content_type'] = request.content_type
+                except UnicodeDecodeError:
+                    pass
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self.recorded += 1
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -2,22 +2,112 @@
 Data models for ACEest Fitness & Gym application
 Version: 1.1 - Enhanced with session tracking and date management
 """
-from datetime import datetime
-from typing import List, Dict, Optional
-import uuid
+from datetime import date, datetime
+from functools import lru_cache
+from heapq import nlargest, nsmallest
+from itertools import chain, islice
+from random import getrandbits
+import re
+import threading
+from typing import Callable, Container, Iterable, Iterator, List, Dict, Optional, Tuple, Union
+
+from app.exercises import ExerciseIndex
+from app.json_provider import dumps_bytes
+from app.query import WorkoutQuery
+from app.rollups import RollupIndex
+from app.sketches import WorkoutSketches, normalize_exercise
+
+
+CATEGORIES = ('Warm-up', 'Workout', 'Cool-down')
+MAX_EXERCISE_LENGTH = 100
+MAX_DURATION = 1440  # minutes (24 hours)
+
+def new_session_id(taken: Container[str] = ()) -> str:
+    """Generate an 8-hex-digit session ID that is not already in ``taken``"""
+    while True:
+        session_id = '%08x' % getrandbits(32)
+        if session_id not in taken:
+            return session_id
+
+
+# The shape ``datetime.isoformat`` gives the naive timestamps this app stores
+_TIMESTAMP_SHAPE = re.compile(r'\d{4}-\d{2}-\d{2}T(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d(?:\.\d{6})?')
+
+
+@lru_cache(maxsize=4096)
+def _day_number(iso_date: str) -> int:
+    return date.fromisoformat(iso_date).toordinal()
+
+
+def _parse_timestamp(timestamp: str) -> Tuple[Optional[datetime], str]:
+    """Validate an ISO timestamp, returning its datetime (or None) and ISO date.
+    
+    Timestamps of the usual shape are checked with a regex and the cached
+    date lookup and left unparsed; others are parsed once. Either way a
+    malformed timestamp raises ValueError here, not when first used.
+    """
+    if isinstance(timestamp, str) and _TIMESTAMP_SHAPE.fullmatch(timestamp):
+        _day_number(timestamp[:10])  # rejects impossible dates such as 2025-02-30
+        return None, timestamp[:10]
+    created = datetime.fromisoformat(timestamp)
+    return created, created.date().isoformat()
 
 
 class Workout:
-    """Workout model representing a single workout entry"""
+    """Workout model representing a single workout entry
+    
+    The creation time is kept as a datetime (or as the timestamp string it
+    was loaded from); the ISO ``timestamp`` and ``date`` strings are derived
+    on first use. Workouts are treated as immutable once created, which lets
+    ``to_json`` cache the encoded form.
+    """
+    
+    __slots__ = ('exercise', 'duration', 'category', 'session_id', '_created', '_timestamp', '_date', '_json')
     
     def __init__(self, exercise: str, duration: int, category: str = "Workout", 
-                 timestamp: Optional[str] = None, session_id: Optional[str] = None):
+                 timestamp: Union[str, datetime, None] = None, session_id: Optional[str] = None):
         self.exercise = exercise
         self.duration = duration  # in minutes
         self.category = category  # Warm-up, Workout, Cool-down
-        self.timestamp = timestamp or datetime.now().isoformat()
-        self.session_id = session_id or str(uuid.uuid4())[:8]
-        self.date = datetime.fromisoformat(self.timestamp).date().isoformat()
+        if not timestamp:
+            timestamp = datetime.now()
+        if isinstance(timestamp, datetime):
+            self._created = timestamp
+            self._timestamp = None
+            self._date = None
+        else:
+            self._created, self._date = _parse_timestamp(timestamp)
+            self._timestamp = timestamp
+        self.session_id = session_id or new_session_id()
+        self._json = None
+    
+    @property
+    def timestamp(self) -> str:
+        """ISO 8601 creation time"""
+        if self._timestamp is None:
+            self._timestamp = self._created.isoformat()
+        return self._timestamp
+    
+    @property
+    def created_at(self) -> datetime:
+        """Creation time as a datetime"""
+        if self._created is None:
+            self._created = datetime.fromisoformat(self._timestamp)
+        return self._created
+    
+    @property
+    def date(self) -> str:
+        """ISO date the workout was logged on"""
+        if self._date is None:
+            self._date = self._created.date().isoformat()
+        return self._date
+    
+    @property
+    def day_number(self) -> int:
+        """Proleptic Gregorian ordinal of ``date``, used for date bucketing"""
+        if self._created is not None:
+            return self._created.toordinal()
+        return _day_number(self._date)
     
     def to_dict(self) -> Dict:
         """Convert workout to dictionary"""
@@ -30,6 +120,30 @@ class Workout:
             'date': self.date
         }
     
+    def to_json(self) -> bytes:
+        """Compact JSON encoding of ``to_dict``, cached after the first call"""
+        if self._json is None:
+            self._json = dumps_bytes(self.to_dict())
+        return self._json
+    
+    @classmethod
+    def from_fields(cls, exercise: str, duration: int, category: str,
+                    timestamp: str, session_id: str) -> 'Workout':
+        """Create workout from already-stored fields (bulk-load path).
+        
+        Skips session ID generation and keeps the timestamp string; usual
+        ISO timestamps are validated by shape and parsed only on first use.
+        """
+        workout = cls.__new__(cls)
+        workout.exercise = exercise
+        workout.duration = duration
+        workout.category = category
+        workout.session_id = session_id
+        workout._created, workout._date = _parse_timestamp(timestamp)
+        workout._timestamp = timestamp
+        workout._json = None
+        return workout
+    
     @classmethod
     def from_dict(cls, data: Dict) -> 'Workout':
         """Create workout from dictionary"""
@@ -51,23 +165,99 @@ class WorkoutSession:
     def __init__(self):
         self.workouts: List[Workout] = []
         self.sessions: Dict[str, List[Workout]] = {}  # session_id -> workouts
+        self.by_category: Dict[str, List[Workout]] = {}  # category -> workouts in insertion order
+        self.by_exercise: Dict[str, List[Workout]] = {}  # normalized exercise name -> workouts
+        self.by_day: Dict[int, List[Workout]] = {}  # day ordinal -> workouts
+        self.version = 0  # bumped on every change, used as a cache key
+        self.instance_id = new_session_id()  # distinguishes stores across replicas/restarts
+        self.rollups = RollupIndex()  # per-day totals for time series
+        self.sketches = WorkoutSketches()  # fixed-memory approximate analytics
+        self.exercises = ExerciseIndex()  # exercise-name prefix index for suggestions
+        self.lock = threading.RLock()  # serializes writes against snapshots
+        self._total_duration = 0
+        self._category_totals: Dict[str, List[int]] = {}  # category -> [count, duration]
+        self.log = None  # optional write-ahead log (app.wal.WriteAheadLog)
+    
+    @property
+    def cache_tag(self) -> str:
+        """Identifies the current contents of this store, for ETags"""
+        return f'{self.instance_id}-{self.version}'
+    
+    def attach_log(self, log):
+        """Persist every subsequent change to a write-ahead log"""
+        self.log = log
+        log.attach(self)
     
     def add_workout(self, exercise: str, duration: int, category: str = "Workout", 
                     session_id: Optional[str] = None) -> Workout:
         """Add a new workout to the session"""
-        workout = Workout(exercise, duration, category, session_id=session_id)
+        workout = Workout(exercise, duration, category, session_id=session_id or new_session_id(self.sessions))
+        with self.lock:
+            self._insert(workout)
+            sequence = self.log.append_add(workout) if self.log else None
+        
+        # Wait for durability outside the lock so concurrent writers share an fsync
+        if sequence is not None:
+            self.log.commit(sequence)
+        
+        return workout
+    
+    def restore_workout(self, workout: Workout):
+        """Insert an existing workout without logging it (used by recovery)"""
+        with self.lock:
+            self._insert(workout)
+    
+    def bulk_load(self, workouts: Iterable[Workout], batch_size: int = 1000) -> int:
+        """Insert many prebuilt workouts, logging them with one commit per batch"""
+        loaded = 0
+        iterator = iter(workouts)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            sequence = None
+            with self.lock:
+                for workout in batch:
+                    self._insert(workout)
+                    if self.log:
+                        sequence = self.log.append_add(workout)
+            if sequence is not None:
+                self.log.commit(sequence)
+            loaded += len(batch)
+        return loaded
+    
+    def _insert(self, workout: Workout):
+        # Derive keys first, so a bad workout raises before any index changes
+        day = workout.day_number
+        exercise = normalize_exercise(workout.exercise)
         self.workouts.append(workout)
         
         # Track by session
         if workout.session_id not in self.sessions:
             self.sessions[workout.session_id] = []
         self.sessions[workout.session_id].append(workout)
-        
-        return workout
+        self.by_category.setdefault(workout.category, []).append(workout)
+        self.by_exercise.setdefault(exercise, []).append(workout)
+        self.by_day.setdefault(day, []).append(workout)
+        totals = self._category_totals.get(workout.category)
+        if totals is None:
+            totals = self._category_totals[workout.category] = [0, 0]
+        totals[0] += 1
+        totals[1] += workout.duration
+        self._total_duration += workout.duration
+        self.rollups.add(workout)
+        self.sketches.add(workout)
+        self.exercises.add(workout.exercise)
+        self.version += 1
     
     def get_workouts_by_category(self, category: str) -> List[Workout]:
         """Get all workouts in a specific category"""
-        return [w for w in self.workouts if w.category == category]
+        return list(self.by_category.get(category, ()))
+    
+    def get_page(self, offset: int = 0, limit: int = 50, category: Optional[str] = None) -> List[Workout]:
+        """Get a slice of workouts in insertion order, optionally from one category"""
+        workouts = self.workouts if category is None else self.by_category.get(category, [])
+        return workouts[offset:offset + limit]
     
     def get_all_workouts(self) -> List[Workout]:
         """Get all workouts"""
@@ -75,11 +265,17 @@ class WorkoutSession:
     
     def get_total_duration(self) -> int:
         """Calculate total workout duration"""
-        return sum(w.duration for w in self.workouts)
+        return self._total_duration
     
     def get_duration_by_category(self, category: str) -> int:
         """Get total duration for a specific category"""
-        return sum(w.duration for w in self.workouts if w.category == category)
+        totals = self._category_totals.get(category)
+        return totals[1] if totals else 0
+    
+    def get_count_by_category(self, category: str) -> int:
+        """Get number of workouts in a specific category"""
+        totals = self._category_totals.get(category)
+        return totals[0] if totals else 0
     
     def get_workout_count(self) -> int:
         """Get total number of workouts"""
@@ -87,12 +283,141 @@ class WorkoutSession:
     
     def clear_workouts(self):
         """Clear all workouts"""
-        self.workouts.clear()
+        with self.lock:
+            self.workouts.clear()
+            self.sessions = {}
+            self.by_category = {}
+            self.by_exercise = {}
+            self.by_day = {}
+            self._total_duration = 0
+            self._category_totals = {}
+            self.rollups.clear()
+            self.sketches.clear()
+            self.exercises.clear()
+            self.version += 1
+            sequence = self.log.append_clear() if self.log else None
+        
+        if sequence is not None:
+            self.log.commit(sequence)
     
     def get_workouts_by_date(self, target_date: str) -> List[Workout]:
         """Get all workouts for a specific date"""
         return [w for w in self.workouts if w.date == target_date]
     
+    def iter_workouts(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                      limit: Optional[int] = None) -> Iterator[Workout]:
+        """Stream workouts in insertion order, optionally within a date range (inclusive)"""
+        workouts = self.workouts if limit is None else islice(self.workouts, limit)
+        for workout in workouts:
+            if date_from and workout.date < date_from:
+                continue
+            if date_to and workout.date > date_to:
+                continue
+            yield workout
+    
+    # Intersect a second index only when it is about as selective as the first;
+    # otherwise checking its predicate on each candidate is cheaper
+    INTERSECT_RATIO = 2
+    
+    def _index_paths(self, query: WorkoutQuery) -> Dict[str, Tuple[int, Callable[[], Iterable[Workout]]]]:
+        """Indexes usable for a query: name -> (estimated rows, row source)"""
+        paths = {}
+        if query.session_id is not None:
+            rows = self.sessions.get(query.session_id, [])
+            paths['session_id'] = (len(rows), lambda rows=rows: rows)
+        if query.exercise is not None:
+            rows = self.by_exercise.get(query.exercise, [])
+            paths['exercise'] = (len(rows), lambda rows=rows: rows)
+        if query.categories is not None:
+            lists = [self.by_category.get(c, []) for c in dict.fromkeys(query.categories)]
+            paths['category'] = (sum(map(len, lists)), lambda lists=lists: chain.from_iterable(lists))
+        if query.date_from is not None or query.date_to is not None:
+            days = [self.by_day[o] for o in self.rollups.days(query.date_from, query.date_to)]
+            paths['date'] = (sum(map(len, days)), lambda days=days: chain.from_iterable(days))
+        return paths
+    
+    @staticmethod
+    def _predicates(query: WorkoutQuery) -> Dict[str, Callable[[Workout], bool]]:
+        """Row checks for every predicate in a query, cheapest first"""
+        checks = {}
+        if query.min_duration is not None:
+            checks['min_duration'] = lambda w: w.duration >= query.min_duration
+        if query.max_duration is not None:
+            checks['max_duration'] = lambda w: w.duration <= query.max_duration
+        if query.categories is not None:
+            categories = set(query.categories)
+            checks['category'] = lambda w: w.category in categories
+        if query.session_id is not None:
+            checks['session_id'] = lambda w: w.session_id == query.session_id
+        if query.date_from is not None or query.date_to is not None:
+            low = query.date_from.toordinal() if query.date_from else float('-inf')
+            high = query.date_to.toordinal() if query.date_to else float('inf')
+            checks['date'] = lambda w: low <= w.day_number <= high
+        if query.exercise is not None:
+            checks['exercise'] = lambda w: normalize_exercise(w.exercise) == query.exercise
+        return checks
+    
+    def query(self, query: WorkoutQuery) -> Tuple[List[Workout], Dict]:
+        """Run a query, returning the matching page of workouts and its plan.
+        
+        Picks the index with the fewest estimated rows, intersects it with any
+        index of similar size, and applies the remaining predicates while
+        streaming the candidates. Without a sort, scanning stops as soon as
+        the requested page is filled.
+        """
+        paths = self._index_paths(query)
+        checks = self._predicates(query)
+        plan = {
+            'access': 'full_scan',
+            'estimates': {name: estimate for name, (estimate, _) in paths.items()},
+            'intersected': [],
+            'filters': [],
+            'order': 'index',
+        }
+        
+        rows: Iterable[Workout] = self.workouts
+        allowed = None  # ids of rows in every intersected index
+        if paths:
+            primary = min(paths, key=lambda name: paths[name][0])
+            estimate, source = paths[primary]
+            plan['access'] = f'index:{primary}'
+            rows = source()
+            checks.pop(primary)
+            
+            for name, (other_estimate, other_source) in sorted(paths.items(), key=lambda item: item[1][0]):
+                if name == primary or other_estimate > estimate * self.INTERSECT_RATIO:
+                    continue
+                ids = {id(w) for w in other_source()}
+                allowed = ids if allowed is None else allowed & ids
+                plan['intersected'].append(name)
+                checks.pop(name)
+        
+        plan['filters'] = list(checks)
+        filters = list(checks.values())
+        if allowed is not None:
+            filters.insert(0, lambda w: id(w) in allowed)
+        scanned = 0
+        
+        def matching():
+            nonlocal scanned
+            for workout in rows:
+                scanned += 1
+                if all(check(workout) for check in filters):
+                    yield workout
+        
+        end = query.offset + query.limit
+        if query.sort_field is None:
+            page = list(islice(matching(), query.offset, end))
+        else:
+            plan['order'] = f'sort:{"-" if query.descending else ""}{query.sort_field}'
+            select = nlargest if query.descending else nsmallest
+            field = query.sort_field
+            page = select(end, matching(), key=lambda w: getattr(w, field))[query.offset:]
+        
+        plan['rows_scanned'] = scanned
+        plan['rows_returned'] = len(page)
+        return page, plan
+    
     def get_session_summary(self) -> Dict:
         """Get summary of all sessions"""
         summary = {}
@@ -0,0 +1,106 @@
+"""
+Workout queries for ACEest Fitness & Gym application
+Version: 1.4 - Combined predicates with sort, projection and limit
+"""
+from datetime import date
+from typing import List, Mapping, Optional
+
+from app.sketches import normalize_exercise
+
+
+FIELDS = ('exercise', 'duration', 'category', 'timestamp', 'session_id', 'date')
+MAX_LIMIT = 1000
+
+
+class QueryError(ValueError):
+    """Raised for an invalid query"""
+
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    if not value:
+        return None
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _int_arg(args: Mapping[str, str], name: str) -> Optional[int]:
+    value = args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f'{name} must be an integer')
+
+
+def _date_arg(args: Mapping[str, str], name: str) -> Optional[date]:
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise QueryError(f'{name} must be YYYY-MM-DD')
+
+
+class WorkoutQuery:
+    """Predicates, ordering and shape of a workout query.
+
+    Every predicate given must match. ``sort`` is a field name, prefixed
+    with ``-`` for descending order; without it rows come in the order of
+    the access path the planner picks (insertion order within each indexed
+    value, day by day for the date index).
+    """
+
+    def __init__(self, categories: Optional[List[str]] = None, exercise: Optional[str] = None,
+                 session_id: Optional[str] = None, date_from: Optional[date] = None,
+                 date_to: Optional[date] = None, min_duration: Optional[int] = None,
+                 max_duration: Optional[int] = None, sort: Optional[str] = None,
+                 fields: Optional[List[str]] = None, limit: int = 100, offset: int = 0,
+                 explain: bool = False):
+        self.categories = categories
+        self.exercise = normalize_exercise(exercise) if exercise else None
+        self.session_id = session_id
+        self.date_from = date_from
+        self.date_to = date_to
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.sort_field = sort.lstrip('-') if sort else None
+        self.descending = bool(sort) and sort.startswith('-')
+        self.fields = fields
+        self.limit = limit
+        self.offset = offset
+        self.explain = explain
+        self.validate()
+
+    def validate(self):
+        if self.sort_field is not None and self.sort_field not in FIELDS:
+            raise QueryError(f'sort must be one of {", ".join(FIELDS)} (prefix - for descending)')
+        if self.fields is not None:
+            unknown = [f for f in self.fields if f not in FIELDS]
+            if unknown or not self.fields:
+                raise QueryError(f'fields must be a subset of {", ".join(FIELDS)}')
+        if not 0 < self.limit <= MAX_LIMIT:
+            raise QueryError(f'limit must be between 1 and {MAX_LIMIT}')
+        if self.offset < 0:
+            raise QueryError('offset must be >= 0')
+        if self.date_from and self.date_to and self.date_from > self.date_to:
+            raise QueryError('from must not be after to')
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> 'WorkoutQuery':
+        """Build a query from request arguments"""
+        limit = _int_arg(args, 'limit')
+        return cls(
+            categories=_split(args.get('category')),
+            exercise=args.get('exercise') or None,
+            session_id=args.get('session_id') or None,
+            date_from=_date_arg(args, 'from'),
+            date_to=_date_arg(args, 'to'),
+            min_duration=_int_arg(args, 'min_duration'),
+            max_duration=_int_arg(args, 'max_duration'),
+            sort=args.get('sort') or None,
+            fields=_split(args.get('fields')),
+            limit=100 if limit is None else limit,
+            offset=_int_arg(args, 'offset') or 0,
+            explain=args.get('explain', '').lower() in ('1', 'true', 'yes'),
+        )
@@ -0,0 +1,222 @@
+"""
+Rate limiting and load shedding for ACEest Fitness & Gym application
+Version: 1.4 - Per-client token buckets and a concurrency limit for expensive endpoints
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from flask import current_app, jsonify, make_response, request
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets; subclass to share buckets between replicas"""
+
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Tuple[bool, float]:
+        """Try to take ``cost`` tokens from a bucket.
+
+        Returns whether the tokens were taken and how many remain.
+        """
+
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process token buckets, keeping at most ``max_keys`` clients"""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._buckets: 'OrderedDict[str, list]' = OrderedDict()  # key -> [tokens, last refill time]
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(burst), now]
+                # Forgetting the least recently seen client only hands it a full bucket
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True, bucket[0]
+            return False, bucket[0]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBackend(RateLimitBackend):
+    """Token buckets in Redis, shared by every replica (needs the ``redis`` package)"""
+
+    SCRIPT = """
+        local rate, burst, now, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+        local tokens = tonumber(bucket[1]) or burst
+        local ts = tonumber(bucket[2]) or now
+        tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+        local allowed = 0
+        if tokens >= cost then
+            tokens = tokens - cost
+            allowed = 1
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+        redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+        return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str, prefix: str = 'aceest:ratelimit:'):
+        import redis  # optional dependency, only needed for a shared backend
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int, cost: int = 1) -> Tuple[bool, float]:
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[rate, burst, time.time(), cost])
+        return bool(allowed), float(tokens)
+
+
+def create_backend(url: Optional[str]) -> RateLimitBackend:
+    """Backend for a storage URL (``memory://`` or unset, or ``redis://...``)"""
+    if not url or url.startswith('memory://'):
+        return MemoryBackend()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+    raise ValueError(f'Unsupported rate limit storage: {url}')
+
+
+class ConcurrencyLimiter:
+    """Caps the number of requests running at once, without queueing"""
+
+    def __init__(self, max_concurrent: int = 4):
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.max_concurrent:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class RateLimiter:
+    """Admission control for write and expensive endpoints.
+
+    ``limit`` applies a per-client token bucket and answers 429 when it is
+    empty; ``shed`` answers 503 when too many expensive requests are already
+    running, before they tie up the worker threads. Clients are identified by
+    their ``X-API-Key`` header when it is one of ``api_keys``, otherwise by
+    the remote address (the client's own address when ``TRUSTED_PROXY_HOPS``
+    lets ProxyFix read it from ``X-Forwarded-For``). Unknown keys are ignored,
+    so a client cannot get a fresh bucket by sending a new key.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.rate = 5.0  # tokens added per second
+        self.burst = 20  # bucket size
+        self.api_keys: FrozenSet[str] = frozenset()  # keys that get their own bucket
+        self.backend: RateLimitBackend = MemoryBackend()
+        self.concurrency = ConcurrencyLimiter()
+        self.counters: Dict[str, int] = {'allowed': 0, 'limited': 0, 'shed': 0}
+        self._counter_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the limiter from the Flask app config"""
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', self.enabled)
+        self.rate = app.config.get('RATE_LIMIT_RATE', self.rate)
+        self.burst = app.config.get('RATE_LIMIT_BURST', self.burst)
+        self.api_keys = frozenset(app.config.get('RATE_LIMIT_API_KEYS', self.api_keys))
+        self.backend = create_backend(app.config.get('RATE_LIMIT_STORAGE_URL'))
+        self.concurrency = ConcurrencyLimiter(app.config.get('MAX_CONCURRENT_EXPENSIVE',
+                                                             self.concurrency.max_concurrent))
+        app.extensions['rate_limiter'] = self
+
+    def _count(self, name: str):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def client_key(self) -> str:
+        """Bucket key of the current request: a known API key, else the client IP"""
+        api_key = request.headers.get('X-API-Key')
+        if api_key and api_key in self.api_keys:
+            return f'key:{api_key}'
+        return f'ip:{request.remote_addr}'
+
+    def limit(self, cost: int = 1):
+        """Decorator applying the per-client token bucket to a view"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    try:
+                        allowed, tokens = self.backend.take(self.client_key(), self.rate, self.burst, cost)
+                    except Exception:
+                        # A shared backend outage must not take the API down with it
+                        current_app.logger.exception('Rate limit backend failed; allowing request')
+                        allowed, tokens = True, 0
+                    if not allowed:
+                        self._count('limited')
+                        response = jsonify({'success': False, 'error': 'Too many requests'})
+                        response.headers['Retry-After'] = str(max(1, math.ceil((cost - tokens) / self.rate)))
+                        return response, 429
+                    self._count('allowed')
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def shed(self, view):
+        """Decorator rejecting a view with 503 while the concurrency limit is reached"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return view(*args, **kwargs)
+            if not self.concurrency.try_acquire():
+                self._count('shed')
+                response = jsonify({'success': False, 'error': 'Server busy, try again shortly'})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                self.concurrency.release()
+                raise
+            if response.is_streamed:
+                # Streamed bodies do their work after the view returns
+                response.call_on_close(self.concurrency.release)
+            else:
+                self.concurrency.release()
+            return response
+        return wrapper
+
+    def stats(self) -> Dict:
+        """Counters and settings for monitoring"""
+        with self._counter_lock:
+            counters = dict(self.counters)
+        return dict(counters,
+                    enabled=self.enabled,
+                    rate=self.rate,
+                    burst=self.burst,
+                    backend=type(self.backend).__name__,
+                    active_expensive=self.concurrency.active,
+                    max_concurrent_expensive=self.concurrency.max_concurrent)
+
+
+# Shared limiter used by the API routes
+limiter = RateLimiter()
@@ -0,0 +1,204 @@
+"""
+PDF workout reports for ACEest Fitness & Gym application
+Version: 1.4 - Background report generation with an on-disk cache
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional
+
+from app.jobs import Job, JobQueue
+from app.tasks import task_pool
+from app.startup import lazy_import
+
+
+CATEGORIES = ['Warm-up', 'Workout', 'Cool-down']
+
+PAGE_MARGIN = 50
+ROW_HEIGHT = 16
+TABLE_COLUMNS = [('Date', 0), ('Exercise', 80), ('Category', 260), ('Duration', 350), ('Session', 420)]
+
+
+def _summarize(workouts: Iterator) -> Dict:
+    """Aggregate totals in a single streaming pass"""
+    summary = {
+        'count': 0,
+        'duration': 0,
+        'by_category': {category: {'count': 0, 'duration': 0} for category in CATEGORIES}
+    }
+    for workout in workouts:
+        summary['count'] += 1
+        summary['duration'] += workout.duration
+        bucket = summary['by_category'].setdefault(workout.category, {'count': 0, 'duration': 0})
+        bucket['count'] += 1
+        bucket['duration'] += workout.duration
+    return summary
+
+
+def build_report(output, workouts: Callable[[], Iterator], title: str,
+                 profile: Optional[Dict] = None, date_range: str = 'All dates'):
+    """Write a PDF report, streaming workout rows page by page.
+
+    ``workouts`` is called once per pass and must return a fresh iterator,
+    so the full workout list is never materialized.
+    """
+    canvas_module = lazy_import('reportlab.pdfgen.canvas')
+    pagesizes = lazy_import('reportlab.lib.pagesizes')
+
+    width, height = pagesizes.A4
+    pdf = canvas_module.Canvas(output, pagesize=pagesizes.A4)
+    pdf.setTitle(title)
+    y = height - PAGE_MARGIN
+
+    def line(text: str, size: int = 10, bold: bool = False, gap: int = ROW_HEIGHT):
+        nonlocal y
+        pdf.setFont('Helvetica-Bold' if bold else 'Helvetica', size)
+        pdf.drawString(PAGE_MARGIN, y, text)
+        y -= gap
+
+    line(title, size=18, bold=True, gap=24)
+    line(f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}    Range: {date_range}', gap=24)
+
+    if profile is not None:
+        line('Member', size=13, bold=True, gap=18)
+        line(f'Name: {profile.get("name") or "-"}    Reg ID: {profile.get("reg_id") or "-"}')
+        line(f'Height: {profile.get("height")} cm    Weight: {profile.get("weight")} kg    '
+             f'Age: {profile.get("age")}    Gender: {profile.get("gender") or "-"}')
+        line(f'BMI: {profile.get("bmi") or "-"} ({profile.get("bmi_category")})    '
+             f'BMR: {profile.get("bmr") or "-"} kcal    Daily calories: {profile.get("daily_calories") or "-"} kcal',
+             gap=24)
+
+    summary = _summarize(workouts())
+    line('Summary', size=13, bold=True, gap=18)
+    line(f'Total exercises: {summary["count"]}    Total duration: {summary["duration"]} min')
+    for category, totals in summary['by_category'].items():
+        line(f'{category}: {totals["count"]} exercises, {totals["duration"]} min')
+    y -= 8
+
+    def table_header():
+        nonlocal y
+        pdf.setFont('Helvetica-Bold', 10)
+        for label, offset in TABLE_COLUMNS:
+            pdf.drawString(PAGE_MARGIN + offset, y, label)
+        y -= ROW_HEIGHT
+        pdf.setFont('Helvetica', 9)
+
+    line('Workouts', size=13, bold=True, gap=18)
+    table_header()
+    for workout in workouts():
+        if y < PAGE_MARGIN:
+            pdf.showPage()
+            y = height - PAGE_MARGIN
+            table_header()
+        values = [workout.date, workout.exercise[:32], workout.category,
+                  f'{workout.duration} min', workout.session_id]
+        for (_, offset), value in zip(TABLE_COLUMNS, values):
+            pdf.drawString(PAGE_MARGIN + offset, y, str(value))
+        y -= ROW_HEIGHT
+
+    pdf.showPage()
+    pdf.save()
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class ReportService:
+    """Submits report builds to the shared worker pool and caches finished PDFs on disk.
+
+    The cache keeps one PDF per (member, date range), replaced when the store
+    changes, and at most ``max_files`` PDFs overall (least recently used go).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, jobs: Optional[JobQueue] = None,
+                 max_files: int = 64):
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'aceest-reports')
+        self.jobs = jobs or JobQueue(pool=task_pool)
+        self.max_files = max_files
+        self._prune_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the service from the Flask app config"""
+        if app.config.get('REPORT_CACHE_DIR'):
+            self.cache_dir = app.config['REPORT_CACHE_DIR']
+        self.max_files = app.config.get('REPORT_CACHE_MAX_FILES', self.max_files)
+
+    @staticmethod
+    def report_key(member: Optional[Dict], date_from: Optional[str], date_to: Optional[str],
+                   cache_tag: str) -> str:
+        """Identify a report as ``<scope>-<contents>``.
+
+        The scope hashes (member, date range); the contents hash the store's
+        ``cache_tag``, which includes its instance id, since the version alone
+        restarts from 0 with each process and would match stale PDFs.
+        """
+        return f'{_digest([member, date_from, date_to])}-{_digest(cache_tag)}'
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'report-{key}.pdf')
+
+    def submit(self, session, profile=None, date_from: Optional[str] = None,
+               date_to: Optional[str] = None) -> Job:
+        """Queue a report build, reusing a cached PDF or an in-flight build"""
+        member = profile.to_dict() if profile is not None else None
+        key = self.report_key(member, date_from, date_to, session.cache_tag)
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # mark it recently used, so pruning keeps it
+        except FileNotFoundError:
+            pass
+        else:
+            return self.jobs.add_finished(path, key=key)
+
+        # Only workouts present at submission time belong to this version
+        limit = session.get_workout_count()
+        return self.jobs.submit(self._build, session, member, date_from, date_to, limit, path, key=key)
+
+    def _build(self, session, member: Optional[Dict], date_from: Optional[str],
+               date_to: Optional[str], limit: int, path: str) -> str:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        title = 'ACEest Member Workout Report' if member else 'ACEest Gym Workout Report'
+        date_range = f'{date_from or "start"} to {date_to or "today"}' if (date_from or date_to) else 'All dates'
+
+        # Write to a temporary file so readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                build_report(output, lambda: session.iter_workouts(date_from, date_to, limit=limit),
+                             title, profile=member, date_range=date_range)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._prune(path)
+        return path
+
+    def _prune(self, keep: str):
+        """Delete older PDFs of the same scope as ``keep``, then all but the newest ``max_files``"""
+        scope = os.path.basename(keep).rsplit('-', 1)[0] + '-'
+        with self._prune_lock:
+            others = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.path == keep or not (entry.name.startswith('report-') and entry.name.endswith('.pdf')):
+                    continue
+                try:
+                    if entry.name.startswith(scope):
+                        os.unlink(entry.path)
+                    else:
+                        others.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+            others.sort(reverse=True)
+            for _, path in others[max(0, self.max_files - 1):]:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+
+# Shared report service used by the report endpoints
+report_service = ReportService()
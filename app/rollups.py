@@ -0,0 +1,83 @@
+"""
+Time-bucketed workout rollups for ACEest Fitness & Gym application
+Version: 1.4 - Per-day buckets with derived weekly and monthly series
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the period a day belongs to (weeks start on Monday)"""
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    raise ValueError(f'Unknown granularity: {granularity}')
+
+
+class RollupIndex:
+    """Keeps count and duration per category for every day that has workouts"""
+
+    def __init__(self):
+        self._days: Dict[int, Dict[str, List[int]]] = {}  # day ordinal -> category -> [count, duration]
+        self._ordinals: List[int] = []  # sorted day ordinals with at least one workout
+
+    def add(self, workout):
+        """Add a workout to its day bucket"""
+        ordinal = workout.day_number
+        bucket = self._days.get(ordinal)
+        if bucket is None:
+            bucket = self._days[ordinal] = {}
+            insort(self._ordinals, ordinal)
+        totals = bucket.get(workout.category)
+        if totals is None:
+            totals = bucket[workout.category] = [0, 0]
+        totals[0] += 1
+        totals[1] += workout.duration
+
+    def clear(self):
+        """Drop all buckets"""
+        self._days = {}
+        self._ordinals = []
+
+    def bucket_count(self) -> int:
+        """Number of non-empty day buckets"""
+        return len(self._ordinals)
+
+    def days(self, date_from: Optional[date] = None, date_to: Optional[date] = None) -> List[int]:
+        """Ordinals of the non-empty days between two dates (inclusive), oldest first"""
+        ordinals = self._ordinals
+        lo = bisect_left(ordinals, date_from.toordinal()) if date_from else 0
+        hi = bisect_right(ordinals, date_to.toordinal()) if date_to else len(ordinals)
+        return ordinals[lo:hi]
+
+    def series(self, date_from: Optional[date] = None, date_to: Optional[date] = None,
+               granularity: str = 'day') -> List[Dict]:
+        """Totals per period between two dates (inclusive), oldest first.
+
+        Only periods that contain workouts are returned. Runs in time
+        proportional to the number of day buckets in the range.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f'Unknown granularity: {granularity}')
+
+        series: List[Dict] = []
+        current = None
+        for ordinal in self.days(date_from, date_to):
+            start = period_start(date.fromordinal(ordinal), granularity).isoformat()
+            if current is None or current['period'] != start:
+                current = {'period': start, 'count': 0, 'duration': 0, 'by_category': {}}
+                series.append(current)
+            for category, (count, duration) in self._days[ordinal].items():
+                current['count'] += count
+                current['duration'] += duration
+                totals = current['by_category'].setdefault(category, {'count': 0, 'duration': 0})
+                totals['count'] += count
+                totals['duration'] += duration
+        return series
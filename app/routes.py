@@ -3,12 +3,65 @@ Routes for ACEest Fitness & Gym application
 Version: 1.3 - Full features with user profiles and health calculations
 Handles both Web UI and REST API endpoints
 """
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
-from app.models import workout_session
+import os
+import tempfile
+import zlib
+from datetime import date
+from functools import wraps
+from flask import (Blueprint, render_template, request, jsonify, redirect, url_for, flash, make_response,
+                   send_file, Response, stream_with_context, current_app)
+from werkzeug.exceptions import RequestEntityTooLarge
+from app.models import MAX_DURATION, MAX_EXERCISE_LENGTH, workout_session
 from app.profile import user_profile
+from app.query import QueryError, WorkoutQuery
+from app.charts import chart_renderer, CHART_KINDS, CHART_FORMATS
+from app.experiments import experiments
+from app.idempotency import idempotency
+from app.jobs import QueueFull
+from app.json_provider import workouts_response
+from app.ratelimit import limiter
+from app.reports import report_service
+from app.rollups import GRANULARITIES
+from app.startup import is_available
+from app.transfer import EXPORTERS, IMPORTERS, FORMATS, FILE_EXTENSIONS, TransferError, stage_import
 
 main_bp = Blueprint('main', __name__)
 
+PAGE_SIZE = 50  # rows per page on the workouts page and /api/workouts/page
+MAX_PAGE_SIZE = 500
+
+
+def versioned(view):
+    """Tag a read-only API response with an ETag derived from the store version.
+    
+    The tag is read before the view runs, so a write during the view can only
+    make the tag older than the body (costing a refetch), never newer. A
+    matching ``If-None-Match`` is answered without running the view.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        query = zlib.crc32(request.full_path.encode('utf-8'))
+        etag = f'{workout_session.cache_tag}-{query:08x}'
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+            response = response.make_conditional(request)
+        return response
+    return wrapper
+
+
+def _retry_later(error: str):
+    """503 response asking the client to retry"""
+    response = jsonify({'success': False, 'error': error})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 # ==================== WEB UI ROUTES ====================
 
 @main_bp.route('/')
@@ -19,13 +72,17 @@ def index():
 
 @main_bp.route('/workouts')
 def workouts():
-    """Workout management page"""
-    all_workouts = workout_session.get_all_workouts()
+    """Workout management page (first page of rows; the rest load from /api/workouts/page)"""
     categories = ['Warm-up', 'Workout', 'Cool-down']
     
-    # Group workouts by category
+    # First page of every tab, with totals so the page knows when to stop fetching
+    first_page = workout_session.get_page(0, PAGE_SIZE)
     grouped_workouts = {
-        category: workout_session.get_workouts_by_category(category)
+        category: workout_session.get_page(0, PAGE_SIZE, category)
+        for category in categories
+    }
+    counts = {
+        category: workout_session.get_count_by_category(category)
         for category in categories
     }
     
@@ -38,8 +95,10 @@ def workouts():
     }
     
     return render_template('workouts.html', 
-                         workouts=all_workouts, 
+                         workouts=first_page, 
                          grouped_workouts=grouped_workouts,
+                         counts=counts,
+                         page_size=PAGE_SIZE,
                          stats=stats,
                          categories=categories)
 
@@ -55,14 +114,18 @@ def analytics():
         'total_sessions': len(workout_session.get_session_summary()),
         'by_category': {
             category: {
-                'count': len(workout_session.get_workouts_by_category(category)),
+                'count': workout_session.get_count_by_category(category),
                 'duration': workout_session.get_duration_by_category(category)
             }
             for category in categories
-        }
+        },
+        'approximate': workout_session.sketches.to_dict(top_n=5)
     }
     
-    return render_template('analytics.html', stats=stats)
+    # Low-end kiosk browsers can ask for server-rendered chart images
+    server_charts = request.args.get('charts') == 'server' and is_available('matplotlib')
+    
+    return render_template('analytics.html', stats=stats, server_charts=server_charts)
 
 
 @main_bp.route('/add_workout', methods=['POST'])
@@ -81,13 +144,17 @@ def add_workout_form():
         flash('⚠️ Exercise name must be at least 2 characters!', 'error')
         return redirect(url_for('main.workouts'))
     
+    if len(exercise) > MAX_EXERCISE_LENGTH:
+        flash(f'⚠️ Exercise name cannot exceed {MAX_EXERCISE_LENGTH} characters!', 'error')
+        return redirect(url_for('main.workouts'))
+    
     try:
         duration = int(duration_str)
         if duration <= 0:
             flash('⚠️ Duration must be a positive number!', 'error')
             return redirect(url_for('main.workouts'))
-        if duration > 1440:  # 24 hours
-            flash('⚠️ Duration cannot exceed 24 hours (1440 minutes)!', 'error')
+        if duration > MAX_DURATION:
+            flash(f'⚠️ Duration cannot exceed 24 hours ({MAX_DURATION} minutes)!', 'error')
             return redirect(url_for('main.workouts'))
     except ValueError:
         flash('⚠️ Duration must be a valid number!', 'error')
@@ -95,6 +162,7 @@ def add_workout_form():
     
     # Add workout
     workout = workout_session.add_workout(exercise, duration, category)
+    experiments.track('workout_created')
     flash(f'✅ Added {exercise} ({duration} min) to {category}!', 'success')
     
     return redirect(url_for('main.workouts'))
@@ -128,6 +196,7 @@ def update_profile():
 # ==================== REST API ROUTES ====================
 
 @main_bp.route('/api/workouts', methods=['GET'])
+@versioned
 def api_get_workouts():
     """Get all workouts (API)"""
     category = request.args.get('category')
@@ -137,14 +206,12 @@ def api_get_workouts():
     else:
         workouts = workout_session.get_all_workouts()
     
-    return jsonify({
-        'success': True,
-        'workouts': [w.to_dict() for w in workouts],
-        'count': len(workouts)
-    }), 200
+    return workouts_response(workouts, success=True, count=len(workouts)), 200
 
 
 @main_bp.route('/api/workouts', methods=['POST'])
+@idempotency.idempotent
+@limiter.limit()
 def api_add_workout():
     """Add a new workout (API)"""
     data = request.get_json()
@@ -160,15 +227,23 @@ def api_add_workout():
     if not exercise:
         return jsonify({'success': False, 'error': 'Exercise name is required'}), 400
     
+    if len(exercise) > MAX_EXERCISE_LENGTH:
+        return jsonify({'success': False,
+                        'error': f'Exercise name cannot exceed {MAX_EXERCISE_LENGTH} characters'}), 400
+    
     try:
         duration = int(duration)
         if duration <= 0:
             return jsonify({'success': False, 'error': 'Duration must be positive'}), 400
+        if duration > MAX_DURATION:
+            return jsonify({'success': False,
+                            'error': f'Duration cannot exceed {MAX_DURATION} minutes'}), 400
     except (ValueError, TypeError):
         return jsonify({'success': False, 'error': 'Duration must be a valid number'}), 400
     
     # Add workout
     workout = workout_session.add_workout(exercise, duration, category)
+    experiments.track('workout_created')
     
     return jsonify({
         'success': True,
@@ -177,7 +252,50 @@ def api_add_workout():
     }), 201
 
 
+@main_bp.route('/api/workouts/page', methods=['GET'])
+@versioned
+def api_get_workouts_page():
+    """Get one page of workouts, optionally from one category (API)"""
+    category = request.args.get('category') or None
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', PAGE_SIZE, type=int)
+    
+    if offset < 0 or not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({'success': False, 'error': f'Offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}'}), 400
+    
+    with workout_session.lock:
+        page = workout_session.get_page(offset, limit, category)
+        total = (workout_session.get_count_by_category(category) if category
+                 else workout_session.get_workout_count())
+    next_offset = offset + len(page) if offset + len(page) < total else None
+    
+    return workouts_response(page, success=True, count=len(page), offset=offset,
+                             total=total, next_offset=next_offset), 200
+
+
+@main_bp.route('/api/workouts/query', methods=['GET'])
+@versioned
+def api_query_workouts():
+    """Query workouts with combined filters, sort, projection and limit (API)"""
+    try:
+        query = WorkoutQuery.from_args(request.args)
+    except QueryError as exc:
+        return jsonify({'success': False, 'error': str(exc)}), 400
+    
+    workouts, plan = workout_session.query(query)
+    fields = {'success': True, 'count': len(workouts)}
+    if query.explain:
+        fields['plan'] = plan
+    
+    if query.fields is None:
+        return workouts_response(workouts, **fields), 200
+    
+    rows = [{name: getattr(w, name) for name in query.fields} for w in workouts]
+    return jsonify(dict(fields, workouts=rows)), 200
+
+
 @main_bp.route('/api/workouts/stats', methods=['GET'])
+@versioned
 def api_get_stats():
     """Get workout statistics (API)"""
     categories = ['Warm-up', 'Workout', 'Cool-down']
@@ -187,17 +305,43 @@ def api_get_stats():
         'total_duration': workout_session.get_total_duration(),
         'by_category': {
             category: {
-                'count': len(workout_session.get_workouts_by_category(category)),
+                'count': workout_session.get_count_by_category(category),
                 'duration': workout_session.get_duration_by_category(category)
             }
             for category in categories
-        }
+        },
+        'approximate': workout_session.sketches.to_dict()
     }
     
     return jsonify({'success': True, 'stats': stats}), 200
 
 
+@main_bp.route('/api/workouts/timeseries', methods=['GET'])
+@versioned
+def api_get_timeseries():
+    """Get workout totals per day, week or month (API)"""
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'success': False, 'error': f'Granularity must be one of {", ".join(GRANULARITIES)}'}), 400
+    
+    try:
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+    
+    series = workout_session.rollups.series(date_from, date_to, granularity)
+    
+    return jsonify({
+        'success': True,
+        'granularity': granularity,
+        'series': series,
+        'count': len(series)
+    }), 200
+
+
 @main_bp.route('/api/workouts/sessions', methods=['GET'])
+@versioned
 def api_get_sessions():
     """Get session summary (API)"""
     summary = workout_session.get_session_summary()
@@ -210,19 +354,177 @@ def api_get_sessions():
 
 
 @main_bp.route('/api/workouts/recent', methods=['GET'])
+@versioned
 def api_get_recent():
     """Get recent workouts (API)"""
     limit = request.args.get('limit', 10, type=int)
     recent = workout_session.get_recent_workouts(limit)
     
+    return workouts_response(recent, success=True, count=len(recent)), 200
+
+
+@main_bp.route('/api/exercises/suggest', methods=['GET'])
+@versioned
+def api_suggest_exercises():
+    """Suggest exercise names starting with a prefix, most used first (API)"""
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), workout_session.exercises.top_k)
+    suggestions = workout_session.exercises.suggest(query, limit)
+    
     return jsonify({
         'success': True,
-        'workouts': [w.to_dict() for w in recent],
-        'count': len(recent)
+        'query': query,
+        'suggestions': suggestions,
+        'count': len(suggestions)
     }), 200
 
 
+@main_bp.route('/api/workouts/export', methods=['GET'])
+@limiter.shed
+def api_export_workouts():
+    """Stream all workouts as binary, NDJSON or CSV (API)"""
+    fmt = request.args.get('format', 'binary')
+    if fmt not in EXPORTERS:
+        return jsonify({'success': False, 'error': f'Format must be one of {", ".join(EXPORTERS)}'}), 400
+    
+    # Export the workouts present now, even if the store changes while streaming;
+    # copying the list costs one pointer per workout, the encoding is streamed
+    with workout_session.lock:
+        workouts = list(workout_session.get_all_workouts())
+    response = Response(stream_with_context(EXPORTERS[fmt](workouts)), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=workouts.{FILE_EXTENSIONS[fmt]}'
+    return response
+
+
+@main_bp.route('/api/workouts/import', methods=['POST'])
+@limiter.limit(cost=10)
+@limiter.shed
+def api_import_workouts():
+    """Bulk import workouts from binary, NDJSON or CSV (API)"""
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = next((name for name, mimetype in FORMATS.items() if mimetype == request.mimetype), 'binary')
+    if fmt not in IMPORTERS:
+        return jsonify({'success': False, 'error': f'Format must be one of {", ".join(IMPORTERS)}'}), 400
+    
+    # Validate the whole upload into a temporary file so a bad upload imports nothing
+    with tempfile.TemporaryFile() as staging:
+        try:
+            workouts = stage_import(IMPORTERS[fmt](request.stream), staging)
+        except TransferError as exc:
+            return jsonify({'success': False, 'error': str(exc), 'imported': 0}), 400
+        except RequestEntityTooLarge:
+            return jsonify({'success': False, 'imported': 0,
+                            'error': f'Uploads are limited to {current_app.config["MAX_CONTENT_LENGTH"]} bytes'}), 413
+        imported = workout_session.bulk_load(workouts)
+    
+    return jsonify({
+        'success': True,
+        'message': f'Imported {imported} workouts',
+        'imported': imported
+    }), 201
+
+
+@main_bp.route('/api/charts/<kind>.<fmt>', methods=['GET'])
+@limiter.shed
+def api_get_chart(kind, fmt):
+    """Get a server-rendered chart image (API)"""
+    if kind not in CHART_KINDS or fmt not in CHART_FORMATS:
+        return jsonify({'success': False, 'error': 'Unknown chart'}), 404
+    
+    if not is_available('matplotlib'):
+        return jsonify({'success': False, 'error': 'Chart rendering is not available'}), 503
+    
+    # Read the tag before rendering, and answer revalidations without rendering at all
+    etag = f'{kind}-{fmt}-{workout_session.cache_tag}'
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
+    
+    try:
+        image = chart_renderer.get(kind, fmt, workout_session)
+    except QueueFull as exc:
+        return _retry_later(str(exc))
+    except Exception:
+        # Timed-out and failed renders are dropped from the cache, so a retry renders afresh
+        current_app.logger.exception('Rendering the %s.%s chart failed', kind, fmt)
+        return _retry_later('Chart rendering failed, try again shortly')
+    
+    response = make_response(image)
+    response.mimetype = CHART_FORMATS[fmt]
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@main_bp.route('/api/reports', methods=['POST'])
+@limiter.limit()
+def api_submit_report():
+    """Submit a PDF report job (API)"""
+    data = request.get_json(silent=True) or {}
+    member = data.get('member')
+    date_from = data.get('from')
+    date_to = data.get('to')
+    
+    for value in (date_from, date_to):
+        if value:
+            try:
+                date.fromisoformat(value)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+    
+    if member is not None and (not user_profile.reg_id or member != user_profile.reg_id):
+        return jsonify({'success': False, 'error': 'Member not found'}), 404
+    
+    if not is_available('reportlab'):
+        return jsonify({'success': False, 'error': 'Report generation is not available'}), 503
+    
+    try:
+        job = report_service.submit(workout_session, user_profile if member else None, date_from, date_to)
+    except QueueFull as exc:
+        response = jsonify({'success': False, 'error': str(exc)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict(),
+        'status_url': url_for('main.api_get_report', job_id=job.id)
+    }), 202
+
+
+@main_bp.route('/api/reports/<job_id>', methods=['GET'])
+def api_get_report(job_id):
+    """Poll a PDF report job (API)"""
+    job = report_service.jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Report job not found'}), 404
+    
+    result = {'success': True, 'job': job.to_dict()}
+    if job.status == job.DONE:
+        result['download_url'] = url_for('main.api_download_report', job_id=job.id)
+    return jsonify(result), 200
+
+
+@main_bp.route('/api/reports/<job_id>/pdf', methods=['GET'])
+def api_download_report(job_id):
+    """Download a finished PDF report (API)"""
+    job = report_service.jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Report job not found'}), 404
+    if job.status != job.DONE:
+        return jsonify({'success': False, 'error': f'Report is {job.status}'}), 409
+    if not os.path.exists(job.result):
+        # Dropped from the bounded report cache since it was built
+        return jsonify({'success': False, 'error': 'Report has expired, submit it again'}), 410
+    
+    return send_file(job.result, mimetype='application/pdf', download_name='workout-report.pdf')
+
+
 @main_bp.route('/api/workouts/clear', methods=['DELETE'])
+@limiter.limit()
 def api_clear_workouts():
     """Clear all workouts (API)"""
     count = workout_session.get_workout_count()
@@ -0,0 +1,236 @@
+"""
+Shadow traffic mirroring for ACEest Fitness & Gym application
+Version: 1.4 - Sampled request mirroring with latency and response comparison
+"""
+import http.client
+import json
+import queue
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from flask import g, request
+
+from app.sketches import TDigest
+
+
+SHADOW_HEADER = 'X-Shadow-Request'
+FORWARDED_HEADERS = ('Content-Type', 'Accept', 'X-API-Key', 'Idempotency-Key', 'User-Agent')
+DEFAULT_IGNORED_FIELDS = ('timestamp', 'date', 'session_id')
+
+
+def _strip_fields(value, ignored):
+    """Drop fields expected to differ between replicas (e.g. timestamps) from JSON"""
+    if isinstance(value, dict):
+        return {k: _strip_fields(v, ignored) for k, v in value.items() if k not in ignored}
+    if isinstance(value, list):
+        return [_strip_fields(v, ignored) for v in value]
+    return value
+
+
+def bodies_match(primary: bytes, shadow: bytes, ignored=DEFAULT_IGNORED_FIELDS) -> bool:
+    """Compare two response bodies, as JSON with ignored fields removed when possible"""
+    if primary == shadow:
+        return True
+    try:
+        return _strip_fields(json.loads(primary), ignored) == _strip_fields(json.loads(shadow), ignored)
+    except ValueError:
+        return False
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections to one host, reused across requests"""
+
+    def __init__(self, base_url: str, size: int = 4, timeout: float = 2.0):
+        parts = urlsplit(base_url)
+        self.base_url = base_url
+        self.connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                 else http.client.HTTPConnection)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle: 'queue.LifoQueue' = queue.LifoQueue(maxsize=size)
+
+    def request(self, method: str, path: str, body: Optional[bytes], headers: Dict[str, str]):
+        """Send a request and return ``(status, body)``; broken connections are discarded"""
+        try:
+            conn, reused = self._idle.get_nowait(), True
+        except queue.Empty:
+            conn, reused = self.connection_class(self.host, self.port, timeout=self.timeout), False
+        try:
+            conn.request(method, self.prefix + path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+        except Exception as exc:
+            conn.close()
+            if reused and isinstance(exc, (http.client.RemoteDisconnected, ConnectionError)):
+                # The server closed an idle keep-alive connection; try the next one
+                return self.request(method, path, body, headers)
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return response.status, data
+
+
+class RouteStats:
+    """Mirroring results for one route"""
+
+    def __init__(self):
+        self.mirrored = 0
+        self.errors = 0
+        self.status_mismatches = 0
+        self.body_mismatches = 0
+        self.primary_ms = TDigest(compression=50, buffer_size=100)
+        self.shadow_ms = TDigest(compression=50, buffer_size=100)
+
+    def to_dict(self) -> Dict:
+        def percentiles(digest):
+            return {name: round(digest.quantile(q), 2) if digest.count else None
+                    for name, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))}
+
+        return {
+            'mirrored': self.mirrored,
+            'errors': self.errors,
+            'status_mismatches': self.status_mismatches,
+            'body_mismatches': self.body_mismatches,
+            'primary_latency_ms': percentiles(self.primary_ms),
+            'shadow_latency_ms': percentiles(self.shadow_ms),
+        }
+
+
+class ShadowMirror:
+    """Copies a sample of requests to a shadow deployment and compares the results.
+
+    Sampled requests are queued after the primary response is built and sent
+    by background workers, so mirroring never delays the user. When the queue
+    is full, requests are dropped (and counted) rather than waited on. Writes
+    are only mirrored when ``SHADOW_MIRROR_WRITES`` is set, since the shadow
+    keeps its own store.
+    """
+
+    def __init__(self, app=None):
+        self.sample_rate = 0.0
+        self.mirror_writes = False
+        self.ignored_fields = DEFAULT_IGNORED_FIELDS
+        self.max_body_bytes = 256 * 1024
+        self.dropped = 0
+        self.pool: Optional[ConnectionPool] = None
+        self.routes: Dict[str, RouteStats] = {}
+        self._queue: Optional[queue.Queue] = None
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.get('SHADOW_WORKERS', 2)
+        self.sample_rate = app.config.get('SHADOW_SAMPLE_RATE', 0.1)
+        self.mirror_writes = app.config.get('SHADOW_MIRROR_WRITES', False)
+        self.pool = ConnectionPool(app.config['SHADOW_URL'], size=workers,
+                                   timeout=app.config.get('SHADOW_TIMEOUT', 2.0))
+        self._queue = queue.Queue(maxsize=app.config.get('SHADOW_QUEUE_SIZE', 1000))
+        for i in range(workers):
+            worker = threading.Thread(target=self._work, name=f'shadow-mirror-{i}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.extensions['shadow'] = self
+
+    def before_request(self):
+        g.shadow_started = time.perf_counter()
+
+    def _should_mirror(self) -> bool:
+        if request.headers.get(SHADOW_HEADER) or request.path.startswith(('/health', '/static')):
+            return False
+        if request.method not in ('GET', 'HEAD') and not self.mirror_writes:
+            return False
+        return random.random() < self.sample_rate
+
+    def after_request(self, response):
+        started = g.pop('shadow_started', None)
+        if started is None or not self._should_mirror():
+            return response
+
+        primary_ms = (time.perf_counter() - started) * 1000
+        primary_body = None
+        if not response.is_streamed and not response.direct_passthrough:
+            data = response.get_data()
+            if len(data) <= self.max_body_bytes:
+                primary_body = data
+
+        headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        headers[SHADOW_HEADER] = '1'
+        item = (
+            request.url_rule.rule if request.url_rule else 'unmatched',
+            request.method,
+            request.full_path if request.query_string else request.path,
+            request.get_data() or None,
+            headers,
+            response.status_code,
+            primary_body,
+            primary_ms,
+        )
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+        return response
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._mirror(*item)
+            finally:
+                self._queue.task_done()
+
+    def _mirror(self, route, method, path, body, headers, primary_status, primary_body, primary_ms):
+        started = time.perf_counter()
+        try:
+            status, data = self.pool.request(method, path, body, headers)
+        except Exception:
+            status = data = None
+        shadow_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = RouteStats()
+            stats.mirrored += 1
+            stats.primary_ms.add(primary_ms)
+            if status is None:
+                stats.errors += 1
+                return
+            stats.shadow_ms.add(shadow_ms)
+            if primary_status == 304:
+                return  # conditional hit on the primary; ETags differ between deployments
+            if status != primary_status:
+                stats.status_mismatches += 1
+            elif primary_body is not None and not bodies_match(primary_body, data, self.ignored_fields):
+                stats.body_mismatches += 1
+
+    def join(self):
+        """Wait until every queued request has been mirrored"""
+        self._queue.join()
+
+    def stats(self) -> Dict:
+        """Per-route mirroring counters and latency percentiles"""
+        with self._lock:
+            return {
+                'target': self.pool.base_url,
+                'sample_rate': self.sample_rate,
+                'queued': self._queue.qsize(),
+                'dropped': self.dropped,
+                'routes': {route: stats.to_dict() for route, stats in sorted(self.routes.items())},
+            }
@@ -0,0 +1,334 @@
+"""
+Streaming sketches for ACEest Fitness & Gym application
+Version: 1.4 - Fixed-memory approximate analytics for large stores
+"""
+import hashlib
+import heapq
+import math
+import threading
+from typing import Dict, List, Optional
+
+
+PERCENTILES = (50, 90, 99, 99.9)  # reported by LatencyHistogram.to_dict
+
+
+def normalize_exercise(name: str) -> str:
+    """Normalize an exercise name for counting"""
+    return ' '.join(name.split()).casefold()
+
+
+class HyperLogLog:
+    """Distinct count estimator using 2**precision one-byte registers"""
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+        self._alpha = 0.7213 / (1 + 1.079 / self.size)
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate"""
+        return 1.04 / math.sqrt(self.size)
+
+    def add(self, value: str):
+        """Add a value to the sketch"""
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """Estimated number of distinct values"""
+        estimate = self._alpha * self.size * self.size / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: 'HyperLogLog'):
+        """Add another sketch's values into this one"""
+        if other.precision != self.precision:
+            raise ValueError('Sketches must have the same precision')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def clear(self):
+        self.registers = bytearray(self.size)
+
+
+class SpaceSaving:
+    """Heavy-hitters sketch tracking at most ``capacity`` items"""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.total = 0
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.labels: Dict[str, str] = {}
+        self._heap: List = []  # one (count, key) per tracked key; counts may be stale (too low)
+
+    @property
+    def max_error(self) -> int:
+        """Upper bound on how much any reported count is overestimated"""
+        return self.total // self.capacity
+
+    def add(self, key: str, label: Optional[str] = None):
+        """Count one occurrence of a key"""
+        self.total += 1
+        if key in self.counts:
+            self.counts[key] += 1
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[key] = 1
+            self.errors[key] = 0
+            heapq.heappush(self._heap, (1, key))
+        else:
+            # Replace the least frequent item; its count becomes the new item's error
+            while True:
+                count, victim = self._heap[0]
+                if self.counts[victim] == count:
+                    break
+                heapq.heapreplace(self._heap, (self.counts[victim], victim))
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            del self.labels[victim]
+            self.counts[key] = floor + 1
+            self.errors[key] = floor
+            heapq.heapreplace(self._heap, (floor + 1, key))
+        self.labels[key] = label or key
+
+    def top(self, n: int = 10) -> List[Dict]:
+        """Most frequent items with their count and error bound"""
+        keys = sorted(self.counts, key=self.counts.__getitem__, reverse=True)[:n]
+        return [{'exercise': self.labels[k], 'count': self.counts[k], 'error': self.errors[k]} for k in keys]
+
+    def clear(self):
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self.labels = {}
+        self._heap = []
+
+
+class TDigest:
+    """Merging t-digest for quantiles, bounded by ``compression`` centroids plus a buffer.
+
+    Reads compress the buffer too, so every method takes the digest's lock.
+    """
+
+    def __init__(self, compression: int = 100, buffer_size: int = 500):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._buffer: List[float] = []
+        self._lock = threading.Lock()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def add(self, value: float):
+        """Add a value to the digest"""
+        with self._lock:
+            self._buffer.append(value)
+            self.count += 1
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+            if len(self._buffer) >= self.buffer_size:
+                self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(list(zip(self.means, self.weights)) + [(v, 1) for v in self._buffer])
+        self._buffer = []
+        total = self.count
+
+        means, weights = [], []
+        cur_mean, cur_weight = items[0]
+        weight_so_far = 0
+        q_limit = self._k_inverse(self._k(0) + 1)
+        for mean, weight in items[1:]:
+            if (weight_so_far + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                weight_so_far += cur_weight
+                q_limit = self._k_inverse(min(self._k(weight_so_far / total) + 1, self.compression / 4))
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value at quantile ``q`` (0..1)"""
+        with self._lock:
+            if self.count == 0:
+                return None
+            self._compress()
+            if len(self.means) == 1:
+                return self.means[0]
+
+            target = q * self.count
+            prev_center, prev_mean = 0.0, self.min
+            cumulative = 0.0
+            for mean, weight in zip(self.means, self.weights):
+                center = cumulative + weight / 2
+                if target < center:
+                    if weight == 1 and target >= cumulative:
+                        return mean  # single samples are exact
+                    span = center - prev_center
+                    return prev_mean + (mean - prev_mean) * ((target - prev_center) / span if span else 0)
+                cumulative += weight
+                prev_center, prev_mean = center, mean
+            span = self.count - prev_center
+            return prev_mean + (self.max - prev_mean) * ((target - prev_center) / span if span else 0)
+
+    def clear(self):
+        with self._lock:
+            self.means = []
+            self.weights = []
+            self.count = 0
+            self.min = None
+            self.max = None
+            self._buffer = []
+
+
+class LatencyHistogram:
+    """Latency histogram with bounded relative error, in the style of HdrHistogram.
+
+    Values are kept in microseconds and bucketed log-linearly: each power-of-two
+    range is split into ``2 ** (sub_bucket_bits - 1)`` equal buckets, so a
+    reported percentile is within ``2 ** (1 - sub_bucket_bits)`` of the true
+    value (under 1% by default) from microseconds to minutes, in a few KB.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._half = 1 << (sub_bucket_bits - 1)
+        self.counts: List[int] = []
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+
+    def _index(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return shift * self._half + (value >> shift)
+
+    def _highest(self, index: int) -> int:
+        """Largest value that lands in a bucket"""
+        shift = max(0, index // self._half - 1)
+        return ((index - shift * self._half + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        """Record one latency"""
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_us += value
+        if self.min_us is None or value < self.min_us:
+            self.min_us = value
+        if value > self.max_us:
+            self.max_us = value
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add another histogram's values into this one"""
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError('Histograms must have the same precision')
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total_us += other.total_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Latency in milliseconds at or below which ``percent`` of values fall"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._highest(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def to_dict(self) -> Dict:
+        summary = {'count': self.count,
+                   'min_ms': self.min_us / 1000 if self.count else None,
+                   'mean_ms': round(self.total_us / self.count / 1000, 3) if self.count else None,
+                   'max_ms': self.max_us / 1000 if self.count else None}
+        for percent in PERCENTILES:
+            summary[f'p{percent:g}_ms'] = self.percentile(percent)
+        return summary
+
+
+class WorkoutSketches:
+    """Approximate analytics updated as workouts are added.
+
+    Writers add under the store lock while readers build ``to_dict`` without
+    it, so the sketches share a lock of their own.
+    """
+
+    QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+    def __init__(self, precision: int = 12, top_capacity: int = 64, compression: int = 100):
+        self.distinct_exercises = HyperLogLog(precision)
+        self.top_exercises = SpaceSaving(top_capacity)
+        self.durations = TDigest(compression)  # per-workout durations, not session totals
+        self._lock = threading.Lock()
+
+    def add(self, workout):
+        """Update every sketch with a workout"""
+        key = normalize_exercise(workout.exercise)
+        with self._lock:
+            self.distinct_exercises.add(key)
+            self.top_exercises.add(key, workout.exercise.strip())
+            self.durations.add(workout.duration)
+
+    def clear(self):
+        with self._lock:
+            self.distinct_exercises.clear()
+            self.top_exercises.clear()
+            self.durations.clear()
+
+    def to_dict(self, top_n: int = 10) -> Dict:
+        """Convert sketch estimates and their error bounds to dictionary"""
+        with self._lock:
+            quantiles = {}
+            for name, q in self.QUANTILES.items():
+                value = self.durations.quantile(q)
+                quantiles[name] = round(value, 1) if value is not None else None
+
+            return {
+                'distinct_exercises': {
+                    'estimate': self.distinct_exercises.count(),
+                    'relative_error': round(self.distinct_exercises.relative_error, 4)
+                },
+                'top_exercises': {
+                    'items': self.top_exercises.top(top_n),
+                    'max_overcount': self.top_exercises.max_error
+                },
+                'duration_percentiles': dict(quantiles, compression=self.durations.compression)
+            }
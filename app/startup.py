@@ -0,0 +1,67 @@
+"""
+Startup helpers for ACEest Fitness & Gym application
+Version: 1.4 - Lazy optional imports and startup timing
+"""
+import importlib
+import importlib.util
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+
+_lazy_modules: Dict[str, object] = {}
+
+
+def is_available(module_name: str) -> bool:
+    """Check whether an optional dependency is installed without importing it"""
+    if module_name in _lazy_modules:
+        return True
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(module_name: str):
+    """Import an optional heavy dependency the first time a feature needs it"""
+    module = _lazy_modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+        _lazy_modules[module_name] = module
+    return module
+
+
+class StartupTimer:
+    """Records how long each phase of application startup takes"""
+
+    def __init__(self, started_at: float = None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.finished_at = None
+        self.phases: List[Tuple[str, float]] = []
+        self.recorded = 0.0  # phases that ran before the timer started
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a named startup phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def record(self, name: str, seconds: float):
+        """Record a phase that was timed elsewhere"""
+        self.phases.append((name, seconds))
+        self.recorded += seconds
+
+    def finish(self):
+        """Mark startup as complete"""
+        self.finished_at = time.perf_counter()
+
+    def to_dict(self) -> Dict:
+        """Convert timings to dictionary (milliseconds)"""
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return {
+            'total_ms': round((end - self.started_at + self.recorded) * 1000, 3),
+            'phases': {name: round(seconds * 1000, 3) for name, seconds in self.phases}
+        }
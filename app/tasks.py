@@ -0,0 +1,100 @@
+"""
+Shared worker pool for ACEest Fitness & Gym application
+Version: 1.4 - Bounded pool for CPU-heavy work, sized by MAX_WORKERS
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class QueueFull(Exception):
+    """Raised when a queue or pool cannot accept more work"""
+
+
+class TaskPool:
+    """Runs CPU-heavy work (charts, reports) off the request threads.
+
+    At most ``max_workers`` tasks run at once and at most ``max_queue`` more
+    wait for a worker. Beyond that ``submit`` raises ``QueueFull`` straight
+    away, so callers can answer 503 instead of piling up blocked request
+    threads. Threads are started on first use.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.counters: Dict[str, int] = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+        self._pending = 0  # submitted and not finished, running or not
+        self._running = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Size the pool from the Flask app config"""
+        self.configure(app.config.get('MAX_WORKERS', self.max_workers),
+                       app.config.get('TASK_QUEUE_SIZE', self.max_queue))
+        app.extensions['task_pool'] = self
+
+    def configure(self, max_workers: int, max_queue: int):
+        """Resize the pool; tasks already submitted finish on the old threads"""
+        if max_workers < 1 or max_queue < 0:
+            raise ValueError('max_workers must be >= 1 and max_queue >= 0')
+        with self._lock:
+            old = None
+            if max_workers != self.max_workers:
+                old, self._executor = self._executor, None
+            self.max_workers = max_workers
+            self.max_queue = max_queue
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def _call(self, func: Callable, args: tuple, kwargs: Dict):
+        with self._lock:
+            self._running += 1
+        outcome = 'failed'
+        try:
+            result = func(*args, **kwargs)
+            outcome = 'completed'
+            return result
+        finally:
+            # Counted before the future resolves, so waiters see up-to-date stats
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self.counters[outcome] += 1
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Schedule ``func(*args, **kwargs)``, raising ``QueueFull`` when the pool is saturated"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.counters['rejected'] += 1
+                raise QueueFull('Server is busy, try again later')
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='task-worker')
+            executor = self._executor
+            self._pending += 1
+            self.counters['submitted'] += 1
+        try:
+            return executor.submit(self._call, func, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Run ``func`` in the pool and wait for its result"""
+        return self.submit(func, *args, **kwargs).result(timeout=timeout)
+
+    def stats(self) -> Dict:
+        """Pool size, occupancy and counters for monitoring"""
+        with self._lock:
+            return dict(self.counters,
+                        max_workers=self.max_workers,
+                        max_queue=self.max_queue,
+                        running=self._running,
+                        queued=self._pending - self._running)
+
+
+# Shared pool sized by MAX_WORKERS in create_app
+task_pool = TaskPool()
@@ -0,0 +1,278 @@
+"""
+Bulk import/export of the workout store
+Version: 1.4 - Streaming columnar binary format with NDJSON and CSV fallbacks
+
+The binary format is a header followed by independently compressed chunks,
+so both directions work in memory bounded by the chunk size (imports of
+any format are staged through it, see ``stage_import``):
+
+    header:  b'ACEWCOL1'
+    chunk:   <rows:u32><compressed_length:u32><zlib(body)>
+    end:     <0:u32>
+
+A chunk body stores each field as a column: ``duration`` as int64 values,
+``exercise`` and ``category`` dictionary-encoded (distinct values plus
+uint32 codes), and ``timestamp`` and ``session_id`` as uint32 lengths
+followed by the UTF-8 bytes.
+"""
+import csv
+import io
+import json
+import struct
+import sys
+import zlib
+from array import array
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List
+
+from app.models import CATEGORIES, MAX_DURATION, MAX_EXERCISE_LENGTH, Workout
+
+
+FORMATS = {
+    'binary': 'application/vnd.aceest.workouts',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+FILE_EXTENSIONS = {'binary': 'acew', 'ndjson': 'ndjson', 'csv': 'csv'}
+
+MAGIC = b'ACEWCOL1'
+CHUNK_ROWS = 8192
+CSV_FIELDS = ['exercise', 'duration', 'category', 'timestamp', 'session_id']
+
+_CHUNK_HEADER = struct.Struct('<II')
+_U32 = struct.Struct('<I')
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+class TransferError(ValueError):
+    """Raised when imported data is malformed"""
+
+
+# ---------- column helpers ----------
+
+def _pack_array(values: array) -> bytes:
+    if _BIG_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _pack_strings(values: List[str]) -> bytes:
+    encoded = [v.encode('utf-8') for v in values]
+    lengths = array('I', [len(e) for e in encoded])
+    blob = b''.join(encoded)
+    return _U32.pack(len(values)) + _pack_array(lengths) + _U32.pack(len(blob)) + blob
+
+
+def _unpack_strings(body: memoryview, offset: int):
+    (count,) = _U32.unpack_from(body, offset)
+    offset += _U32.size
+    lengths = _unpack_array('I', body[offset:offset + 4 * count])
+    offset += 4 * count
+    (blob_length,) = _U32.unpack_from(body, offset)
+    offset += _U32.size
+    blob = body[offset:offset + blob_length]
+    offset += blob_length
+
+    values = []
+    position = 0
+    for length in lengths:
+        values.append(str(blob[position:position + length], 'utf-8'))
+        position += length
+    return values, offset
+
+
+def _pack_dictionary(values: List[str]) -> bytes:
+    codes: Dict[str, int] = {}
+    column = array('I', [codes.setdefault(v, len(codes)) for v in values])
+    return _pack_strings(list(codes)) + _pack_array(column)
+
+
+def _unpack_dictionary(body: memoryview, offset: int, rows: int):
+    distinct, offset = _unpack_strings(body, offset)
+    codes = _unpack_array('I', body[offset:offset + 4 * rows])
+    return [distinct[c] for c in codes], offset + 4 * rows
+
+
+# ---------- binary ----------
+
+def _encode_chunk(workouts: List[Workout]) -> bytes:
+    body = b''.join((
+        _pack_array(array('q', [w.duration for w in workouts])),
+        _pack_dictionary([w.exercise for w in workouts]),
+        _pack_dictionary([w.category for w in workouts]),
+        _pack_strings([w.timestamp for w in workouts]),
+        _pack_strings([w.session_id for w in workouts]),
+    ))
+    compressed = zlib.compress(body, 1)
+    return _CHUNK_HEADER.pack(len(workouts), len(compressed)) + compressed
+
+
+def _decode_chunk(rows: int, compressed: bytes, first_row: int = 1) -> Iterator[Workout]:
+    body = memoryview(zlib.decompress(compressed))
+    durations = _unpack_array('q', body[:8 * rows])
+    offset = 8 * rows
+    exercises, offset = _unpack_dictionary(body, offset, rows)
+    categories, offset = _unpack_dictionary(body, offset, rows)
+    timestamps, offset = _unpack_strings(body, offset)
+    session_ids, offset = _unpack_strings(body, offset)
+
+    for row, fields in enumerate(zip(exercises, durations, categories, timestamps, session_ids), start=first_row):
+        yield _validated_workout(*fields, row)
+
+
+def export_binary(workouts: Iterable[Workout], chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Stream workouts in the columnar binary format"""
+    yield MAGIC
+    iterator = iter(workouts)
+    while True:
+        chunk = list(islice(iterator, chunk_rows))
+        if not chunk:
+            break
+        yield _encode_chunk(chunk)
+    yield _U32.pack(0)
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        part = stream.read(size - len(data))
+        if not part:
+            raise TransferError('Unexpected end of binary workout data')
+        data += part
+    return bytes(data)
+
+
+def import_binary(stream: BinaryIO) -> Iterator[Workout]:
+    """Read workouts from the columnar binary format, one chunk at a time"""
+    if _read_exact(stream, len(MAGIC)) != MAGIC:
+        raise TransferError('Not a binary workout export')
+    first_row = 1
+    while True:
+        (rows,) = _U32.unpack(_read_exact(stream, _U32.size))
+        if rows == 0:
+            return
+        (length,) = _U32.unpack(_read_exact(stream, _U32.size))
+        try:
+            yield from _decode_chunk(rows, _read_exact(stream, length), first_row)
+        except TransferError:
+            raise
+        except (zlib.error, struct.error, ValueError, IndexError) as exc:
+            raise TransferError(f'Corrupt binary workout chunk: {exc}')
+        first_row += rows
+
+
+def stage_import(workouts: Iterable[Workout], staging: BinaryIO) -> Iterator[Workout]:
+    """Validate a whole import into ``staging`` first, then stream it back.
+
+    Every record is checked and written to ``staging`` (a temporary file) in
+    the binary format before anything is returned, so a bad record raises
+    ``TransferError`` before the first workout is stored, and memory stays
+    bounded by one chunk however large the upload is.
+    """
+    for chunk in export_binary(workouts):
+        staging.write(chunk)
+    staging.seek(0)
+    return import_binary(staging)
+
+
+# ---------- NDJSON / CSV fallbacks ----------
+
+def export_ndjson(workouts: Iterable[Workout], chunk_rows: int = 1000) -> Iterator[bytes]:
+    """Stream workouts as newline-delimited JSON"""
+    iterator = iter(workouts)
+    while True:
+        chunk = list(islice(iterator, chunk_rows))
+        if not chunk:
+            break
+        yield ''.join(json.dumps(w.to_dict()) + '\n' for w in chunk).encode('utf-8')
+
+
+def export_csv(workouts: Iterable[Workout], chunk_rows: int = 1000) -> Iterator[bytes]:
+    """Stream workouts as CSV with a header row"""
+    iterator = iter(workouts)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    while True:
+        chunk = list(islice(iterator, chunk_rows))
+        if not chunk:
+            break
+        writer.writerows([w.exercise, w.duration, w.category, w.timestamp, w.session_id] for w in chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _validated_workout(exercise, duration, category, timestamp, session_id, line: int) -> Workout:
+    """Build a workout from imported fields, applying the API's checks to every format"""
+    exercise = str(exercise or '').strip()
+    if not exercise:
+        raise TransferError(f'Record {line}: exercise is required')
+    if len(exercise) > MAX_EXERCISE_LENGTH:
+        raise TransferError(f'Record {line}: exercise cannot exceed {MAX_EXERCISE_LENGTH} characters')
+    try:
+        duration = int(duration)
+    except (TypeError, ValueError):
+        raise TransferError(f'Record {line}: duration must be a number')
+    if duration <= 0:
+        raise TransferError(f'Record {line}: duration must be positive')
+    if duration > MAX_DURATION:
+        raise TransferError(f'Record {line}: duration cannot exceed {MAX_DURATION} minutes')
+    category = category or 'Workout'
+    if category not in CATEGORIES:
+        raise TransferError(f'Record {line}: category must be one of {", ".join(CATEGORIES)}')
+
+    timestamp = timestamp or None
+    session_id = session_id or None
+    try:
+        if timestamp and session_id:
+            # Fields are already supplied, so skip session ID generation
+            return Workout.from_fields(exercise, duration, category, timestamp, session_id)
+        return Workout(exercise, duration, category, timestamp=timestamp, session_id=session_id)
+    except (TypeError, ValueError):
+        raise TransferError(f'Record {line}: invalid timestamp')
+
+
+def _workout_from_record(record: Dict, line: int) -> Workout:
+    return _validated_workout(record.get('exercise'), record.get('duration'), record.get('category'),
+                              record.get('timestamp'), record.get('session_id'), line)
+
+
+def import_ndjson(stream: BinaryIO) -> Iterator[Workout]:
+    """Read workouts from newline-delimited JSON"""
+    for line, raw in enumerate(stream, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            raise TransferError(f'Record {line}: invalid JSON')
+        if not isinstance(record, dict):
+            raise TransferError(f'Record {line}: expected an object')
+        yield _workout_from_record(record, line)
+
+
+def import_csv(stream: BinaryIO) -> Iterator[Workout]:
+    """Read workouts from CSV with a header row"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+    try:
+        for line, record in enumerate(reader, start=2):
+            yield _workout_from_record(record, line)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # Decoding runs ahead of the reader in blocks, so there is no reliable line number
+        raise TransferError(f'Invalid CSV: {exc}')
+
+
+EXPORTERS = {'binary': export_binary, 'ndjson': export_ndjson, 'csv': export_csv}
+IMPORTERS = {'binary': import_binary, 'ndjson': import_ndjson, 'csv': import_csv}
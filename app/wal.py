@@ -0,0 +1,341 @@
+"""
+Write-ahead log for the in-memory workout store
+Version: 1.4 - Crash-safe persistence with group commit and snapshots
+
+Every change to a WorkoutSession is appended to a length-prefixed binary
+log before the write returns. Snapshots periodically capture the whole
+store so recovery only has to replay the log written since.
+
+On disk, ``directory`` contains:
+
+- ``wal-<generation>.log``: frames of ``<length:u32><crc32:u32><payload>``
+- ``snapshot.bin``: ``<magic><generation:u64><count:u64>`` followed by one
+  frame per workout; recovery replays ``wal-<generation>.log`` onwards
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+
+FSYNC_POLICIES = ('always', 'batch', 'never')
+
+OP_ADD = 1
+OP_CLEAR = 2
+
+SNAPSHOT_MAGIC = b'ACEWSNP1'
+SNAPSHOT_NAME = 'snapshot.bin'
+
+_FRAME_HEADER = struct.Struct('<II')
+_SNAPSHOT_HEADER = struct.Struct('<8sQQ')
+_ADD_FIXED = struct.Struct('<Bq')
+_STR_LEN = struct.Struct('<I')
+_LOG_NAME = re.compile(r'^wal-(\d+)\.log$')
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode('utf-8')
+    return _STR_LEN.pack(len(data)) + data
+
+
+def encode_add(workout) -> bytes:
+    """Encode an add operation payload"""
+    return b''.join((
+        _ADD_FIXED.pack(OP_ADD, workout.duration),
+        _pack_str(workout.exercise),
+        _pack_str(workout.category),
+        _pack_str(workout.timestamp),
+        _pack_str(workout.session_id),
+    ))
+
+
+def decode_add(payload, offset: int = 0) -> Tuple[str, int, str, str, str]:
+    """Decode an add payload into (exercise, duration, category, timestamp, session_id)"""
+    _, duration = _ADD_FIXED.unpack_from(payload, offset)
+    offset += _ADD_FIXED.size
+    fields = []
+    for _ in range(4):
+        (length,) = _STR_LEN.unpack_from(payload, offset)
+        offset += _STR_LEN.size
+        fields.append(bytes(payload[offset:offset + length]).decode('utf-8'))
+        offset += length
+    exercise, category, timestamp, session_id = fields
+    return exercise, duration, category, timestamp, session_id
+
+
+def frame(payload: bytes) -> bytes:
+    """Wrap a payload with its length and checksum"""
+    return _FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def iter_frames(buffer, offset: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, int]]:
+    """Yield (payload_start, payload_end, next_offset) for every intact frame.
+
+    Stops at the first truncated or corrupt frame, which is where a crash
+    interrupted the last write.
+    """
+    end = len(buffer) if end is None else end
+    while offset + _FRAME_HEADER.size <= end:
+        length, checksum = _FRAME_HEADER.unpack_from(buffer, offset)
+        start = offset + _FRAME_HEADER.size
+        stop = start + length
+        if stop > end or zlib.crc32(buffer[start:stop]) != checksum:
+            return
+        yield start, stop, stop
+        offset = stop
+
+
+class WriteAheadLog:
+    """Append-only log with group commit and periodic snapshots.
+
+    ``fsync`` controls durability:
+
+    - ``always``: a write returns once it is fsynced; concurrent writers
+      share one fsync (group commit)
+    - ``batch``: a background thread fsyncs every ``fsync_interval`` seconds
+      or ``batch_size`` records, whichever comes first
+    - ``never``: records are written in batches of ``batch_size`` and left to
+      the OS; they are fsynced only on snapshot or close
+    """
+
+    def __init__(self, directory: str, fsync: str = 'batch', fsync_interval: float = 0.05,
+                 batch_size: int = 256, snapshot_every: int = 100000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'fsync must be one of {", ".join(FSYNC_POLICIES)}')
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.batch_size = batch_size
+        self.snapshot_every = snapshot_every
+
+        self.generation = 0
+        self.records_since_snapshot = 0
+        self._file = None
+        self._buffer: List[bytes] = []
+        self._appended = 0  # sequence number of the last buffered record
+        self._durable = 0  # sequence number of the last record on disk
+        self._flushing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._flusher: Optional[threading.Thread] = None
+        self._snapshotting = False
+        self._session = None
+
+    # ---------- paths ----------
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f'wal-{generation}.log')
+
+    def _generations(self) -> List[int]:
+        found = []
+        for name in os.listdir(self.directory):
+            match = _LOG_NAME.match(name)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    # ---------- recovery ----------
+
+    def recover(self, session) -> int:
+        """Load the snapshot and replay the log tail into ``session``.
+
+        Returns the number of log records replayed. Must be called before
+        the log is attached to the session.
+        """
+        from app.models import Workout
+
+        os.makedirs(self.directory, exist_ok=True)
+        session.clear_workouts()
+        self.generation = self._load_snapshot(session)
+
+        replayed = 0
+        for generation in self._generations():
+            if generation < self.generation:
+                continue
+            path = self._log_path(generation)
+            with open(path, 'rb') as log_file:
+                data = log_file.read()
+            valid_end = 0
+            for start, stop, valid_end in iter_frames(data):
+                if data[start] == OP_CLEAR:
+                    session.clear_workouts()
+                else:
+                    session.restore_workout(Workout.from_fields(*decode_add(data, start)))
+                replayed += 1
+            if valid_end < len(data):
+                # Drop a torn final write so new records follow intact ones
+                with open(path, 'r+b') as log_file:
+                    log_file.truncate(valid_end)
+            self.generation = generation
+
+        self.records_since_snapshot = replayed
+        self._open_log()
+        return replayed
+
+    def _load_snapshot(self, session) -> int:
+        from app.models import Workout
+
+        path = os.path.join(self.directory, SNAPSHOT_NAME)
+        if not os.path.exists(path) or os.path.getsize(path) < _SNAPSHOT_HEADER.size:
+            return 0
+
+        with open(path, 'rb') as snapshot_file:
+            with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, generation, count = _SNAPSHOT_HEADER.unpack_from(data, 0)
+                if magic != SNAPSHOT_MAGIC:
+                    raise ValueError(f'{path} is not a workout snapshot')
+                loaded = 0
+                for start, _, _ in iter_frames(data, _SNAPSHOT_HEADER.size):
+                    session.restore_workout(Workout.from_fields(*decode_add(data, start)))
+                    loaded += 1
+                if loaded != count:
+                    raise ValueError(f'{path} is incomplete: expected {count} workouts, found {loaded}')
+        return generation
+
+    # ---------- writing ----------
+
+    def _open_log(self):
+        self._file = open(self._log_path(self.generation), 'ab')
+        if self.fsync == 'batch' and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_periodically, name='wal-flusher', daemon=True)
+            self._flusher.start()
+
+    def attach(self, session):
+        """Remember the session so snapshots can be taken automatically"""
+        self._session = session
+
+    def append_add(self, workout) -> int:
+        """Buffer an add record, returning its sequence number"""
+        return self._append(frame(encode_add(workout)))
+
+    def append_clear(self) -> int:
+        """Buffer a clear record, returning its sequence number"""
+        return self._append(frame(bytes((OP_CLEAR,))))
+
+    def _append(self, record: bytes) -> int:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Write-ahead log is closed')
+            self._buffer.append(record)
+            self._appended += 1
+            self.records_since_snapshot += 1
+            if len(self._buffer) >= self.batch_size:
+                if self.fsync == 'batch':
+                    self._cond.notify_all()
+                elif self.fsync == 'never' and not self._flushing:
+                    self._write_buffer_locked(sync=False)
+            return self._appended
+
+    def commit(self, sequence: int):
+        """Wait until ``sequence`` is as durable as the fsync policy promises"""
+        if self.fsync == 'always':
+            self.flush(sequence)
+        if self.snapshot_every and self.records_since_snapshot >= self.snapshot_every:
+            self._maybe_snapshot_async()
+
+    def flush(self, sequence: Optional[int] = None, sync: bool = True):
+        """Write and fsync buffered records up to ``sequence`` (default: all).
+
+        One caller becomes the leader and writes everything buffered so far;
+        concurrent callers wait for it instead of issuing their own fsync.
+        """
+        with self._cond:
+            target = self._appended if sequence is None else sequence
+            while self._durable < target:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._write_buffer_locked(sync=sync)
+
+    def _write_buffer_locked(self, sync: bool):
+        records, self._buffer = self._buffer, []
+        upto = self._appended
+        self._flushing = True
+        self._cond.release()
+        try:
+            if records:
+                self._file.write(b''.join(records))
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+        finally:
+            self._cond.acquire()
+            self._flushing = False
+            self._durable = max(self._durable, upto)
+            self._cond.notify_all()
+
+    def _flush_periodically(self):
+        with self._cond:
+            while not self._closed:
+                self._cond.wait(self.fsync_interval)
+                if self._closed:
+                    break
+                if self._buffer and not self._flushing:
+                    self._write_buffer_locked(sync=True)
+
+    # ---------- snapshots ----------
+
+    def _maybe_snapshot_async(self):
+        with self._cond:
+            if self._snapshotting or self._session is None:
+                return
+            self._snapshotting = True
+        threading.Thread(target=self.snapshot, args=(self._session,), name='wal-snapshot', daemon=True).start()
+
+    def snapshot(self, session):
+        """Write a compact snapshot of ``session`` and discard the log it covers"""
+        try:
+            with session.lock:
+                workouts = list(session.workouts)
+                with self._cond:
+                    self._snapshotting = True
+                    # Everything up to now belongs to the old generation
+                    while self._flushing:
+                        self._cond.wait()
+                    self._write_buffer_locked(sync=True)
+                    self._file.close()
+                    self.generation += 1
+                    self.records_since_snapshot = 0
+                    self._file = open(self._log_path(self.generation), 'ab')
+                    generation = self.generation
+
+            tmp_path = os.path.join(self.directory, SNAPSHOT_NAME + '.tmp')
+            with open(tmp_path, 'wb') as snapshot_file:
+                snapshot_file.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, generation, len(workouts)))
+                chunk = []
+                for workout in workouts:
+                    chunk.append(frame(encode_add(workout)))
+                    if len(chunk) >= 4096:
+                        snapshot_file.write(b''.join(chunk))
+                        chunk = []
+                snapshot_file.write(b''.join(chunk))
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(tmp_path, os.path.join(self.directory, SNAPSHOT_NAME))
+
+            for old in self._generations():
+                if old < generation:
+                    os.remove(self._log_path(old))
+        finally:
+            with self._cond:
+                self._snapshotting = False
+                self._cond.notify_all()
+
+    def close(self):
+        """Flush everything and stop background work"""
+        if self._file is None:
+            return
+        with self._cond:
+            while self._snapshotting:
+                self._cond.wait()
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            self._file.close()
+        if self._flusher is not None:
+            self._flusher.join(timeout=1)
+
@@ -0,0 +1,75 @@
+"""
+Benchmark for GET /api/workouts serialization
+Compares the previous path (a dict per workout, Flask's default provider,
+pretty-printed) with the current one (orjson when installed, compact,
+cached per-workout fragments).
+
+Usage:
+    python benchmarks/bench_json.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app import json_provider  # noqa: E402
+from app.models import workout_session  # noqa: E402
+
+CATEGORIES = ['Warm-up', 'Workout', 'Cool-down']
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='workouts in the store')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    workout_session.clear_workouts()
+    for i in range(args.rows):
+        workout_session.add_workout(f'Exercise {i % 300}', 5 + i % 60, CATEGORIES[i % 3])
+    client = app.test_client()
+
+    def legacy():
+        with app.test_request_context():
+            workouts = workout_session.get_all_workouts()
+            response = jsonify({'success': True, 'workouts': [w.to_dict() for w in workouts],
+                                'count': len(workouts)})
+            return len(response.get_data())
+
+    def current():
+        return len(client.get('/api/workouts').get_data())
+
+    print(f'GET /api/workouts with {args.rows} workouts (best of {args.repeat})')
+    app.json = DefaultJSONProvider(app)
+    app.json.compact = False
+    seconds, size = best_of(legacy, args.repeat)
+    print(f'  previous (default provider, pretty):  {seconds * 1000:8.1f} ms  {size / 1e6:6.1f} MB')
+
+    app.json = json_provider.FastJSONProvider(app)
+    app.json.compact = True
+    app.json.sort_keys = False
+    current()  # first call fills the per-workout fragment cache
+    seconds, size = best_of(current, args.repeat)
+    encoder = 'orjson' if json_provider.orjson is not None else 'stdlib json'
+    print(f'  current ({encoder}, compact, cached): {seconds * 1000:8.1f} ms  {size / 1e6:6.1f} MB')
+    workout_session.clear_workouts()
+
+
+if __name__ == '__main__':
+    main()
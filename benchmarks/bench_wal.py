@@ -0,0 +1,86 @@
+"""
+Benchmark for the write-ahead log
+Measures ingest throughput for each fsync policy and recovery time for a
+large store (snapshot plus log tail).
+
+Usage:
+    python benchmarks/bench_wal.py [--ingest 20000] [--recover 1000000] [--tail 10000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import WorkoutSession  # noqa: E402
+from app.wal import FSYNC_POLICIES, WriteAheadLog  # noqa: E402
+
+CATEGORIES = ['Warm-up', 'Workout', 'Cool-down']
+
+
+def open_store(directory, fsync='batch', snapshot_every=0):
+    session = WorkoutSession()
+    log = WriteAheadLog(directory, fsync=fsync, snapshot_every=snapshot_every)
+    replayed = log.recover(session)
+    session.attach_log(log)
+    return session, log, replayed
+
+
+def bench_ingest(count):
+    print(f'Ingest throughput ({count} workouts per policy)')
+    for policy in FSYNC_POLICIES:
+        # fsync per write is orders of magnitude slower; keep its run short
+        n = max(count // 20, 1) if policy == 'always' else count
+        directory = tempfile.mkdtemp(prefix='wal-bench-')
+        try:
+            session, log, _ = open_store(directory, fsync=policy)
+            start = time.perf_counter()
+            for i in range(n):
+                session.add_workout(f'Exercise {i % 500}', 10 + i % 50, CATEGORIES[i % 3])
+            log.close()
+            elapsed = time.perf_counter() - start
+            print(f'  {policy:>6}: {n / elapsed:>10,.0f} workouts/s  ({n} in {elapsed:.2f}s)')
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def bench_recovery(count, tail):
+    print(f'Recovery time ({count} workouts in snapshot + {tail} in log tail)')
+    directory = tempfile.mkdtemp(prefix='wal-bench-')
+    try:
+        session, log, _ = open_store(directory, fsync='never')
+        for i in range(count):
+            session.add_workout(f'Exercise {i % 500}', 10 + i % 50, CATEGORIES[i % 3])
+        log.snapshot(session)
+        for i in range(tail):
+            session.add_workout(f'Tail {i % 50}', 15, 'Workout')
+        log.close()
+        snapshot_mb = os.path.getsize(os.path.join(directory, 'snapshot.bin')) / 1e6
+        del session
+
+        start = time.perf_counter()
+        recovered, log, replayed = open_store(directory)
+        elapsed = time.perf_counter() - start
+        log.close()
+        print(f'  recovered {recovered.get_workout_count()} workouts '
+              f'({replayed} replayed from log, snapshot {snapshot_mb:.1f} MB) in {elapsed:.2f}s')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ingest', type=int, default=20000, help='workouts per fsync policy')
+    parser.add_argument('--recover', type=int, default=1000000, help='workouts in the snapshot')
+    parser.add_argument('--tail', type=int, default=10000, help='workouts in the log tail')
+    args = parser.parse_args()
+
+    bench_ingest(args.ingest)
+    bench_recovery(args.recover, args.tail)
+
+
+if __name__ == '__main__':
+    main()
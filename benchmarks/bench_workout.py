@@ -0,0 +1,58 @@
+"""
+Micro-benchmark for Workout construction on the ingest hot path
+Compares the original construction (isoformat, fromisoformat and uuid4 per
+workout) with the current one, and measures WorkoutSession.add_workout.
+
+Usage:
+    python benchmarks/bench_workout.py [--count 200000]
+"""
+import argparse
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import Workout, WorkoutSession  # noqa: E402
+
+
+class LegacyWorkout:
+    """Workout construction as it was before timestamps were stored natively"""
+
+    def __init__(self, exercise, duration, category='Workout', timestamp=None, session_id=None):
+        self.exercise = exercise
+        self.duration = duration
+        self.category = category
+        self.timestamp = timestamp or datetime.now().isoformat()
+        self.session_id = session_id or str(uuid.uuid4())[:8]
+        self.date = datetime.fromisoformat(self.timestamp).date().isoformat()
+
+
+def per_call(stmt, count):
+    seconds = min(timeit.repeat(stmt, number=count, repeat=3))
+    return seconds / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=200000, help='constructions per measurement')
+    args = parser.parse_args()
+
+    print(f'Per-insert cost ({args.count} iterations, best of 3)')
+    legacy = per_call(lambda: LegacyWorkout('Push-ups', 30, 'Workout'), args.count)
+    current = per_call(lambda: Workout('Push-ups', 30, 'Workout'), args.count)
+    print(f'  legacy Workout():        {legacy:8.0f} ns')
+    print(f'  Workout():               {current:8.0f} ns  ({legacy / current:.1f}x faster)')
+
+    serialized = per_call(lambda: Workout('Push-ups', 30, 'Workout').to_dict(), args.count)
+    print(f'  Workout().to_dict():     {serialized:8.0f} ns')
+
+    session = WorkoutSession()
+    insert = per_call(lambda: session.add_workout('Push-ups', 30, 'Workout'), args.count)
+    print(f'  session.add_workout():   {insert:8.0f} ns')
+
+
+if __name__ == '__main__':
+    main()
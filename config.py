@@ -17,6 +17,59 @@ class Config:
     # Flask settings
     JSON_SORT_KEYS = False
     JSONIFY_PRETTYPRINT_REGULAR = True
+    
+    # Runtime settings (set through k8s/configmap.yaml in the cluster)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    MAX_WORKERS = int(os.environ.get('MAX_WORKERS', min(4, os.cpu_count() or 1)))
+    TASK_QUEUE_SIZE = int(os.environ.get('TASK_QUEUE_SIZE', 16))
+    
+    # Largest request body accepted (bulk imports are the big ones)
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 256 * 1024 * 1024))
+    
+    # Settings below are read when the app is created rather than on import,
+    # so each create_app() sees the environment as it is at that point
+    def __init__(self):
+        if not self.TESTING and 'FLASK_DEBUG' in os.environ:
+            self.DEBUG = os.environ['FLASK_DEBUG'] == 'True'
+        
+        # Response output and caches
+        self.TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+        self.COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+        self.REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR')
+        self.REPORT_CACHE_MAX_FILES = int(os.environ.get('REPORT_CACHE_MAX_FILES', 64))
+        
+        # Write-ahead log for the workout store (disabled without WAL_DIR)
+        self.WAL_DIR = os.environ.get('WAL_DIR')
+        self.WAL_FSYNC = os.environ.get('WAL_FSYNC', 'batch')
+        self.WAL_FSYNC_INTERVAL_MS = int(os.environ.get('WAL_FSYNC_INTERVAL_MS', 50))
+        self.WAL_SNAPSHOT_EVERY = int(os.environ.get('WAL_SNAPSHOT_EVERY', 100000))
+        
+        # Rate limiting and load shedding (never on under test)
+        self.RATE_LIMIT_ENABLED = not self.TESTING and os.environ.get('RATE_LIMIT_ENABLED', 'True') == 'True'
+        self.RATE_LIMIT_RATE = float(os.environ.get('RATE_LIMIT_RATE', 5))
+        self.RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST', 20))
+        self.RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL')
+        self.RATE_LIMIT_API_KEYS = [key.strip() for key in os.environ.get('RATE_LIMIT_API_KEYS', '').split(',')
+                                    if key.strip()]
+        self.TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+        self.MAX_CONCURRENT_EXPENSIVE = int(os.environ.get('MAX_CONCURRENT_EXPENSIVE', 4))
+        self.IDEMPOTENCY_TTL = float(os.environ.get('IDEMPOTENCY_TTL', 24 * 3600))
+        self.IDEMPOTENCY_MAX_KEYS = int(os.environ.get('IDEMPOTENCY_MAX_KEYS', 10000))
+        
+        # Shadow traffic and recording
+        self.SHADOW_URL = os.environ.get('SHADOW_URL')
+        self.SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', 0.1))
+        self.SHADOW_MIRROR_WRITES = os.environ.get('SHADOW_MIRROR_WRITES', 'False') == 'True'
+        self.SHADOW_TIMEOUT = float(os.environ.get('SHADOW_TIMEOUT', 2.0))
+        self.TRAFFIC_LOG = os.environ.get('TRAFFIC_LOG')
+        
+        # Version experiments
+        self.EXPERIMENTS_ENABLED = os.environ.get('EXPERIMENTS_ENABLED', 'True') == 'True'
+        self.EXPERIMENT_VARIANT = os.environ.get('EXPERIMENT_VARIANT', 'default')
+        self.EXPERIMENT_HEADER = os.environ.get('EXPERIMENT_HEADER', 'X-Version')
+        self.EXPERIMENT_COOKIE = os.environ.get('EXPERIMENT_COOKIE', 'version')
+        self.EXPERIMENT_VISITOR_COOKIE = os.environ.get('EXPERIMENT_VISITOR_COOKIE', 'visitor')
+        self.EXPERIMENT_FLUSH_INTERVAL = float(os.environ.get('EXPERIMENT_FLUSH_INTERVAL', 5))
 
 
 class DevelopmentConfig(Config):
@@ -25,25 +78,34 @@ class DevelopmentConfig(Config):
     ENV = 'development'
 
 
+# Example and default keys that must never sign production sessions
+PLACEHOLDER_SECRET_KEYS = {'change-me', 'changeme', 'secret', 'dev-secret-key-change-in-production'}
+
+
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     ENV = 'production'
+    JSONIFY_PRETTYPRINT_REGULAR = False
     
     # Override with secure secret key in production
     def __init__(self):
         super().__init__()
         if not os.environ.get('SECRET_KEY'):
             raise ValueError("SECRET_KEY environment variable must be set in production!")
+        if os.environ['SECRET_KEY'].strip().lower() in PLACEHOLDER_SECRET_KEYS:
+            raise ValueError("SECRET_KEY is a placeholder; set a random key in production!")
         self.SECRET_KEY = os.environ.get('SECRET_KEY')
 
 
 class TestingConfig(Config):
     """Testing configuration"""
+    __test__ = False  # not a pytest test class, despite the name
     TESTING = True
     DEBUG = True
     ENV = 'testing'
     SECRET_KEY = 'test-secret-key'
+    JSONIFY_PRETTYPRINT_REGULAR = False
 
 
 # Configuration dictionary
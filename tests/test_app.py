@@ -47,6 +47,22 @@ def test_testing_config():
     assert config.ENV == 'testing'
 
 
+def test_config_reads_environment_on_create(monkeypatch):
+    """Test settings come from the environment when the config is created"""
+    monkeypatch.setenv('RATE_LIMIT_API_KEYS', 'alpha, beta,')
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', 'True')
+    monkeypatch.setenv('FLASK_DEBUG', 'False')
+    monkeypatch.setenv('SHADOW_SAMPLE_RATE', '0.5')
+    assert DevelopmentConfig().RATE_LIMIT_API_KEYS == ['alpha', 'beta']
+    assert DevelopmentConfig().DEBUG is False
+    assert DevelopmentConfig().SHADOW_SAMPLE_RATE == 0.5
+    # Tests never rate limit and ignore FLASK_DEBUG
+    app = create_app('testing')
+    assert app.config['RATE_LIMIT_ENABLED'] is False
+    assert app.config['DEBUG'] is True
+    assert app.config['SHADOW_SAMPLE_RATE'] == 0.5
+
+
 def test_health_endpoint(client):
     """Test health check endpoint"""
     response = client.get('/health')
@@ -62,3 +78,37 @@ def test_404_handling(client):
     """Test 404 error handling"""
     response = client.get('/nonexistent')
     assert response.status_code == 404
+
+
+def test_startup_timings_endpoint(client):
+    """Test startup breakdown is exposed"""
+    response = client.get('/health/startup')
+    assert response.status_code == 200
+
+    import json
+    data = json.loads(response.data)
+    assert data['startup']['total_ms'] >= 0
+    assert 'import_flask' in data['startup']['phases']
+    assert 'register_blueprints' in data['startup']['phases']
+
+
+def test_heavy_dependencies_not_imported_at_startup():
+    """Test create_app does not import matplotlib or reportlab"""
+    import subprocess
+    import sys
+    code = (
+        "import sys; from app import create_app; create_app('testing'); "
+        "print(any(m in sys.modules for m in ('matplotlib', 'reportlab')))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == 'False'
+
+
+def test_precompile_templates(tmp_path, monkeypatch):
+    """Test templates are compiled into the bytecode cache"""
+    monkeypatch.setenv('TEMPLATE_CACHE_DIR', str(tmp_path))
+    app = create_app('testing')
+    result = app.test_cli_runner().invoke(args=['precompile-templates'])
+    assert result.exit_code == 0
+    assert 'Precompiled' in result.output
+    assert any(tmp_path.iterdir())
@@ -0,0 +1,73 @@
+"""
+Unit tests for static asset fingerprinting
+"""
+import shutil
+from app.assets import build_assets, minify_css, minify_js, IMMUTABLE_CACHE_CONTROL
+
+
+class TestMinify:
+    """Test the CSS and JS minifiers"""
+    
+    def test_minify_css(self):
+        """Test comments and whitespace are removed from CSS"""
+        css = '/* header */\nbody {\n    color: red;\n    margin: 0 auto;\n}\n.a > .b, .c { top: 0; }\n'
+        assert minify_css(css) == 'body{color:red;margin:0 auto}.a>.b,.c{top:0}'
+    
+    def test_minify_js(self):
+        """Test indentation and comment lines are removed from JS"""
+        js = '// comment\nfunction f() {\n    return 1;\n\n}\n'
+        assert minify_js(js) == 'function f() {\nreturn 1;\n}\n'
+
+
+class TestBuildAssets:
+    """Test the asset build step"""
+    
+    def test_build_writes_fingerprinted_files(self, tmp_path):
+        """Test built files are named after their content"""
+        (tmp_path / 'css').mkdir()
+        (tmp_path / 'css' / 'style.css').write_text('body { color: red; }')
+        (tmp_path / 'logo.png').write_bytes(b'png')
+        
+        manifest = build_assets(str(tmp_path))
+        assert list(manifest) == ['css/style.css']
+        built = tmp_path / manifest['css/style.css']
+        assert built.read_text() == 'body{color:red}'
+        assert (tmp_path / 'dist' / 'manifest.json').exists()
+        
+        # Changing the content changes the name and drops the old file
+        (tmp_path / 'css' / 'style.css').write_text('body { color: blue; }')
+        rebuilt = build_assets(str(tmp_path))
+        assert rebuilt['css/style.css'] != manifest['css/style.css']
+        assert not built.exists()
+
+
+class TestAssetURLs:
+    """Test asset URL resolution and caching headers"""
+    
+    def test_falls_back_to_source_without_manifest(self, app, client):
+        """Test unbuilt assets are served from their source path"""
+        app.extensions['assets'].manifest = {}
+        response = client.get('/')
+        assert b'/static/css/style.css' in response.data
+    
+    def test_built_assets_are_immutable(self, app, client, tmp_path):
+        """Test fingerprinted assets are linked and cached for a year"""
+        static = tmp_path / 'static'
+        shutil.copytree(app.static_folder, static, ignore=shutil.ignore_patterns('dist'))
+        app.static_folder = str(static)
+        
+        result = app.test_cli_runner().invoke(args=['build-assets'])
+        assert 'Built 2 assets' in result.output
+        built = app.extensions['assets'].manifest['css/style.css']
+        
+        page = client.get('/')
+        assert f'/static/{built}'.encode() in page.data
+        
+        response = client.get(f'/static/{built}')
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+        response.close()
+        
+        response = client.get('/static/css/style.css')
+        assert response.headers.get('Cache-Control') != IMMUTABLE_CACHE_CONTROL
+        response.close()
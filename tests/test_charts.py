@@ -0,0 +1,123 @@
+"""
+Unit tests for server-side chart rendering
+"""
+import time
+import pytest
+from app.charts import ChartRenderer, chart_renderer
+from app.models import WorkoutSession, workout_session
+
+pytest.importorskip('matplotlib')
+
+
+class TestChartRenderer:
+    """Test chart rendering and caching"""
+    
+    def test_render_png(self):
+        """Test rendering a PNG chart"""
+        session = WorkoutSession()
+        session.add_workout('Running', 30, 'Workout')
+        renderer = ChartRenderer()
+        
+        image = renderer.get('categories', 'png', session)
+        assert image.startswith(b'\x89PNG')
+    
+    def test_render_svg(self):
+        """Test rendering an SVG chart"""
+        session = WorkoutSession()
+        renderer = ChartRenderer()
+        
+        image = renderer.get('durations', 'svg', session)
+        assert b'<svg' in image
+    
+    def test_cached_by_version(self):
+        """Test repeated views reuse the cached render until the store changes"""
+        session = WorkoutSession()
+        session.add_workout('Running', 30, 'Workout')
+        renderer = ChartRenderer()
+        
+        first = renderer.get('categories', 'png', session)
+        second = renderer.get('categories', 'png', session)
+        assert first is second
+        assert renderer.renders == 1
+        
+        session.add_workout('Yoga', 15, 'Cool-down')
+        renderer.get('categories', 'png', session)
+        assert renderer.renders == 2
+    
+    def test_lru_eviction(self):
+        """Test the cache is bounded"""
+        session = WorkoutSession()
+        renderer = ChartRenderer(cache_size=2)
+        
+        renderer.get('categories', 'svg', session)
+        renderer.get('durations', 'svg', session)
+        renderer.get('categories', 'png', session)
+        renderer.get('categories', 'svg', session)
+        assert renderer.renders == 4
+    
+    def test_unknown_kind(self):
+        """Test unknown chart kinds are rejected"""
+        with pytest.raises(ValueError):
+            ChartRenderer().get('calories', 'png', WorkoutSession())
+
+
+class TestChartAPI:
+    """Test chart API endpoint"""
+    
+    def test_get_chart(self, client):
+        """Test fetching a chart image"""
+        workout_session.add_workout('Running', 30, 'Workout')
+        response = client.get('/api/charts/durations.png')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/png'
+        
+        etag = response.headers['ETag']
+        response = client.get('/api/charts/durations.png', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+    
+    def test_revalidation_skips_render(self, client):
+        """Test a matching ETag is answered without rendering, even after the cache is dropped"""
+        workout_session.add_workout('Running', 30, 'Workout')
+        etag = client.get('/api/charts/categories.svg').headers['ETag']
+        chart_renderer.clear()
+        renders = chart_renderer.renders
+        
+        response = client.get('/api/charts/categories.svg', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert chart_renderer.renders == renders
+        
+        # Compressed SVGs carry a weak ETag, which must validate too
+        etag = client.get('/api/charts/categories.svg', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+        assert etag.startswith('W/')
+        response = client.get('/api/charts/categories.svg', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert response.status_code == 304
+    
+    @pytest.mark.parametrize('slow', [True, False])
+    def test_render_failure_is_503(self, client, monkeypatch, slow):
+        """Test timed-out or failed renders answer 503 with Retry-After and are not cached"""
+        def fail(*args):
+            if slow:
+                time.sleep(0.3)
+            raise RuntimeError('render failed')
+        
+        chart_renderer.clear()
+        monkeypatch.setattr(chart_renderer, 'timeout', 0.05)
+        monkeypatch.setattr(chart_renderer, '_render', fail)
+        response = client.get('/api/charts/categories.svg')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        
+        monkeypatch.undo()
+        assert client.get('/api/charts/categories.svg').status_code == 200
+    
+    def test_unknown_chart(self, client):
+        """Test unknown chart returns 404"""
+        response = client.get('/api/charts/calories.png')
+        assert response.status_code == 404
+    
+    def test_analytics_server_charts(self, client):
+        """Test analytics page can embed server-rendered charts"""
+        response = client.get('/analytics?charts=server')
+        assert response.status_code == 200
+        assert b'/api/charts/categories.svg' in response.data
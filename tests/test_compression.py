@@ -0,0 +1,74 @@
+"""
+Unit tests for response compression
+"""
+import gzip
+import json
+from app.models import workout_session
+
+
+def _add_workouts(count=50):
+    for i in range(count):
+        workout_session.add_workout(f'Exercise {i}', 10 + i, 'Workout')
+
+
+class TestCompression:
+    """Test Accept-Encoding negotiation and compressed responses"""
+    
+    def test_large_json_compressed(self, client):
+        """Test large JSON bodies are gzip-compressed"""
+        _add_workouts()
+        response = client.get('/api/workouts', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        data = json.loads(gzip.decompress(response.data))
+        assert data['count'] == 50
+    
+    def test_small_body_not_compressed(self, client):
+        """Test bodies under the size threshold are sent as-is"""
+        response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+    
+    def test_identity_without_accept_encoding(self, client):
+        """Test clients that do not accept compression get plain bodies"""
+        _add_workouts()
+        response = client.get('/api/workouts')
+        assert 'Content-Encoding' not in response.headers
+        assert json.loads(response.data)['count'] == 50
+    
+    def test_refused_encoding(self, client):
+        """Test q=0 disables an encoding"""
+        _add_workouts()
+        response = client.get('/api/workouts', headers={'Accept-Encoding': 'gzip;q=0'})
+        assert 'Content-Encoding' not in response.headers
+    
+    def test_streaming_response_compressed(self, client):
+        """Test streamed exports are compressed incrementally"""
+        _add_workouts()
+        response = client.get('/api/workouts/export?format=ndjson', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        lines = gzip.decompress(response.data).splitlines()
+        assert len(lines) == 50
+    
+    def test_versioned_response_compressed_once(self, app, client):
+        """Test compressed variants of versioned responses are cached"""
+        _add_workouts()
+        cache = app.extensions['compression'].cache
+        first = client.get('/api/workouts', headers={'Accept-Encoding': 'gzip'})
+        second = client.get('/api/workouts', headers={'Accept-Encoding': 'gzip'})
+        assert first.data == second.data
+        assert cache.hits == 1
+        
+        workout_session.add_workout('New', 5, 'Workout')
+        third = client.get('/api/workouts', headers={'Accept-Encoding': 'gzip'})
+        assert cache.hits == 1
+        assert json.loads(gzip.decompress(third.data))['count'] == 51
+    
+    def test_conditional_request_with_compressed_etag(self, client):
+        """Test the weak ETag of a compressed response still validates"""
+        _add_workouts()
+        response = client.get('/api/workouts', headers={'Accept-Encoding': 'gzip'})
+        etag = response.headers['ETag']
+        assert etag.startswith('W/')
+        
+        response = client.get('/api/workouts', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert response.status_code == 304
@@ -0,0 +1,112 @@
+"""
+Unit tests for the exercise name index
+"""
+import json
+from collections import Counter
+import random
+from app.exercises import MAX_DEPTH, MAX_WORD_STARTS, ExerciseIndex
+from app.models import workout_session
+from app.sketches import normalize_exercise
+
+
+class TestExerciseIndex:
+    """Test prefix suggestions"""
+    
+    def test_suggest_by_prefix(self):
+        """Test names are matched by prefix and ordered by use"""
+        index = ExerciseIndex()
+        for name in ['Push-ups', 'Pull-ups', 'Pull-ups', 'Plank', 'Squats']:
+            index.add(name)
+        
+        assert index.suggest('pu') == [
+            {'exercise': 'Pull-ups', 'count': 2},
+            {'exercise': 'Push-ups', 'count': 1},
+        ]
+        assert index.suggest('sq') == [{'exercise': 'Squats', 'count': 1}]
+        assert index.suggest('x') == []
+        assert len(index) == 4
+    
+    def test_normalized(self):
+        """Test case and spacing variants count as one name"""
+        index = ExerciseIndex()
+        index.add('Bench  Press')
+        index.add('bench press')
+        assert index.suggest('BENCH') == [{'exercise': 'bench press', 'count': 2}]
+    
+    def test_matches_word_starts(self):
+        """Test later words in a name are searchable"""
+        index = ExerciseIndex()
+        index.add('Bench Press')
+        index.add('Leg Press')
+        assert {s['exercise'] for s in index.suggest('press')} == {'Bench Press', 'Leg Press'}
+        assert index.suggest('ress') == []
+    
+    def test_top_k_matches_exact_counts(self):
+        """Test each prefix keeps exactly the most used names"""
+        rng = random.Random(7)
+        names = [f'ex{i:03d}' for i in range(200)]
+        stream = [rng.choice(names[:rng.randint(1, 200)]) for _ in range(5000)]
+        
+        index = ExerciseIndex(top_k=5)
+        for name in stream:
+            index.add(name)
+        
+        counts = Counter(stream)
+        for prefix in ['ex', 'ex0', 'ex01', 'ex1']:
+            expected = sorted((c for n, c in counts.items() if n.startswith(prefix)), reverse=True)[:5]
+            assert [s['count'] for s in index.suggest(prefix, 5)] == expected
+    
+    def test_clear(self):
+        """Test clearing drops all names"""
+        index = ExerciseIndex()
+        index.add('Plank')
+        index.clear()
+        assert index.suggest('p') == []
+
+
+class TestSuggestAPI:
+    """Test the suggestion endpoint"""
+    
+    def test_suggest_endpoint(self, client):
+        """Test suggestions follow workouts as they are added and cleared"""
+        for name in ['Running', 'Rowing', 'Running']:
+            workout_session.add_workout(name, 20, 'Workout')
+        
+        data = json.loads(client.get('/api/exercises/suggest?q=r&limit=1').data)
+        assert data['suggestions'] == [{'exercise': 'Running', 'count': 2}]
+        
+        client.delete('/api/workouts/clear')
+        data = json.loads(client.get('/api/exercises/suggest?q=r').data)
+        assert data['suggestions'] == []
+    
+    def test_form_has_autocomplete(self, client):
+        """Test the workout form is wired to the suggestion list"""
+        response = client.get('/workouts')
+        assert b'list="exerciseSuggestions"' in response.data
+
+
+class TestIndexBounds:
+    """Test long names cannot blow up the index"""
+    
+    def test_long_names_bounded(self):
+        """Test only the first word starts and characters are indexed"""
+        index = ExerciseIndex()
+        name = ' '.join(['press'] * 2000)
+        index.add(name)
+        assert len(index._paths[normalize_exercise(name)]) <= 1 + MAX_WORD_STARTS * MAX_DEPTH
+        assert index.suggest('press press')[0]['count'] == 1
+    
+    def test_prefix_deeper_than_index(self):
+        """Test prefixes longer than the indexed depth still match exactly"""
+        index = ExerciseIndex()
+        index.add('a' * 40 + 'x')
+        index.add('a' * 40 + 'y')
+        assert [s['exercise'] for s in index.suggest('a' * 40 + 'y')] == ['a' * 40 + 'y']
+    
+    def test_api_rejects_long_names(self, client):
+        """Test both validation paths reject overlong exercise names"""
+        long_name = 'x' * 101
+        response = client.post('/api/workouts', json={'exercise': long_name, 'duration': 10})
+        assert response.status_code == 400
+        client.post('/add_workout', data={'exercise': long_name, 'duration': '10', 'category': 'Workout'})
+        assert workout_session.get_workout_count() == 0
@@ -0,0 +1,136 @@
+"""
+Unit tests for per-variant A/B experiment metrics
+"""
+import threading
+import pytest
+from app.experiments import OTHER_VARIANT, experiments
+from app.sketches import HyperLogLog
+
+
+@pytest.fixture(autouse=True)
+def reset_experiments():
+    """Start every test with empty counters"""
+    experiments.reset()
+    yield
+    experiments.reset()
+
+
+def summary(client):
+    experiments.flush()
+    return client.get('/health/experiments').get_json()['experiments']['variants']
+
+
+class TestExperiments:
+    """Test variant tagging and aggregation"""
+
+    def test_variant_from_header_cookie_or_default(self, client):
+        """Test the header wins over the cookie, and untagged requests use the default"""
+        client.get('/api/workouts', headers={'X-Version': 'B'})
+        client.set_cookie('version', 'A')
+        client.get('/api/workouts')
+        client.get('/api/workouts', headers={'X-Version': 'B'})
+        client.delete_cookie('version')
+        client.get('/api/workouts')
+
+        variants = summary(client)
+        assert variants['A']['requests'] == 1
+        assert variants['B']['requests'] == 2
+        assert variants['default']['requests'] == 1
+
+    def test_invalid_and_excess_variants(self, client):
+        """Test odd header values cannot create unbounded variants"""
+        client.get('/api/workouts', headers={'X-Version': 'not a variant!'})
+        for i in range(experiments.max_variants + 3):
+            client.get('/api/workouts', headers={'X-Version': f'v{i}'})
+
+        variants = summary(client)
+        assert len(variants) == experiments.max_variants + 1
+        assert variants[OTHER_VARIANT]['requests'] == 4
+
+    def test_counts_errors_pages_and_latency(self, client):
+        """Test status classes, page views and latency percentiles are recorded"""
+        headers = {'X-Version': 'A'}
+        client.get('/workouts', headers=headers)
+        client.get('/api/workouts/page?limit=0', headers=headers)
+        client.get('/health', headers=headers)
+
+        stats = summary(client)['A']
+        assert stats['requests'] == 2
+        assert stats['page_views'] == 1
+        assert stats['client_errors'] == 1
+        assert stats['errors'] == 0 and stats['error_rate'] == 0
+        assert stats['latency_ms']['p99'] > 0
+
+    def test_workout_creation_conversions(self, client, sample_workout):
+        """Test created workouts count as events and convert visitors"""
+        client.post('/api/workouts', json=sample_workout, headers={'X-Version': 'B'})
+        client.post('/add_workout', data=dict(sample_workout, duration='20'), headers={'X-Version': 'B'})
+        client.post('/api/workouts', json={'exercise': ''}, headers={'X-Version': 'B'})
+        client.get('/api/workouts', headers={'X-Version': 'A', 'X-API-Key': 'someone-else'})
+
+        variants = summary(client)
+        assert variants['B']['events'] == {'workout_created': 2}
+        assert variants['B']['visitors'] == 1
+        assert variants['B']['conversion_rate'] == 1.0
+        assert variants['A']['events'] == {}
+        assert variants['A']['conversion_rate'] == 0
+
+    def test_visitor_cookie(self, client):
+        """Test browsers keep one visitor ID across requests and addresses"""
+        response = client.get('/workouts', headers={'X-Version': 'A'})
+        visitor = response.headers['Set-Cookie']
+        assert visitor.startswith(f'{experiments.visitor_cookie}=') and 'HttpOnly' in visitor
+        for address in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+            response = client.get('/workouts', headers={'X-Version': 'A'}, environ_base={'REMOTE_ADDR': address})
+            assert 'Set-Cookie' not in response.headers
+
+        assert summary(client)['A']['visitors'] == 1
+    
+    def test_generated_and_shadow_traffic_skipped(self, client):
+        """Test load generator and shadow copies are not counted"""
+        client.get('/api/workouts', headers={'X-Version': 'A', 'X-Loadgen': '1'})
+        client.get('/api/workouts', headers={'X-Version': 'A', 'X-Shadow-Request': '1'})
+        client.get('/api/workouts', headers={'X-Version': 'A'})
+
+        assert summary(client)['A']['requests'] == 1
+    
+    def test_counts_are_held_until_flush(self, client):
+        """Test shard counts only reach the summary when flushed"""
+        client.get('/api/workouts', headers={'X-Version': 'A'})
+        data = client.get('/health/experiments').get_json()['experiments']
+        assert data['variants'] == {}
+
+        experiments.flush()
+        data = client.get('/health/experiments').get_json()['experiments']
+        assert data['variants']['A']['requests'] == 1
+        assert data['flushed_at'] is not None
+
+    def test_concurrent_requests(self, app):
+        """Test counts from many threads (and shards) add up"""
+        def send():
+            client = app.test_client()
+            for _ in range(25):
+                client.get('/api/workouts/stats', headers={'X-Version': 'A'})
+
+        threads = [threading.Thread(target=send) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        experiments.flush()
+        assert experiments.summary()['variants']['A']['requests'] == 200
+
+
+class TestHyperLogLogMerge:
+    """Test merging distinct-count sketches"""
+
+    def test_merge_counts_union(self):
+        """Test a merged sketch estimates the union"""
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            first.add(f'user-{i}')
+        for i in range(2000, 5000):
+            second.add(f'user-{i}')
+        first.merge(second)
+        assert abs(first.count() - 5000) < 5000 * 3 * first.relative_error
@@ -0,0 +1,92 @@
+"""
+Unit tests for idempotent writes
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.idempotency import IdempotencyCache, idempotency
+from app.models import workout_session
+
+
+@pytest.fixture(autouse=True)
+def clear_keys():
+    """Start every test with an empty key cache"""
+    idempotency.clear()
+    yield
+    idempotency.clear()
+
+
+def _post(client, data, key):
+    return client.post('/api/workouts', data=json.dumps(data), content_type='application/json',
+                       headers={'Idempotency-Key': key})
+
+
+class TestIdempotencyCache:
+    """Test the bounded key cache"""
+    
+    def test_bounded_size(self):
+        """Test the oldest keys are evicted beyond max_keys"""
+        cache = IdempotencyCache(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            cache.reserve(key, 'fp')
+        assert len(cache) == 2
+        assert cache.reserve('a', 'fp')[1] is True
+    
+    def test_expired_keys_evicted(self):
+        """Test keys are forgotten after the TTL"""
+        cache = IdempotencyCache(ttl=0)
+        cache.reserve('a', 'fp')
+        assert cache.reserve('a', 'fp')[1] is True
+
+
+class TestIdempotentPost:
+    """Test Idempotency-Key handling on POST /api/workouts"""
+    
+    def test_retry_replays_original_response(self, client, sample_workout):
+        """Test a retry returns the first response without adding another workout"""
+        first = _post(client, sample_workout, 'kiosk-1-0001')
+        retry = _post(client, sample_workout, 'kiosk-1-0001')
+        
+        assert first.status_code == retry.status_code == 201
+        assert retry.data == first.data
+        assert retry.headers['Idempotent-Replayed'] == 'true'
+        assert workout_session.get_workout_count() == 1
+    
+    def test_different_keys_both_applied(self, client, sample_workout):
+        """Test distinct keys are separate writes"""
+        _post(client, sample_workout, 'key-a')
+        _post(client, sample_workout, 'key-b')
+        assert workout_session.get_workout_count() == 2
+    
+    def test_key_reused_with_different_body(self, client, sample_workout):
+        """Test a key cannot be reused for a different request"""
+        _post(client, sample_workout, 'key-a')
+        response = _post(client, dict(sample_workout, duration=99), 'key-a')
+        assert response.status_code == 422
+        assert workout_session.get_workout_count() == 1
+    
+    def test_failed_request_not_stored(self, client):
+        """Test a rejected request can be retried with the same key"""
+        response = _post(client, {'exercise': 'Squats', 'duration': 'abc'}, 'key-a')
+        assert response.status_code == 400
+        response = _post(client, {'exercise': 'Squats', 'duration': 'abc'}, 'key-a')
+        assert response.status_code == 400
+        assert 'Idempotent-Replayed' not in response.headers
+    
+    def test_invalid_key(self, client, sample_workout):
+        """Test overlong keys are rejected"""
+        response = _post(client, sample_workout, 'x' * 300)
+        assert response.status_code == 400
+        assert workout_session.get_workout_count() == 0
+    
+    def test_concurrent_retries_insert_once(self, app, sample_workout):
+        """Test simultaneous retries of one request add a single workout"""
+        def post(_):
+            return _post(app.test_client(), sample_workout, 'kiosk-2-0001').status_code
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            statuses = list(pool.map(post, range(16)))
+        
+        assert workout_session.get_workout_count() == 1
+        assert set(statuses) <= {201, 409}
+        assert statuses.count(201) >= 1
@@ -0,0 +1,78 @@
+"""
+Unit tests for JSON serialization
+"""
+import json
+from datetime import datetime
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from app import json_provider
+from app.json_provider import FastJSONProvider, workouts_response
+from app.models import Workout, workout_session
+
+
+class TestFastJSONProvider:
+    """Test the pluggable JSON provider"""
+    
+    def test_matches_default_provider(self, app):
+        """Test output decodes to the same value as Flask's default provider"""
+        data = {'when': datetime(2025, 1, 2, 3, 4, 5), 'n': 1, 'names': ['Ü', 'a']}
+        fast = FastJSONProvider(app).dumps(data)
+        default = DefaultJSONProvider(app).dumps(data)
+        assert json.loads(fast) == json.loads(default)
+    
+    def test_compact_outside_debug(self, client):
+        """Test responses are not pretty-printed in testing/production"""
+        workout_session.add_workout('Running', 30, 'Workout')
+        response = client.get('/api/workouts/stats')
+        assert b'\n  ' not in response.data
+    
+    def test_stdlib_fallback(self, app, monkeypatch):
+        """Test the provider works without orjson"""
+        monkeypatch.setattr(json_provider, 'orjson', None)
+        response = FastJSONProvider(app).response({'success': True})
+        assert json.loads(response.data) == {'success': True}
+
+    def test_values_orjson_cannot_encode(self, app):
+        """Test integers beyond 64 bits fall back to the stdlib encoder"""
+        data = {'n': 2 ** 70, 'names': ['Ü']}
+        provider = FastJSONProvider(app)
+        assert json.loads(provider.dumps(data)) == data
+        assert json.loads(provider.response(data).data) == data
+        assert json.loads(json_provider.dumps_bytes(data)) == data
+    
+    def test_api_rejects_huge_duration(self, client):
+        """Test out-of-range durations are rejected before they are stored"""
+        for duration in (1441, 10 ** 30):
+            response = client.post('/api/workouts', json={'exercise': 'Running', 'duration': duration})
+            assert response.status_code == 400
+        assert workout_session.get_workout_count() == 0
+
+
+class TestWorkoutFragments:
+    """Test pre-encoded workout serialization"""
+    
+    def test_to_json_matches_to_dict(self):
+        """Test the cached fragment encodes to_dict"""
+        workout = Workout('Push-ups', 30, 'Workout')
+        assert json.loads(workout.to_json()) == workout.to_dict()
+        assert workout.to_json() is workout.to_json()
+    
+    @pytest.mark.parametrize('compact', [True, False])
+    def test_workouts_response(self, app, compact):
+        """Test list responses match the dict-based path in both modes"""
+        app.json.compact = compact
+        workouts = [Workout('Push-ups', 30, 'Workout'), Workout('Yoga', 15, 'Cool-down')]
+        
+        with app.test_request_context():
+            response = workouts_response(workouts, success=True, count=2)
+        data = json.loads(response.data)
+        assert data == {'success': True, 'count': 2, 'workouts': [w.to_dict() for w in workouts]}
+    
+    def test_api_uses_fragments(self, client, sample_workouts):
+        """Test the workouts API returns every workout"""
+        for workout in sample_workouts:
+            client.post('/api/workouts', data=json.dumps(workout), content_type='application/json')
+        
+        data = json.loads(client.get('/api/workouts').data)
+        assert data['count'] == len(sample_workouts)
+        assert [w['exercise'] for w in data['workouts']] == [w['exercise'] for w in sample_workouts]
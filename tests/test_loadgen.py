@@ -0,0 +1,182 @@
+"""
+Unit tests for the load generator and traffic replay
+"""
+import io
+import json
+import time
+import pytest
+from app import create_app
+from app.loadgen import AppTarget, Arrival, parse_mix, poisson_schedule, replay_schedule, run_load
+from app.models import workout_session
+
+
+@pytest.fixture
+def recording_app(tmp_path, monkeypatch):
+    """App recording its traffic to a temporary log"""
+    log_path = tmp_path / 'traffic.ndjson'
+    monkeypatch.setenv('TRAFFIC_LOG', str(log_path))
+    app = create_app('testing')
+    monkeypatch.delenv('TRAFFIC_LOG')  # later apps in the same test do not record
+    yield app, log_path
+    app.extensions['traffic_recorder'].close()
+
+
+def read_log(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestSchedules:
+    """Test request mixes and arrival schedules"""
+
+    def test_parse_mix(self):
+        """Test mix weights are parsed and validated"""
+        assert parse_mix('api_post=2, stats=3,page') == {'api_post': 2.0, 'stats': 3.0, 'page': 1.0}
+        for bad in ('bogus=1', 'stats=x', 'stats=-1', 'stats=0'):
+            with pytest.raises(ValueError):
+                parse_mix(bad)
+
+    def test_poisson_schedule(self):
+        """Test arrivals follow the rate and mix and are repeatable"""
+        arrivals = list(poisson_schedule(200, 5, {'stats': 1, 'api_post': 1}, seed=1))
+        offsets = [a.offset for a in arrivals]
+        assert 850 < len(arrivals) < 1150
+        assert offsets == sorted(offsets) and offsets[-1] < 5
+        assert {a.name for a in arrivals} == {'stats', 'api_post'}
+        assert [a.path for a in poisson_schedule(200, 5, seed=1)] == \
+            [a.path for a in poisson_schedule(200, 5, seed=1)]
+
+    def test_invalid_schedule_raises_eagerly(self):
+        """Test bad arguments fail before any load is sent"""
+        with pytest.raises(ValueError):
+            poisson_schedule(0, 5)
+        with pytest.raises(ValueError):
+            replay_schedule('unused.ndjson', speed=0)
+
+
+class SlowTarget:
+    """Target taking a fixed time per request"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def request(self, method, path, body, headers):
+        time.sleep(self.seconds)
+        return 200, b''
+
+
+class TestRunLoad:
+    """Test sending load"""
+
+    def test_in_process(self, app):
+        """Test generated load reaches the app and every response is counted"""
+        arrivals = list(poisson_schedule(400, 0.25, seed=3))
+        result = run_load(AppTarget(app), arrivals, concurrency=4)
+        summary = result.to_dict()
+
+        assert summary['sent'] == summary['completed'] == len(arrivals)
+        assert summary['errors'] == 0
+        assert set(summary['statuses']) <= {'200', '201', '302'}
+        posts = sum(1 for a in arrivals if a.method == 'POST')
+        assert workout_session.get_workout_count() == posts
+        assert 'all' in result.format()
+
+    def test_latency_includes_queueing(self):
+        """Test latency is measured from the scheduled time (no coordinated omission)"""
+        arrivals = [Arrival(0, 'slow', 'GET', '/') for _ in range(5)]
+        result = run_load(SlowTarget(0.05), arrivals, concurrency=1)
+        # The last request waited for the four before it
+        assert result.overall.to_dict()['max_ms'] >= 240
+        assert result.overall.percentile(50) >= 140
+
+    def test_errors_counted(self):
+        """Test transport failures are counted, not raised"""
+        class Broken:
+            def request(self, *args):
+                raise ConnectionError('refused')
+
+        result = run_load(Broken(), [Arrival(0, 'x', 'GET', '/')], concurrency=1)
+        assert result.errors == 1
+
+    def test_cli(self, runner):
+        """Test the loadgen command prints a JSON report"""
+        result = runner.invoke(args=['loadgen', '--rate', '200', '--duration', '0.1',
+                                     '--mix', 'stats=1,recent=1', '--seed', '5', '--json'])
+        assert result.exit_code == 0, result.output
+        summary = json.loads(result.output)
+        assert summary['completed'] == summary['sent'] > 0
+        assert set(summary['by_request']) <= {'stats', 'recent'}
+
+    def test_cli_rejects_bad_mix(self, runner):
+        """Test a bad mix is reported as a usage error"""
+        result = runner.invoke(args=['loadgen', '--mix', 'bogus=1'])
+        assert result.exit_code != 0
+        assert 'Unknown scenario' in result.output
+
+
+class TestRecordAndReplay:
+    """Test recording traffic and replaying it"""
+
+    def test_records_requests(self, recording_app):
+        """Test requests are logged with their bodies, skipping health and generated traffic"""
+        app, log_path = recording_app
+        client = app.test_client()
+        client.post('/add_workout', data={'exercise': 'Squats', 'duration': '20', 'category': 'Workout'})
+        client.post('/api/workouts', json={'exercise': 'Plank', 'duration': 5, 'category': 'Cool-down'})
+        client.get('/api/workouts/recent?limit=3')
+        client.get('/health')
+        client.get('/api/workouts/stats', headers={'X-Loadgen': '1'})
+
+        records = read_log(log_path)
+        assert [(r['method'], r['route'], r['status']) for r in records] == [
+            ('POST', '/add_workout', 302),
+            ('POST', '/api/workouts', 201),
+            ('GET', '/api/workouts/recent', 200),
+        ]
+        assert 'exercise=Squats' in records[0]['body']
+        assert records[0]['content_type'] == 'application/x-www-form-urlencoded'
+        assert json.loads(records[1]['body'])['exercise'] == 'Plank'
+        assert records[2]['path'] == '/api/workouts/recent?limit=3'
+        # The form was still parsed by the view
+        assert workout_session.get_workout_count() == 2
+
+    def test_chunked_body_not_buffered(self, recording_app):
+        """Test bodies without a Content-Length are left to the view, not recorded"""
+        app, log_path = recording_app
+        body = json.dumps({'exercise': 'Rowing', 'duration': 15, 'category': 'Workout'}).encode('utf-8')
+        response = app.test_client().post('/api/workouts', input_stream=io.BytesIO(body),
+                                          content_type='application/json',
+                                          headers={'Transfer-Encoding': 'chunked'},
+                                          environ_overrides={'wsgi.input_terminated': True})
+        assert response.status_code == 201
+
+        records = read_log(log_path)
+        assert [(r['method'], r['status']) for r in records] == [('POST', 201)]
+        assert 'body' not in records[0]
+
+    def test_log_closed_at_exit(self, tmp_path, monkeypatch):
+        """Test the log file is registered to close at interpreter exit"""
+        registered = []
+        monkeypatch.setattr('app.loadgen.atexit.register', registered.append)
+        monkeypatch.setenv('TRAFFIC_LOG', str(tmp_path / 'traffic.ndjson'))
+        recorder = create_app('testing').extensions['traffic_recorder']
+        assert registered == [recorder.close]
+        registered[0]()
+        assert recorder._file is None
+
+    def test_replay(self, recording_app, app):
+        """Test a recording replays the same requests, faster with speed"""
+        recorder_app, log_path = recording_app
+        client = recorder_app.test_client()
+        for i in range(3):
+            client.post('/api/workouts', json={'exercise': f'Run {i}', 'duration': 10, 'category': 'Workout'})
+            time.sleep(0.02)
+
+        arrivals = list(replay_schedule(str(log_path), speed=2))
+        recorded = [r['t'] for r in read_log(log_path)]
+        assert [a.offset for a in arrivals] == pytest.approx([(t - recorded[0]) / 2 for t in recorded])
+        assert {a.name for a in arrivals} == {'POST /api/workouts'}
+
+        workout_session.clear_workouts()
+        result = run_load(AppTarget(app), arrivals, concurrency=1)
+        assert result.statuses == {201: 3}
+        assert [w.exercise for w in workout_session.get_all_workouts()] == ['Run 0', 'Run 1', 'Run 2']
@@ -2,7 +2,7 @@
 Unit tests for data models
 """
 import pytest
-from app.models import Workout, WorkoutSession
+from app.models import Workout, WorkoutSession, new_session_id
 from datetime import datetime
 
 
@@ -51,6 +51,54 @@ class TestWorkout:
         workout = Workout('Cycling', 45, 'Workout')
         assert 'Cycling' in repr(workout)
         assert '45' in repr(workout)
+    
+    def test_workout_derived_fields(self):
+        """Test timestamp and date are derived from the native creation time"""
+        created = datetime(2025, 3, 4, 5, 6, 7, 123456)
+        workout = Workout('Rowing', 20, 'Workout', timestamp=created)
+        
+        assert workout.timestamp == created.isoformat()
+        assert workout.date == '2025-03-04'
+        assert workout.day_number == created.toordinal()
+        assert workout.created_at == created
+    
+    def test_workout_serialization_unchanged(self):
+        """Test serialized output matches the stored timestamp format"""
+        workout = Workout('Rowing', 20, 'Workout')
+        data = workout.to_dict()
+        
+        assert set(data) == {'exercise', 'duration', 'category', 'timestamp', 'session_id', 'date'}
+        assert data['date'] == datetime.fromisoformat(data['timestamp']).date().isoformat()
+        assert len(data['session_id']) == 8
+        assert Workout.from_dict(data).to_dict() == data
+    
+    def test_workout_rejects_invalid_timestamp(self):
+        """Test malformed timestamp strings fail when the workout is built"""
+        for bad in ('2025-13-45T00:00:00', '2025-02-30T00:00:00', '2025-01-01T25:00:00',
+                    '2025-01-01Tnonsense', 'yesterday'):
+            with pytest.raises(ValueError):
+                Workout('Rowing', 20, 'Workout', timestamp=bad)
+            with pytest.raises(ValueError):
+                Workout.from_fields('Rowing', 20, 'Workout', bad, 'abcd1234')
+        workout = Workout.from_fields('Rowing', 20, 'Workout', '2025-03-04T05:06:07', 'abcd1234')
+        assert workout._created is None
+        assert workout.date == '2025-03-04'
+        
+        # Other ISO forms are parsed once, and the result is kept
+        workout = Workout('Rowing', 20, 'Workout', timestamp='2025-03-04 05:06+02:00')
+        assert workout._created == datetime.fromisoformat('2025-03-04 05:06+02:00')
+        assert workout.date == '2025-03-04'
+    
+    def test_new_session_id_avoids_collisions(self):
+        """Test generated session IDs skip IDs already taken"""
+        import random
+        random.seed(42)
+        first = new_session_id()
+        random.seed(42)
+        second = new_session_id({first})
+        assert first != second
+        assert len(second) == 8
+        int(second, 16)
 
 
 class TestWorkoutSession:
@@ -97,6 +145,21 @@ class TestWorkoutSession:
         assert len(workout) == 2
         assert len(cooldown) == 1
     
+    def test_get_page(self):
+        """Test paging through workouts, overall and per category"""
+        session = WorkoutSession()
+        for i in range(5):
+            session.add_workout(f'Run {i}', 10, 'Workout')
+            session.add_workout(f'Stretch {i}', 5, 'Warm-up')
+        
+        assert [w.exercise for w in session.get_page(0, 3)] == ['Run 0', 'Stretch 0', 'Run 1']
+        assert [w.exercise for w in session.get_page(3, 2, 'Workout')] == ['Run 3', 'Run 4']
+        assert session.get_page(10, 5) == []
+        assert session.get_page(0, 5, 'Cool-down') == []
+        
+        session.clear_workouts()
+        assert session.get_page(0, 5, 'Workout') == []
+    
     def test_get_duration_by_category(self):
         """Test getting duration by category"""
         session = WorkoutSession()
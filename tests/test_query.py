@@ -0,0 +1,160 @@
+"""
+Unit tests for the workout query planner
+"""
+import json
+import random
+from datetime import date, datetime, timedelta
+import pytest
+from app.models import Workout, WorkoutSession, workout_session
+from app.query import QueryError, WorkoutQuery
+
+
+CATEGORIES = ['Warm-up', 'Workout', 'Cool-down']
+EXERCISES = ['Running', 'Rowing', 'Squats', 'Plank', 'Bench Press']
+
+
+@pytest.fixture
+def session():
+    """Session with a spread of workouts over 30 days"""
+    rng = random.Random(3)
+    session = WorkoutSession()
+    start = datetime(2024, 1, 1, 7, 0)
+    for i in range(600):
+        session.restore_workout(Workout(
+            rng.choice(EXERCISES), rng.randint(5, 60), rng.choice(CATEGORIES),
+            timestamp=start + timedelta(days=rng.randrange(30), minutes=i),
+            session_id=f's{rng.randrange(40):03d}'))
+    return session
+
+
+def _brute_force(session, query):
+    rows = [w for w in session.workouts
+            if (query.categories is None or w.category in query.categories)
+            and (query.exercise is None or w.exercise.lower() == query.exercise)
+            and (query.session_id is None or w.session_id == query.session_id)
+            and (query.date_from is None or w.date >= query.date_from.isoformat())
+            and (query.date_to is None or w.date <= query.date_to.isoformat())
+            and (query.min_duration is None or w.duration >= query.min_duration)
+            and (query.max_duration is None or w.duration <= query.max_duration)]
+    if query.sort_field:
+        rows.sort(key=lambda w: getattr(w, query.sort_field), reverse=query.descending)
+    return rows[query.offset:query.offset + query.limit]
+
+
+class TestPlanner:
+    """Test plan selection and results"""
+    
+    def test_picks_most_selective_index(self, session):
+        """Test the smallest candidate set drives the scan"""
+        query = WorkoutQuery(categories=['Workout'], session_id='s001', min_duration=10)
+        rows, plan = session.query(query)
+        assert plan['access'] == 'index:session_id'
+        assert plan['rows_scanned'] == len(session.sessions['s001'])
+        assert 'min_duration' in plan['filters']
+        assert rows == _brute_force(session, query)
+    
+    def test_intersects_similar_indexes(self, session):
+        """Test indexes of similar size are intersected"""
+        query = WorkoutQuery(categories=['Workout'], exercise='running', limit=1000)
+        rows, plan = session.query(query)
+        assert plan['access'] == 'index:exercise'
+        assert plan['intersected'] == ['category']
+        assert plan['filters'] == []
+        assert rows == _brute_force(session, query)
+    
+    def test_date_index(self, session):
+        """Test a narrow date range is served from the day index"""
+        query = WorkoutQuery(date_from=date(2024, 1, 5), date_to=date(2024, 1, 6), sort='timestamp')
+        rows, plan = session.query(query)
+        assert plan['access'] == 'index:date'
+        assert plan['rows_scanned'] == len(rows)
+        assert rows == _brute_force(session, query)
+    
+    def test_full_scan_stops_at_limit(self, session):
+        """Test unsorted queries stop scanning once the page is full"""
+        rows, plan = session.query(WorkoutQuery(limit=5))
+        assert plan['access'] == 'full_scan'
+        assert plan['rows_scanned'] == 5
+        assert rows == session.workouts[:5]
+    
+    def test_matches_brute_force(self, session):
+        """Test random predicate combinations return the same rows as a scan"""
+        rng = random.Random(11)
+        for _ in range(200):
+            query = WorkoutQuery(
+                categories=rng.choice([None, ['Workout'], ['Warm-up', 'Cool-down']]),
+                exercise=rng.choice([None, 'running', 'bench press']),
+                session_id=rng.choice([None, f's{rng.randrange(40):03d}']),
+                date_from=rng.choice([None, date(2024, 1, 1) + timedelta(days=rng.randrange(20))]),
+                date_to=rng.choice([None, date(2024, 1, 20)]),
+                min_duration=rng.choice([None, 30]),
+                max_duration=rng.choice([None, 45]),
+                sort=rng.choice([None, 'duration', '-timestamp', 'exercise']),
+                limit=rng.choice([5, 50, 1000]),
+                offset=rng.choice([0, 3]))
+            rows, _ = session.query(query)
+            expected = _brute_force(session, query)
+            if query.sort_field is None:
+                # Unsorted rows come in access-path order, so only the page size is comparable
+                assert len(rows) == len(expected)
+                if query.offset == 0 and len(expected) < query.limit:
+                    assert sorted(map(id, rows)) == sorted(map(id, expected))
+            else:
+                assert [getattr(w, query.sort_field) for w in rows] == \
+                       [getattr(w, query.sort_field) for w in expected]
+    
+    def test_clear_resets_indexes(self, session):
+        """Test cleared workouts are not found through any index"""
+        session.clear_workouts()
+        rows, _ = session.query(WorkoutQuery(session_id='s001', exercise='running'))
+        assert rows == []
+        assert session.sessions == {}
+
+
+class TestWorkoutQuery:
+    """Test query validation"""
+    
+    def test_invalid_queries(self):
+        """Test bad fields, sorts and limits are rejected"""
+        with pytest.raises(QueryError):
+            WorkoutQuery(sort='weight')
+        with pytest.raises(QueryError):
+            WorkoutQuery(fields=['exercise', 'password'])
+        with pytest.raises(QueryError):
+            WorkoutQuery(limit=0)
+        with pytest.raises(QueryError):
+            WorkoutQuery.from_args({'min_duration': 'ten'})
+        with pytest.raises(QueryError):
+            WorkoutQuery.from_args({'from': '2024-02-01', 'to': '2024-01-01'})
+
+
+class TestQueryAPI:
+    """Test the query endpoint"""
+    
+    def test_query_with_projection_and_explain(self, client):
+        """Test filtered, sorted and projected results with the plan"""
+        for name, duration, category in [('Running', 30, 'Workout'), ('Rowing', 45, 'Workout'),
+                                         ('Stretching', 10, 'Warm-up')]:
+            workout_session.add_workout(name, duration, category)
+        
+        response = client.get('/api/workouts/query?category=Workout&min_duration=20'
+                              '&sort=-duration&fields=exercise,duration&explain=1')
+        data = json.loads(response.data)
+        assert data['workouts'] == [{'exercise': 'Rowing', 'duration': 45},
+                                    {'exercise': 'Running', 'duration': 30}]
+        assert data['plan']['access'] == 'index:category'
+        assert data['plan']['rows_scanned'] == 2
+    
+    def test_query_full_rows(self, client, sample_workout):
+        """Test rows are complete without a projection"""
+        workout_session.add_workout('Squats', 20, 'Workout')
+        data = json.loads(client.get('/api/workouts/query?exercise=squats').data)
+        assert data['count'] == 1
+        assert set(data['workouts'][0]) == {'exercise', 'duration', 'category', 'timestamp', 'session_id', 'date'}
+        assert 'plan' not in data
+    
+    def test_query_invalid(self, client):
+        """Test invalid queries get 400"""
+        response = client.get('/api/workouts/query?sort=weight')
+        assert response.status_code == 400
+        assert 'sort' in json.loads(response.data)['error']
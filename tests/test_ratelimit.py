@@ -0,0 +1,151 @@
+"""
+Unit tests for rate limiting and load shedding
+"""
+import json
+import pytest
+from app import create_app, ratelimit
+from app.ratelimit import ConcurrencyLimiter, MemoryBackend, RateLimitBackend, create_backend, limiter
+
+
+@pytest.fixture
+def limited(app):
+    """Enable the shared limiter with a small bucket"""
+    limiter.enabled = True
+    limiter.rate = 1.0
+    limiter.burst = 3
+    limiter.api_keys = frozenset({'kiosk-1', 'kiosk-2'})
+    limiter.backend = MemoryBackend()
+    yield limiter
+    limiter.enabled = False
+
+
+def _post_workout(client, **headers):
+    return client.post('/api/workouts',
+                       data=json.dumps({'exercise': 'Squats', 'duration': 10}),
+                       content_type='application/json',
+                       headers=headers)
+
+
+class TestMemoryBackend:
+    """Test the in-memory token buckets"""
+    
+    def test_bucket_empties_and_refills(self, monkeypatch):
+        """Test tokens run out at the burst size and refill at the rate"""
+        now = [100.0]
+        monkeypatch.setattr(ratelimit.time, 'monotonic', lambda: now[0])
+        backend = MemoryBackend()
+        
+        assert [backend.take('a', rate=2, burst=3)[0] for _ in range(4)] == [True, True, True, False]
+        now[0] += 0.5
+        assert backend.take('a', rate=2, burst=3) == (True, 0.0)
+        assert backend.take('b', rate=2, burst=3)[0] is True
+    
+    def test_bounded_number_of_clients(self):
+        """Test the least recently seen clients are forgotten"""
+        backend = MemoryBackend(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            backend.take(key, rate=1, burst=5)
+        assert list(backend._buckets) == ['b', 'c']
+    
+    def test_unknown_storage(self):
+        """Test unsupported storage URLs are rejected"""
+        assert isinstance(create_backend(None), MemoryBackend)
+        with pytest.raises(ValueError):
+            create_backend('memcached://localhost')
+    
+    def test_backend_must_implement_take(self):
+        """Test a backend without ``take`` cannot be created"""
+        class Incomplete(RateLimitBackend):
+            pass
+        
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+class TestConcurrencyLimiter:
+    """Test the concurrency limiter"""
+    
+    def test_acquire_and_release(self):
+        """Test slots are limited and can be reused"""
+        concurrency = ConcurrencyLimiter(max_concurrent=1)
+        assert concurrency.try_acquire() is True
+        assert concurrency.try_acquire() is False
+        concurrency.release()
+        assert concurrency.try_acquire() is True
+
+
+class TestAdmissionControl:
+    """Test limits applied to the API"""
+    
+    def test_disabled_when_testing(self, client):
+        """Test the limiter stays out of the way of the test suite"""
+        for _ in range(30):
+            assert _post_workout(client).status_code == 201
+    
+    def test_write_rate_limited(self, client, limited):
+        """Test clients over their budget get 429 with Retry-After"""
+        before = limited.counters['limited']
+        statuses = [_post_workout(client).status_code for _ in range(4)]
+        assert statuses == [201, 201, 201, 429]
+        
+        response = client.delete('/api/workouts/clear')
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 1
+        assert limited.counters['limited'] == before + 2
+    
+    def test_clients_limited_separately(self, client, limited):
+        """Test API keys get their own buckets"""
+        for _ in range(3):
+            _post_workout(client, **{'X-API-Key': 'kiosk-1'})
+        assert _post_workout(client, **{'X-API-Key': 'kiosk-1'}).status_code == 429
+        assert _post_workout(client, **{'X-API-Key': 'kiosk-2'}).status_code == 201
+    
+    def test_unknown_api_keys_share_the_ip_bucket(self, client, limited):
+        """Test rotating unlisted API keys does not escape the limit"""
+        statuses = [_post_workout(client, **{'X-API-Key': f'random-{i}'}).status_code for i in range(4)]
+        assert statuses == [201, 201, 201, 429]
+        assert _post_workout(client, **{'X-API-Key': 'kiosk-1'}).status_code == 201
+    
+    def test_trusted_proxy_hops(self, monkeypatch):
+        """Test clients behind a trusted proxy are told apart by X-Forwarded-For"""
+        monkeypatch.setenv('TRUSTED_PROXY_HOPS', '1')
+        app = create_app('testing')
+        limiter.enabled = True
+        limiter.rate = 1.0
+        limiter.burst = 1
+        try:
+            client = app.test_client()
+            proxy = {'REMOTE_ADDR': '10.0.0.2'}
+            for forwarded, expected in (('198.51.100.7', 201), ('198.51.100.7', 429), ('203.0.113.9', 201)):
+                response = client.post('/api/workouts', json={'exercise': 'Squats', 'duration': 10},
+                                       headers={'X-Forwarded-For': forwarded}, environ_base=proxy)
+                assert response.status_code == expected
+        finally:
+            limiter.enabled = False
+    
+    def test_expensive_requests_shed(self, client, limited):
+        """Test expensive endpoints answer 503 when the concurrency limit is reached"""
+        limited.concurrency = ConcurrencyLimiter(max_concurrent=0)
+        before = limited.counters['shed']
+        
+        response = client.get('/api/workouts/export?format=ndjson')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert limited.counters['shed'] == before + 1
+    
+    def test_streamed_response_releases_slot(self, client, limited):
+        """Test a streamed export holds its slot until the body is sent"""
+        limited.concurrency = ConcurrencyLimiter(max_concurrent=1)
+        response = client.get('/api/workouts/export?format=ndjson')
+        assert response.status_code == 200
+        response.close()
+        assert limited.concurrency.active == 0
+    
+    def test_counters_exported(self, client, limited):
+        """Test limiter counters are exposed for monitoring"""
+        for _ in range(4):
+            _post_workout(client)
+        data = json.loads(client.get('/health/limits').data)
+        assert data['limits']['limited'] >= 1
+        assert data['limits']['enabled'] is True
+        assert data['limits']['backend'] == 'MemoryBackend'
@@ -0,0 +1,169 @@
+"""
+Unit tests for PDF reports and the background job queue
+"""
+import json
+import threading
+import pytest
+from app.jobs import Job, JobQueue, QueueFull
+from app.models import WorkoutSession, workout_session
+from app.profile import UserProfile, user_profile
+from app.reports import ReportService, report_service
+
+
+class TestJobQueue:
+    """Test background job queue"""
+    
+    def test_run_job(self):
+        """Test a job runs and records its result"""
+        jobs = JobQueue(max_workers=1)
+        job = jobs.submit(lambda a, b: a + b, 2, 3)
+        assert job.wait(5)
+        assert job.status == Job.DONE
+        assert job.result == 5
+        assert jobs.get(job.id) is job
+    
+    def test_failed_job(self):
+        """Test a failing job is reported, not raised"""
+        def boom():
+            raise RuntimeError('broken')
+        
+        job = JobQueue(max_workers=1).submit(boom)
+        assert job.wait(5)
+        assert job.status == Job.FAILED
+        assert 'broken' in job.error
+    
+    def test_queue_bounded(self):
+        """Test submissions beyond the queue size are rejected"""
+        release = threading.Event()
+        jobs = JobQueue(max_workers=1, max_queue=1)
+        jobs.submit(release.wait)
+        
+        with pytest.raises(QueueFull):
+            for _ in range(3):
+                jobs.submit(release.wait)
+        release.set()
+    
+    def test_dedupe_by_key(self):
+        """Test unfinished jobs with the same key are shared"""
+        release = threading.Event()
+        jobs = JobQueue(max_workers=1)
+        first = jobs.submit(release.wait, key='same')
+        second = jobs.submit(release.wait, key='same')
+        assert first is second
+        release.set()
+
+
+class TestReportService:
+    """Test PDF report generation"""
+    
+    @pytest.fixture(autouse=True)
+    def _reportlab(self):
+        pytest.importorskip('reportlab')
+    
+    def test_gym_report(self, tmp_path):
+        """Test building a gym-wide report"""
+        session = WorkoutSession()
+        for i in range(120):
+            session.add_workout(f'Exercise {i}', 10 + i % 30, 'Workout')
+        service = ReportService(cache_dir=str(tmp_path))
+        
+        job = service.submit(session)
+        assert job.wait(30)
+        assert job.status == Job.DONE, job.error
+        with open(job.result, 'rb') as pdf:
+            assert pdf.read(5) == b'%PDF-'
+    
+    def test_cached_report_reused(self, tmp_path):
+        """Test identical requests are served from the disk cache"""
+        session = WorkoutSession()
+        session.add_workout('Running', 30, 'Workout')
+        profile = UserProfile('Alex', 'M001', 175, 70, 30, 'Male')
+        service = ReportService(cache_dir=str(tmp_path))
+        
+        first = service.submit(session, profile, '2000-01-01', '2999-12-31')
+        assert first.wait(30)
+        second = service.submit(session, profile, '2000-01-01', '2999-12-31')
+        assert second.status == Job.DONE
+        assert second.result == first.result
+        
+        session.add_workout('Yoga', 15, 'Cool-down')
+        third = service.submit(session, profile, '2000-01-01', '2999-12-31')
+        assert third.wait(30)
+        assert third.result != first.result
+    
+    def test_cache_key_survives_restart(self, tmp_path):
+        """Test a new store at the same version does not reuse an old PDF"""
+        service = ReportService(cache_dir=str(tmp_path))
+        before, after = WorkoutSession(), WorkoutSession()
+        before.add_workout('Running', 30, 'Workout')
+        after.add_workout('Rowing', 45, 'Workout')
+        assert before.version == after.version
+        
+        first = service.submit(before)
+        assert first.wait(30)
+        second = service.submit(after)
+        assert second.wait(30)
+        assert second.result != first.result
+    
+    def test_cache_is_bounded(self, tmp_path):
+        """Test a rebuilt report replaces its older PDF and the file count is capped"""
+        session = WorkoutSession()
+        session.add_workout('Running', 30, 'Workout')
+        service = ReportService(cache_dir=str(tmp_path), max_files=2)
+        
+        first = service.submit(session)
+        assert first.wait(30)
+        session.add_workout('Yoga', 15, 'Cool-down')
+        second = service.submit(session)
+        assert second.wait(30)
+        assert sorted(p.name for p in tmp_path.glob('report-*.pdf')) == [second.result.rsplit('/', 1)[1]]
+        
+        for year in ('2024', '2025'):
+            job = service.submit(session, date_from=f'{year}-01-01')
+            assert job.wait(30)
+        assert len(list(tmp_path.glob('report-*.pdf'))) == 2
+        assert not (tmp_path / second.result.rsplit('/', 1)[1]).exists()
+
+
+class TestReportAPI:
+    """Test report API endpoints"""
+    
+    def test_submit_and_download(self, client, tmp_path, monkeypatch):
+        """Test the submit/poll/download flow"""
+        pytest.importorskip('reportlab')
+        monkeypatch.setattr(report_service, 'cache_dir', str(tmp_path))
+        workout_session.add_workout('Running', 30, 'Workout')
+        
+        response = client.post('/api/reports', data=json.dumps({}), content_type='application/json')
+        assert response.status_code == 202
+        job_id = json.loads(response.data)['job']['job_id']
+        
+        assert report_service.jobs.get(job_id).wait(30)
+        data = json.loads(client.get(f'/api/reports/{job_id}').data)
+        assert data['job']['status'] == 'done'
+        
+        response = client.get(data['download_url'])
+        assert response.status_code == 200
+        assert response.mimetype == 'application/pdf'
+        
+        # Once pruned from the cache the report has to be built again
+        for pdf in tmp_path.glob('report-*.pdf'):
+            pdf.unlink()
+        assert client.get(data['download_url']).status_code == 410
+    
+    def test_unknown_member(self, client, monkeypatch):
+        """Test member reports require a matching profile"""
+        monkeypatch.setattr(user_profile, 'reg_id', 'M001')
+        response = client.post('/api/reports', data=json.dumps({'member': 'M999'}),
+                               content_type='application/json')
+        assert response.status_code == 404
+    
+    def test_invalid_dates(self, client):
+        """Test malformed dates are rejected"""
+        response = client.post('/api/reports', data=json.dumps({'from': 'yesterday'}),
+                               content_type='application/json')
+        assert response.status_code == 400
+    
+    def test_unknown_job(self, client):
+        """Test polling an unknown job"""
+        assert client.get('/api/reports/nope').status_code == 404
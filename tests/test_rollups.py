@@ -0,0 +1,85 @@
+"""
+Unit tests for time-bucketed rollups
+"""
+import json
+import pytest
+from datetime import date
+from app.models import Workout, WorkoutSession
+from app.rollups import RollupIndex
+
+
+def _workout(day, duration=10, category='Workout'):
+    return Workout('Running', duration, category, timestamp=f'{day}T08:00:00')
+
+
+class TestRollupIndex:
+    """Test rollup buckets"""
+    
+    def test_daily_series(self):
+        """Test per-day totals"""
+        rollups = RollupIndex()
+        rollups.add(_workout('2025-01-02', 30))
+        rollups.add(_workout('2025-01-01', 10, 'Warm-up'))
+        rollups.add(_workout('2025-01-02', 20))
+        
+        series = rollups.series()
+        assert [p['period'] for p in series] == ['2025-01-01', '2025-01-02']
+        assert series[1]['count'] == 2
+        assert series[1]['duration'] == 50
+        assert series[0]['by_category']['Warm-up'] == {'count': 1, 'duration': 10}
+    
+    def test_weekly_and_monthly_series(self):
+        """Test derived weekly and monthly buckets"""
+        rollups = RollupIndex()
+        for day in ('2025-01-06', '2025-01-08', '2025-01-13', '2025-02-01'):
+            rollups.add(_workout(day))
+        
+        weeks = rollups.series(granularity='week')
+        assert [p['period'] for p in weeks] == ['2025-01-06', '2025-01-13', '2025-01-27']
+        assert weeks[0]['count'] == 2
+        
+        months = rollups.series(granularity='month')
+        assert [(p['period'], p['count']) for p in months] == [('2025-01-01', 3), ('2025-02-01', 1)]
+    
+    def test_date_range(self):
+        """Test range bounds are inclusive"""
+        rollups = RollupIndex()
+        for day in ('2025-01-01', '2025-01-02', '2025-01-03'):
+            rollups.add(_workout(day))
+        
+        series = rollups.series(date(2025, 1, 2), date(2025, 1, 3))
+        assert [p['period'] for p in series] == ['2025-01-02', '2025-01-03']
+    
+    def test_unknown_granularity(self):
+        """Test invalid granularity is rejected"""
+        with pytest.raises(ValueError):
+            RollupIndex().series(granularity='year')
+    
+    def test_session_maintains_rollups(self):
+        """Test WorkoutSession keeps rollups in sync"""
+        session = WorkoutSession()
+        session.add_workout('Running', 30, 'Workout')
+        assert session.rollups.bucket_count() == 1
+        
+        session.clear_workouts()
+        assert session.rollups.series() == []
+
+
+class TestTimeseriesAPI:
+    """Test time series API endpoint"""
+    
+    def test_timeseries(self, client, sample_workouts):
+        """Test today's workouts appear in the daily series"""
+        for workout in sample_workouts:
+            client.post('/api/workouts', data=json.dumps(workout), content_type='application/json')
+        
+        response = client.get('/api/workouts/timeseries?granularity=day')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['count'] == 1
+        assert data['series'][0]['count'] == len(sample_workouts)
+    
+    def test_timeseries_invalid(self, client):
+        """Test invalid parameters are rejected"""
+        assert client.get('/api/workouts/timeseries?granularity=year').status_code == 400
+        assert client.get('/api/workouts/timeseries?from=soon').status_code == 400
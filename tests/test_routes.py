@@ -168,6 +168,40 @@ class TestAPIWorkouts:
         data = json.loads(response.data)
         assert data['success'] is True
         assert all(w['category'] == 'Workout' for w in data['workouts'])
+    
+    def test_api_get_workouts_page(self, client):
+        """Test paging through workouts"""
+        for i in range(5):
+            workout_session.add_workout(f'Run {i}', 10, 'Workout')
+            workout_session.add_workout(f'Stretch {i}', 5, 'Warm-up')
+        
+        data = json.loads(client.get('/api/workouts/page?limit=4').data)
+        assert data['count'] == 4
+        assert data['total'] == 10
+        assert data['next_offset'] == 4
+        
+        data = json.loads(client.get('/api/workouts/page?category=Workout&offset=3&limit=4').data)
+        assert [w['exercise'] for w in data['workouts']] == ['Run 3', 'Run 4']
+        assert data['total'] == 5
+        assert data['next_offset'] is None
+    
+    def test_api_get_workouts_page_invalid(self, client):
+        """Test page bounds are validated"""
+        assert client.get('/api/workouts/page?offset=-1').status_code == 400
+        assert client.get('/api/workouts/page?limit=0').status_code == 400
+        assert client.get('/api/workouts/page?limit=100000').status_code == 400
+    
+    def test_workouts_page_renders_first_page(self, client):
+        """Test the workouts page renders only the first page of rows"""
+        from app.routes import PAGE_SIZE
+        for i in range(PAGE_SIZE + 5):
+            workout_session.add_workout(f'Exercise {i:03d}', 10, 'Workout')
+        
+        response = client.get('/workouts')
+        assert response.status_code == 200
+        assert f'Exercise {PAGE_SIZE - 1:03d}'.encode() in response.data
+        assert f'Exercise {PAGE_SIZE:03d}'.encode() not in response.data
+        assert b'data-page-sentinel' in response.data
 
 
 class TestAPIStats:
@@ -207,6 +241,27 @@ class TestAPIStats:
         assert 'Warm-up' in data['stats']['by_category']
         assert 'Workout' in data['stats']['by_category']
         assert 'Cool-down' in data['stats']['by_category']
+    
+    def test_api_stats_etag_taken_before_view(self, client, monkeypatch):
+        """Test a write during the view leaves the response tagged with the older version"""
+        before = workout_session.cache_tag
+        count = workout_session.get_workout_count
+        
+        def count_after_write():
+            workout_session.add_workout('Running', 30, 'Workout')
+            return count()
+        
+        monkeypatch.setattr(workout_session, 'get_workout_count', count_after_write)
+        response = client.get('/api/workouts/stats')
+        monkeypatch.undo()
+        etag = response.headers['ETag']
+        assert etag.startswith(f'"{before}-')
+        
+        # The stale tag no longer matches, so the next request gets fresh data
+        response = client.get('/api/workouts/stats', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        response = client.get('/api/workouts/stats', headers={'If-None-Match': response.headers['ETag']})
+        assert response.status_code == 304
 
 
 class TestAPIClear:
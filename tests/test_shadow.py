@@ -0,0 +1,127 @@
+"""
+Unit tests for shadow traffic mirroring
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from app import create_app
+from app.models import workout_session
+from app.shadow import ConnectionPool, bodies_match
+
+
+class StubShadow(BaseHTTPRequestHandler):
+    """Shadow stand-in answering every request with a canned response"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.server.received.append((self.command, self.path, dict(self.headers), self.rfile.read(length)))
+        status, body = self.server.reply(self.path)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    do_GET = do_POST = _respond
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    """Local HTTP server standing in for the shadow deployment"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubShadow)
+    server.received = []
+    server.reply = lambda path: (200, b'{}')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mirrored_app(stub, monkeypatch):
+    """App mirroring every request to the stub"""
+    monkeypatch.setenv('SHADOW_URL', f'http://127.0.0.1:{stub.server_port}')
+    monkeypatch.setenv('SHADOW_SAMPLE_RATE', '1.0')
+    app = create_app('testing')
+    yield app
+    workout_session.clear_workouts()
+
+
+class TestBodiesMatch:
+    """Test response comparison"""
+    
+    def test_ignores_volatile_fields(self):
+        """Test timestamps and session IDs do not count as differences"""
+        assert bodies_match(b'{"a":1,"timestamp":"x"}', b'{"timestamp":"y","a":1}')
+        assert not bodies_match(b'{"a":1}', b'{"a":2}')
+        assert not bodies_match(b'<html>', b'<html >')
+
+
+class TestConnectionPool:
+    """Test the pooled HTTP client"""
+    
+    def test_reuses_connections(self, stub):
+        """Test keep-alive connections are reused between requests"""
+        pool = ConnectionPool(f'http://127.0.0.1:{stub.server_port}', size=1)
+        assert pool.request('GET', '/a', None, {}) == (200, b'{}')
+        conn = pool._idle.queue[0]
+        assert pool.request('GET', '/b', None, {}) == (200, b'{}')
+        assert pool._idle.queue[0] is conn
+
+
+class TestShadowMirror:
+    """Test mirroring through the app"""
+    
+    def test_disabled_by_default(self, client):
+        """Test nothing is mirrored unless SHADOW_URL is set"""
+        data = json.loads(client.get('/health/shadow').data)
+        assert data['enabled'] is False
+    
+    def test_mirrors_and_compares(self, mirrored_app, stub):
+        """Test sampled requests reach the shadow and mismatches are counted"""
+        client = mirrored_app.test_client()
+        workout_session.add_workout('Squats', 20, 'Workout')
+        stub.reply = lambda path: (200, client.get('/api/workouts', headers={'X-Shadow-Request': '1'}).data)
+        
+        client.get('/api/workouts')
+        client.get('/api/workouts/stats')
+        mirrored_app.extensions['shadow'].join()
+        
+        assert sorted((method, path) for method, path, _, _ in stub.received) == [
+            ('GET', '/api/workouts'), ('GET', '/api/workouts/stats')]
+        assert all(headers['X-Shadow-Request'] == '1' for _, _, headers, _ in stub.received)
+        
+        routes = json.loads(client.get('/health/shadow').data)['shadow']['routes']
+        assert routes['/api/workouts']['mirrored'] == 1
+        assert routes['/api/workouts']['body_mismatches'] == 0
+        assert routes['/api/workouts/stats']['body_mismatches'] == 1
+        assert routes['/api/workouts']['shadow_latency_ms']['p50'] is not None
+    
+    def test_status_mismatch_and_errors(self, mirrored_app, stub):
+        """Test differing statuses and unreachable shadows are recorded"""
+        client = mirrored_app.test_client()
+        stub.reply = lambda path: (500, b'{}')
+        client.get('/api/workouts')
+        mirrored_app.extensions['shadow'].join()
+        
+        stats = mirrored_app.extensions['shadow'].stats()
+        assert stats['routes']['/api/workouts']['status_mismatches'] == 1
+        
+        mirrored_app.extensions['shadow'].pool = ConnectionPool('http://127.0.0.1:1', timeout=1)
+        client.get('/api/workouts/recent')
+        mirrored_app.extensions['shadow'].join()
+        assert mirrored_app.extensions['shadow'].stats()['routes']['/api/workouts/recent']['errors'] == 1
+    
+    def test_writes_not_mirrored_by_default(self, mirrored_app, stub, sample_workout):
+        """Test POSTs stay on the primary unless write mirroring is enabled"""
+        client = mirrored_app.test_client()
+        client.post('/api/workouts', data=json.dumps(sample_workout), content_type='application/json')
+        mirrored_app.extensions['shadow'].join()
+        assert stub.received == []
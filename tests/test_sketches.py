@@ -0,0 +1,186 @@
+"""
+Unit tests for streaming sketches
+"""
+import json
+import random
+import sys
+import threading
+import pytest
+from app.models import WorkoutSession
+from app.sketches import HyperLogLog, LatencyHistogram, SpaceSaving, TDigest, normalize_exercise
+
+
+class TestHyperLogLog:
+    """Test distinct count estimation"""
+    
+    def test_small_counts_exact(self):
+        """Test small cardinalities are effectively exact"""
+        sketch = HyperLogLog()
+        for name in ['Running', 'Yoga', 'Running', 'Squats']:
+            sketch.add(name)
+        assert sketch.count() == 3
+    
+    def test_large_counts_within_bound(self):
+        """Test the estimate stays within a few standard errors"""
+        sketch = HyperLogLog()
+        for i in range(20000):
+            sketch.add(f'exercise-{i}')
+        assert abs(sketch.count() - 20000) / 20000 < 4 * sketch.relative_error
+    
+    def test_fixed_memory(self):
+        """Test register storage does not grow"""
+        sketch = HyperLogLog(precision=10)
+        for i in range(5000):
+            sketch.add(str(i))
+        assert len(sketch.registers) == 1024
+
+
+class TestSpaceSaving:
+    """Test heavy hitters"""
+    
+    def test_top_items(self):
+        """Test frequent items are reported first"""
+        sketch = SpaceSaving(capacity=4)
+        stream = ['run'] * 50 + ['yoga'] * 30 + [f'rare-{i}' for i in range(40)]
+        random.Random(1).shuffle(stream)
+        for item in stream:
+            sketch.add(item)
+        
+        top = sketch.top(2)
+        assert [t['exercise'] for t in top] == ['run', 'yoga']
+        assert len(sketch.counts) <= 4
+        assert all(t['count'] - t['error'] <= 50 for t in top)
+
+
+class TestTDigest:
+    """Test duration quantiles"""
+    
+    def test_quantiles_close(self):
+        """Test quantiles are close to exact values"""
+        rng = random.Random(7)
+        values = [rng.randint(5, 120) for _ in range(20000)]
+        digest = TDigest()
+        for value in values:
+            digest.add(value)
+        
+        values.sort()
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * len(values))]
+            assert abs(digest.quantile(q) - exact) <= 3
+        assert len(digest.means) <= digest.compression
+    
+    def test_empty(self):
+        """Test empty digest has no quantiles"""
+        assert TDigest().quantile(0.5) is None
+    
+    def test_concurrent_reads_and_writes(self):
+        """Test quantile reads while other threads add values"""
+        digest = TDigest(buffer_size=50)
+        
+        def add():
+            for i in range(5000):
+                digest.add(i % 100)
+        
+        writers = [threading.Thread(target=add) for _ in range(4)]
+        for writer in writers:
+            writer.start()
+        while any(writer.is_alive() for writer in writers):
+            value = digest.quantile(0.5)
+            assert value is None or 0 <= value <= 99
+        for writer in writers:
+            writer.join()
+        
+        assert digest.count == 20000
+        assert sum(digest.weights) + len(digest._buffer) == 20000
+
+
+class TestLatencyHistogram:
+    """Test the HDR-style histogram"""
+    
+    def test_percentiles_within_precision(self):
+        """Test percentiles stay within 1% of the exact values"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-5, 1.5) for _ in range(20000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+    
+        exact = sorted(int(v * 1_000_000) for v in values)
+        for percent in (50, 90, 99, 99.9):
+            expected = exact[int(len(exact) * percent / 100 + 0.5) - 1] / 1000
+            assert histogram.percentile(percent) == pytest.approx(expected, rel=0.01)
+        assert histogram.to_dict()['max_ms'] == exact[-1] / 1000
+    
+    def test_merge(self):
+        """Test merged histograms equal one fed every value"""
+        first, second, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(1, 2000):
+            (first if i % 2 else second).record(i / 10000)
+            combined.record(i / 10000)
+        first.merge(second)
+        assert first.to_dict() == combined.to_dict()
+    
+    def test_empty(self):
+        """Test an empty histogram reports no percentiles"""
+        assert LatencyHistogram().to_dict()['p99_ms'] is None
+
+
+class TestWorkoutSketches:
+    """Test sketches maintained by WorkoutSession"""
+    
+    def test_session_updates_sketches(self):
+        """Test add_workout feeds every sketch"""
+        session = WorkoutSession()
+        session.add_workout('Push-ups', 10, 'Workout')
+        session.add_workout('push-ups ', 20, 'Workout')
+        session.add_workout('Yoga', 30, 'Cool-down')
+        
+        data = session.sketches.to_dict()
+        assert data['distinct_exercises']['estimate'] == 2
+        assert data['top_exercises']['items'][0]['count'] == 2
+        assert data['duration_percentiles']['p50'] == 20
+        
+        session.clear_workouts()
+        assert session.sketches.to_dict()['distinct_exercises']['estimate'] == 0
+    
+    def test_concurrent_reads_and_writes(self, client):
+        """Test sketches can be read while workouts are added"""
+        session = WorkoutSession()
+        
+        def add():
+            for i in range(20000):
+                session.add_workout(f'Exercise {i % 500}', 5 + i % 60, 'Workout')
+        
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads often to surface races
+        try:
+            writers = [threading.Thread(target=add) for _ in range(2)]
+            for writer in writers:
+                writer.start()
+            while any(writer.is_alive() for writer in writers):
+                data = session.sketches.to_dict()
+                assert len(data['top_exercises']['items']) <= 10
+            for writer in writers:
+                writer.join()
+        finally:
+            sys.setswitchinterval(interval)
+        
+        assert session.sketches.top_exercises.total == 40000
+        assert client.get('/api/workouts/stats').status_code == 200
+    
+    def test_normalize_exercise(self):
+        """Test names are normalized for counting"""
+        assert normalize_exercise('  Push   Ups ') == 'push ups'
+    
+    def test_stats_api_includes_sketches(self, client, sample_workouts):
+        """Test the stats API exposes approximate analytics"""
+        for workout in sample_workouts:
+            client.post('/api/workouts', data=json.dumps(workout), content_type='application/json')
+        
+        data = json.loads(client.get('/api/workouts/stats').data)
+        approx = data['stats']['approximate']
+        assert approx['distinct_exercises']['estimate'] == 3
+        assert 'relative_error' in approx['distinct_exercises']
+        assert approx['duration_percentiles']['p50'] is not None
+        
+        assert client.get('/analytics').status_code == 200
@@ -0,0 +1,133 @@
+"""
+Tests for the shared worker pool and config loading
+"""
+import threading
+
+import pytest
+
+from app import create_app
+from app.charts import ChartRenderer
+from app.jobs import JobQueue
+from app.models import WorkoutSession
+from app.tasks import QueueFull, TaskPool, task_pool
+
+
+class TestTaskPool:
+    """Test cases for TaskPool"""
+
+    def test_run_returns_result(self):
+        """Test work runs in the pool and its result comes back"""
+        pool = TaskPool(max_workers=2)
+        assert pool.run(lambda a, b: a * b, 6, 7) == 42
+        assert pool.run(lambda: threading.current_thread().name).startswith('task-worker')
+        assert pool.stats()['completed'] == 2
+
+    def test_errors_propagate(self):
+        """Test exceptions reach the caller and are counted"""
+        def boom():
+            raise RuntimeError('boom')
+
+        pool = TaskPool(max_workers=1)
+        with pytest.raises(RuntimeError):
+            pool.run(boom)
+        assert pool.stats()['failed'] == 1
+
+    def test_rejects_when_saturated(self):
+        """Test submissions beyond workers + queue are rejected immediately"""
+        release = threading.Event()
+        pool = TaskPool(max_workers=1, max_queue=1)
+        running = pool.submit(release.wait, 5)
+        queued = pool.submit(release.wait, 5)
+        with pytest.raises(QueueFull):
+            pool.submit(release.wait, 5)
+
+        stats = pool.stats()
+        assert stats['rejected'] == 1
+        assert stats['running'] + stats['queued'] == 2
+
+        release.set()
+        assert running.result(5) and queued.result(5)
+        # Capacity is available again once work finishes
+        assert pool.run(lambda: 'ok', timeout=5) == 'ok'
+
+    def test_configure_resizes(self):
+        """Test the pool can be resized and rejects bad sizes"""
+        pool = TaskPool(max_workers=1)
+        pool.run(lambda: None)
+        pool.configure(3, 4)
+        assert pool.stats()['max_workers'] == 3
+        assert pool.stats()['max_queue'] == 4
+        assert pool.run(lambda: 'resized') == 'resized'
+        with pytest.raises(ValueError):
+            pool.configure(0, 4)
+
+    def test_job_queue_on_pool(self):
+        """Test jobs run on a shared pool and keep their dedupe by key"""
+        release = threading.Event()
+        pool = TaskPool(max_workers=1, max_queue=0)
+        jobs = JobQueue(pool=pool)
+        first = jobs.submit(release.wait, 5, key='same')
+        assert jobs.submit(release.wait, 5, key='same') is first
+        with pytest.raises(QueueFull):
+            jobs.submit(release.wait, 5, key='other')
+
+        release.set()
+        assert first.wait(5)
+        assert first.status == first.DONE
+
+    def test_chart_renderer_rejects_when_busy(self):
+        """Test a saturated pool surfaces QueueFull and caches nothing"""
+        release = threading.Event()
+        pool = TaskPool(max_workers=1, max_queue=0)
+        blocker = pool.submit(release.wait, 5)
+        renderer = ChartRenderer(pool=pool)
+        try:
+            with pytest.raises(QueueFull):
+                renderer.get('categories', 'svg', WorkoutSession())
+            assert not renderer._cache
+        finally:
+            release.set()
+            blocker.result(5)
+
+
+class TestConfigLoading:
+    """Test create_app loads the config classes"""
+
+    def test_testing_config(self):
+        """Test the testing config is applied and sizes the shared pool"""
+        app = create_app('testing')
+        assert app.config['ENV'] == 'testing'
+        assert app.config['SECRET_KEY'] == 'test-secret-key'
+        assert task_pool.max_workers == app.config['MAX_WORKERS']
+        assert task_pool.max_queue == app.config['TASK_QUEUE_SIZE']
+
+    def test_flask_env_selects_config(self, monkeypatch):
+        """Test FLASK_ENV picks the config class when no name is given"""
+        monkeypatch.setenv('FLASK_ENV', 'production')
+        monkeypatch.setenv('SECRET_KEY', 'from-the-secret')
+        monkeypatch.delenv('FLASK_DEBUG', raising=False)
+        app = create_app()
+        assert app.config['ENV'] == 'production'
+        assert app.config['SECRET_KEY'] == 'from-the-secret'
+        assert app.debug is False
+
+    def test_production_requires_secret_key(self, monkeypatch):
+        """Test production refuses to start without a SECRET_KEY"""
+        monkeypatch.setenv('FLASK_ENV', 'production')
+        monkeypatch.delenv('SECRET_KEY', raising=False)
+        with pytest.raises(ValueError):
+            create_app()
+
+    def test_production_rejects_placeholder_key(self, monkeypatch):
+        """Test production refuses example keys such as change-me"""
+        monkeypatch.setenv('FLASK_ENV', 'production')
+        for placeholder in ('change-me', 'dev-secret-key-change-in-production'):
+            monkeypatch.setenv('SECRET_KEY', placeholder)
+            with pytest.raises(ValueError, match='placeholder'):
+                create_app()
+
+    def test_worker_stats_exposed(self, client):
+        """Test pool stats are reported with the other limits"""
+        data = client.get('/health/limits').get_json()
+        assert data['workers']['max_workers'] == task_pool.max_workers
+        assert 'rejected' in data['workers']
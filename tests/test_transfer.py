@@ -0,0 +1,183 @@
+"""
+Unit tests for bulk import/export
+"""
+import io
+import json
+import pytest
+from app.models import Workout, WorkoutSession, workout_session
+from app.transfer import (export_binary, import_binary, export_ndjson, import_ndjson,
+                          export_csv, import_csv, stage_import, TransferError)
+
+
+def _sample_session(count=20):
+    session = WorkoutSession()
+    categories = ['Warm-up', 'Workout', 'Cool-down']
+    for i in range(count):
+        session.add_workout(f'Übung {i % 7}', 5 + i, categories[i % 3])
+    return session
+
+
+def _roundtrip(exporter, importer, workouts, **kwargs):
+    data = b''.join(exporter(workouts, **kwargs))
+    return list(importer(io.BytesIO(data)))
+
+
+class TestTransferFormats:
+    """Test export/import round trips"""
+    
+    @pytest.mark.parametrize('exporter,importer', [
+        (export_binary, import_binary),
+        (export_ndjson, import_ndjson),
+        (export_csv, import_csv),
+    ])
+    def test_roundtrip(self, exporter, importer):
+        """Test every field survives a round trip across several chunks"""
+        session = _sample_session(50)
+        restored = _roundtrip(exporter, importer, session.workouts, chunk_rows=16)
+        assert [w.to_dict() for w in restored] == [w.to_dict() for w in session.workouts]
+    
+    def test_binary_smaller_than_ndjson(self):
+        """Test the columnar format is compact"""
+        session = _sample_session(500)
+        binary = b''.join(export_binary(session.workouts))
+        ndjson = b''.join(export_ndjson(session.workouts))
+        assert len(binary) < len(ndjson) / 3
+    
+    def test_empty_export(self):
+        """Test exporting an empty store"""
+        assert _roundtrip(export_binary, import_binary, []) == []
+        assert _roundtrip(export_csv, import_csv, []) == []
+    
+    def test_binary_rejects_garbage(self):
+        """Test malformed binary data is reported"""
+        with pytest.raises(TransferError):
+            list(import_binary(io.BytesIO(b'not a workout file')))
+    
+    def test_ndjson_validates_records(self):
+        """Test invalid records are rejected with their line number"""
+        data = b'{"exercise": "Running", "duration": 30}\n{"exercise": "", "duration": 5}\n'
+        with pytest.raises(TransferError, match='Record 2'):
+            list(import_ndjson(io.BytesIO(data)))
+    
+    def test_every_format_applies_api_limits(self):
+        """Test binary, NDJSON and CSV records get the API's checks"""
+        bad = [Workout('', 20, 'Workout'), Workout('Running', -5, 'Workout'), Workout('Running', 2000, 'Workout'),
+               Workout('x' * 101, 20, 'Workout'), Workout('Running', 20, 'Bogus')]
+        for workout in bad:
+            for exporter, importer in ((export_binary, import_binary), (export_ndjson, import_ndjson),
+                                       (export_csv, import_csv)):
+                # CSV counts the header as line 1
+                line = 3 if importer is import_csv else 2
+                with pytest.raises(TransferError, match=f'Record {line}'):
+                    _roundtrip(exporter, importer, [Workout('Yoga', 15, 'Cool-down'), workout])
+    
+    def test_binary_reports_row_across_chunks(self):
+        """Test binary errors name the row counted from the start of the upload"""
+        workouts = [Workout('Yoga', 15, 'Cool-down')] * 5 + [Workout('Running', 0, 'Workout')]
+        with pytest.raises(TransferError, match='Record 6: duration'):
+            _roundtrip(export_binary, import_binary, workouts, chunk_rows=4)
+    
+    def test_csv_rejects_undecodable_input(self):
+        """Test CSV that is not UTF-8, or not CSV, is a TransferError"""
+        with pytest.raises(TransferError, match='Invalid CSV'):
+            list(import_csv(io.BytesIO(b'exercise,duration\nRunning,30\n\xff\xfe,5\n')))
+        with pytest.raises(TransferError, match='Invalid CSV'):
+            list(import_csv(io.BytesIO(b'exercise,duration\n' + b'x' * 200000 + b',5\n')))
+    
+    def test_ndjson_generates_missing_fields(self):
+        """Test records without timestamp or session get fresh values"""
+        workouts = list(import_ndjson(io.BytesIO(b'{"exercise": "Running", "duration": 30}\n')))
+        assert workouts[0].timestamp and workouts[0].session_id
+
+
+class TestBulkLoad:
+    """Test the bulk-load path"""
+    
+    def test_from_fields_matches_constructor(self):
+        """Test from_fields produces the same workout as the constructor"""
+        original = Workout('Running', 30, 'Workout', timestamp='2025-03-04T05:06:07.123456', session_id='abcd1234')
+        fast = Workout.from_fields('Running', 30, 'Workout', '2025-03-04T05:06:07.123456', 'abcd1234')
+        assert fast.to_dict() == original.to_dict()
+    
+    def test_stage_import(self, tmp_path):
+        """Test staged imports come back unchanged across several chunks"""
+        source = _sample_session(50)
+        with open(tmp_path / 'staging', 'w+b') as staging:
+            workouts = stage_import(iter(source.workouts), staging)
+            assert staging.tell() == 0
+            assert [w.to_dict() for w in workouts] == [w.to_dict() for w in source.workouts]
+    
+    def test_bulk_load_updates_aggregates(self):
+        """Test bulk-loaded workouts feed every aggregate"""
+        source = _sample_session(30)
+        session = WorkoutSession()
+        assert session.bulk_load(iter(source.workouts), batch_size=7) == 30
+        assert session.get_total_duration() == source.get_total_duration()
+        assert session.get_count_by_category('Workout') == 10
+        assert session.rollups.bucket_count() == 1
+
+
+class TestTransferAPI:
+    """Test import/export endpoints"""
+    
+    @pytest.mark.parametrize('fmt', ['binary', 'ndjson', 'csv'])
+    def test_export_import(self, client, sample_workouts, fmt):
+        """Test exporting then re-importing through the API"""
+        for workout in sample_workouts:
+            client.post('/api/workouts', data=json.dumps(workout), content_type='application/json')
+        
+        exported = client.get(f'/api/workouts/export?format={fmt}')
+        assert exported.status_code == 200
+        assert 'attachment' in exported.headers['Content-Disposition']
+        
+        client.delete('/api/workouts/clear')
+        response = client.post(f'/api/workouts/import?format={fmt}', data=exported.data)
+        assert response.status_code == 201
+        assert json.loads(response.data)['imported'] == len(sample_workouts)
+        assert workout_session.get_workout_count() == len(sample_workouts)
+    
+    def test_import_invalid(self, client):
+        """Test malformed uploads are rejected"""
+        response = client.post('/api/workouts/import?format=binary', data=b'garbage')
+        assert response.status_code == 400
+    
+    def test_import_invalid_timestamp(self, client):
+        """Test a malformed timestamp is a 400, even with a session ID supplied"""
+        data = b'{"exercise": "Running", "duration": 30, "timestamp": "2025-13-45T99:00", "session_id": "abcd1234"}\n'
+        response = client.post('/api/workouts/import?format=ndjson', data=data)
+        assert response.status_code == 400
+        assert 'Record 1' in response.get_json()['error']
+        assert workout_session.get_workout_count() == 0
+    
+    def test_import_non_utf8_csv(self, client):
+        """Test an undecodable CSV upload is a 400, not a server error"""
+        response = client.post('/api/workouts/import?format=csv', data=b'exercise,duration\n\xff,5\n')
+        assert response.status_code == 400
+    
+    def test_import_is_atomic(self, client):
+        """Test an upload with a bad record past the first batch imports nothing"""
+        good = b'{"exercise": "Running", "duration": 30}\n' * 1500
+        version = workout_session.version
+        response = client.post('/api/workouts/import?format=ndjson', data=good + b'{"exercise": "Rowing"}\n')
+        assert response.status_code == 400
+        assert response.get_json()['imported'] == 0
+        assert 'Record 1501' in response.get_json()['error']
+        assert workout_session.get_workout_count() == 0
+        assert workout_session.version == version
+    
+    def test_import_size_limit(self, app, client):
+        """Test uploads over MAX_CONTENT_LENGTH are refused, with or without a length"""
+        app.config['MAX_CONTENT_LENGTH'] = 1024
+        body = b'{"exercise": "Running", "duration": 30}\n' * 100
+        response = client.post('/api/workouts/import?format=ndjson', data=body)
+        assert response.status_code == 413
+        response = client.post('/api/workouts/import?format=ndjson', input_stream=io.BytesIO(body),
+                               headers={'Transfer-Encoding': 'chunked'},
+                               environ_overrides={'wsgi.input_terminated': True})
+        assert response.status_code == 413
+        assert response.get_json()['imported'] == 0
+        assert workout_session.get_workout_count() == 0
+    
+    def test_unknown_format(self, client):
+        """Test unknown formats are rejected"""
+        assert client.get('/api/workouts/export?format=xml').status_code == 400
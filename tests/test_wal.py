@@ -0,0 +1,106 @@
+"""
+Unit tests for the write-ahead log and snapshots
+"""
+import os
+import threading
+import pytest
+from app.models import WorkoutSession
+from app.wal import WriteAheadLog, SNAPSHOT_NAME
+
+
+def _open_session(directory, **kwargs):
+    session = WorkoutSession()
+    log = WriteAheadLog(str(directory), **kwargs)
+    replayed = log.recover(session)
+    session.attach_log(log)
+    return session, log, replayed
+
+
+class TestWriteAheadLog:
+    """Test logging and recovery"""
+    
+    @pytest.mark.parametrize('fsync', ['always', 'batch', 'never'])
+    def test_recover_after_restart(self, tmp_path, fsync):
+        """Test every logged change is replayed on restart"""
+        session, log, _ = _open_session(tmp_path, fsync=fsync)
+        session.add_workout('Stretching', 10, 'Warm-up')
+        session.clear_workouts()
+        session.add_workout('Running', 30, 'Workout', session_id='abc12345')
+        session.add_workout('Yoga', 15, 'Cool-down')
+        log.close()
+        
+        recovered, log, replayed = _open_session(tmp_path)
+        assert replayed == 4
+        assert [w.to_dict() for w in recovered.workouts] == [w.to_dict() for w in session.workouts]
+        assert recovered.get_total_duration() == 45
+        log.close()
+    
+    def test_snapshot_limits_replay(self, tmp_path):
+        """Test recovery loads the snapshot and replays only the tail"""
+        session, log, _ = _open_session(tmp_path, fsync='never')
+        for i in range(5):
+            session.add_workout(f'Exercise {i}', 10)
+        log.snapshot(session)
+        session.add_workout('Tail', 20)
+        log.close()
+        
+        assert os.path.exists(tmp_path / SNAPSHOT_NAME)
+        assert not os.path.exists(tmp_path / 'wal-0.log')
+        
+        recovered, log, replayed = _open_session(tmp_path)
+        assert replayed == 1
+        assert recovered.get_workout_count() == 6
+        assert recovered.workouts[-1].exercise == 'Tail'
+        log.close()
+    
+    def test_automatic_snapshot(self, tmp_path):
+        """Test a snapshot is taken after snapshot_every records"""
+        session, log, _ = _open_session(tmp_path, fsync='batch', snapshot_every=10)
+        for i in range(25):
+            session.add_workout(f'Exercise {i}', 5)
+        log.close()
+        
+        recovered, log, replayed = _open_session(tmp_path)
+        assert recovered.get_workout_count() == 25
+        assert replayed < 25
+        log.close()
+    
+    def test_torn_write_ignored(self, tmp_path):
+        """Test a partial final record is dropped"""
+        session, log, _ = _open_session(tmp_path, fsync='always')
+        session.add_workout('Running', 30)
+        log.close()
+        with open(tmp_path / 'wal-0.log', 'ab') as log_file:
+            log_file.write(b'\x40\x00\x00\x00garbage')
+        
+        recovered, log, _ = _open_session(tmp_path)
+        recovered.add_workout('Cycling', 20)
+        log.close()
+        
+        recovered, log, _ = _open_session(tmp_path)
+        assert [w.exercise for w in recovered.workouts] == ['Running', 'Cycling']
+        log.close()
+    
+    def test_group_commit_concurrent_writers(self, tmp_path):
+        """Test concurrent writers all become durable"""
+        session, log, _ = _open_session(tmp_path, fsync='always')
+        
+        def writer(n):
+            for i in range(20):
+                session.add_workout(f'Writer {n}-{i}', 1)
+        
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.close()
+        
+        recovered, log, _ = _open_session(tmp_path)
+        assert recovered.get_workout_count() == 80
+        log.close()
+    
+    def test_invalid_policy(self, tmp_path):
+        """Test unknown fsync policies are rejected"""
+        with pytest.raises(ValueError):
+            WriteAheadLog(str(tmp_path), fsync='sometimes')